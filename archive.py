@@ -0,0 +1,250 @@
+import argparse
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from records import Article, Summary
+
+
+class DigestArchive:
+    """Every run's articles and summaries in SQLite, with an FTS5 index over title, summary and content.
+
+    Articles are stored once per URL with their latest summary, which is what search
+    sees. A run is its ordered list of article ids together with the summary and tier
+    it actually sent, so any past digest rebuilds exactly, without refetching or
+    resummarizing.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+        conn = self._connect()
+        conn.executescript('''
+            CREATE TABLE IF NOT EXISTS articles (
+                id INTEGER PRIMARY KEY,
+                url TEXT NOT NULL UNIQUE,
+                title TEXT NOT NULL,
+                source TEXT,
+                topic TEXT,
+                published TEXT,
+                summary TEXT NOT NULL,
+                content TEXT NOT NULL DEFAULT '',
+                archived_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_articles_source ON articles (source, published);
+            CREATE INDEX IF NOT EXISTS idx_articles_topic ON articles (topic, published);
+            CREATE INDEX IF NOT EXISTS idx_articles_published ON articles (published);
+
+            CREATE TABLE IF NOT EXISTS runs (
+                id INTEGER PRIMARY KEY,
+                created_at REAL NOT NULL,
+                kind TEXT NOT NULL,
+                label TEXT
+            );
+            CREATE TABLE IF NOT EXISTS run_articles (
+                run_id INTEGER NOT NULL REFERENCES runs (id),
+                position INTEGER NOT NULL,
+                article_id INTEGER NOT NULL REFERENCES articles (id),
+                summary TEXT NOT NULL,
+                tier TEXT,
+                PRIMARY KEY (run_id, position)
+            );
+
+            -- External-content index: the text lives in articles only, triggers keep it in sync
+            CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5 (
+                title, summary, content,
+                content='articles', content_rowid='id', tokenize='porter unicode61'
+            );
+            CREATE TRIGGER IF NOT EXISTS articles_fts_insert AFTER INSERT ON articles BEGIN
+                INSERT INTO articles_fts (rowid, title, summary, content)
+                VALUES (new.id, new.title, new.summary, new.content);
+            END;
+            CREATE TRIGGER IF NOT EXISTS articles_fts_delete AFTER DELETE ON articles BEGIN
+                INSERT INTO articles_fts (articles_fts, rowid, title, summary, content)
+                VALUES ('delete', old.id, old.title, old.summary, old.content);
+            END;
+            CREATE TRIGGER IF NOT EXISTS articles_fts_update AFTER UPDATE ON articles BEGIN
+                INSERT INTO articles_fts (articles_fts, rowid, title, summary, content)
+                VALUES ('delete', old.id, old.title, old.summary, old.content);
+                INSERT INTO articles_fts (rowid, title, summary, content)
+                VALUES (new.id, new.title, new.summary, new.content);
+            END;
+        ''')
+
+    def _connect(self):
+        # One connection per thread; WAL lets searches run while a digest is being archived
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def add_run(self, summaries, kind='daily', label=None):
+        """Archive one digest (Summary records or summary dicts, in order); returns its run id"""
+        now = time.time()
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            run_id = conn.execute('INSERT INTO runs (created_at, kind, label) VALUES (?, ?, ?)',
+                                  (now, kind, label)).lastrowid
+            for position, item in enumerate(summaries):
+                article = getattr(item, 'article', item)
+                # Only rows whose summary or text changed are rewritten, so unchanged
+                # articles seen again don't churn the full-text index
+                conn.execute('''
+                    INSERT INTO articles (url, title, source, topic, published, summary, content, archived_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (url) DO UPDATE SET
+                        title = excluded.title, summary = excluded.summary, content = excluded.content,
+                        topic = COALESCE(articles.topic, excluded.topic), archived_at = excluded.archived_at
+                    WHERE articles.summary != excluded.summary OR articles.content != excluded.content
+                ''', (item['url'], item['title'], item['source'], article.get('topic'),
+                      article.get('published'), item['summary'],
+                      article.get('clean_content') or article.get('content') or '', now))
+                article_id = conn.execute('SELECT id FROM articles WHERE url = ?', (item['url'],)).fetchone()[0]
+                conn.execute('INSERT INTO run_articles VALUES (?, ?, ?, ?, ?)',
+                             (run_id, position, article_id, item['summary'], item.get('tier')))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return run_id
+
+    def search(self, query=None, since=None, until=None, source=None, topic=None, limit=20):
+        """Summary records matching an FTS5 query and filters, best match (or newest) first.
+
+        since/until compare against publishedAt, e.g. '2024-05-01' or '2024-05-01T12:00:00Z'.
+        """
+        where, params = [], []
+        if query:
+            where.append('articles_fts MATCH ?')
+            params.append(query)
+        for column, value in (('a.source', source), ('a.topic', topic)):
+            if value:
+                where.append(f'{column} = ?')
+                params.append(value)
+        if since:
+            where.append('a.published >= ?')
+            params.append(since)
+        if until:
+            where.append('a.published < ?')
+            params.append(until)
+
+        sql = 'SELECT a.title, a.content, a.url, a.source, a.published, a.topic, a.summary FROM articles a'
+        if query:
+            sql += ' JOIN articles_fts ON articles_fts.rowid = a.id'
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        sql += ' ORDER BY ' + ('bm25(articles_fts)' if query else 'a.published DESC') + ' LIMIT ?'
+        params.append(limit)
+        return [self._summary(row) for row in self._connect().execute(sql, params)]
+
+    def runs(self, limit=20):
+        """(run id, created_at, kind, label, article count), newest first"""
+        return self._connect().execute('''
+            SELECT r.id, r.created_at, r.kind, r.label, COUNT(ra.article_id)
+            FROM runs r LEFT JOIN run_articles ra ON ra.run_id = r.id
+            GROUP BY r.id ORDER BY r.id DESC LIMIT ?
+        ''', (limit,)).fetchall()
+
+    def digest(self, run_id):
+        """A past run's summaries, in their original order, exactly as that run sent them"""
+        rows = self._connect().execute('''
+            SELECT a.title, a.content, a.url, a.source, a.published, a.topic,
+                   ra.summary, ra.tier
+            FROM run_articles ra JOIN articles a ON a.id = ra.article_id
+            WHERE ra.run_id = ? ORDER BY ra.position
+        ''', (run_id,))
+        return [self._summary(row) for row in rows]
+
+    def reindex(self):
+        """Rebuild the full-text index from the articles table"""
+        conn = self._connect()
+        conn.execute("INSERT INTO articles_fts (articles_fts) VALUES ('rebuild')")
+        conn.execute("INSERT INTO articles_fts (articles_fts) VALUES ('optimize')")
+
+    def _summary(self, row):
+        title, content, url, source, published, topic, summary = row[:7]
+        article = Article(title, content, url, source, published=published,
+                          clean_content=content, topic=topic)
+        return Summary(article, summary, row[7] if len(row) > 7 else None)
+
+
+def rebuild_digest(archive, run_id, output=None):
+    """Write a past run's digest page (or .txt backup) from the archive alone"""
+    from templates import DigestRenderer, STREAM_BUFFER_SIZE, write_txt_entry, write_txt_header
+
+    summaries = archive.digest(run_id)
+    if not summaries:
+        raise ValueError(f"No archived run {run_id}")
+    created_at = datetime.fromtimestamp(
+        archive._connect().execute('SELECT created_at FROM runs WHERE id = ?', (run_id,)).fetchone()[0]
+    )
+    output = output or f"news_digest_{created_at.strftime('%Y%m%d_%H%M')}.html"
+    with open(output, 'w', encoding='utf-8', buffering=STREAM_BUFFER_SIZE) as f:
+        if output.endswith('.txt'):
+            write_txt_header(f, created_at)
+            for index, item in enumerate(summaries, 1):
+                write_txt_entry(f, index, item)
+        else:
+            DigestRenderer(now=created_at).write_page(f, summaries)
+    return output, len(summaries)
+
+
+def main():
+    # Read directly rather than through Config, so searching needs no API keys in .env
+    from decouple import config
+
+    parser = argparse.ArgumentParser(description="Search and rebuild archived digests")
+    parser.add_argument('--archive', help="Archive database (default: ARCHIVE_PATH)")
+    commands = parser.add_subparsers(dest='command', required=True)
+    search = commands.add_parser('search', help="Keyword and time-range search")
+    search.add_argument('query', nargs='?', help="FTS5 query, e.g. 'quantum AND chip' or 'climat*'")
+    search.add_argument('--since', help="Published at or after, e.g. 2024-05-01")
+    search.add_argument('--until', help="Published before")
+    search.add_argument('--source')
+    search.add_argument('--topic')
+    search.add_argument('--limit', type=int, default=20)
+    runs = commands.add_parser('runs', help="List archived runs")
+    runs.add_argument('--limit', type=int, default=20)
+    rebuild = commands.add_parser('rebuild', help="Rewrite a past digest from the archive")
+    rebuild.add_argument('run_id', type=int)
+    rebuild.add_argument('--output', help="Output file; .txt for a text backup (default: HTML)")
+    commands.add_parser('reindex', help="Rebuild the full-text index")
+    args = parser.parse_args()
+
+    path = args.archive or config('ARCHIVE_PATH', default='digest_archive.sqlite3')
+    if not os.path.exists(path):
+        parser.error(f"{path} does not exist; runs are archived when ARCHIVE_ENABLED is set")
+    archive = DigestArchive(path)
+
+    if args.command == 'search':
+        start = time.perf_counter()
+        try:
+            results = archive.search(args.query, since=args.since, until=args.until,
+                                     source=args.source, topic=args.topic, limit=args.limit)
+        except sqlite3.OperationalError as e:
+            parser.error(f"invalid search query: {e}")
+        for item in results:
+            print(f"📰 {item.article.published or '?'}  {item.title} ({item.source})")
+            print(f"   {item.summary}")
+            print(f"   {item.url}")
+        print(f"🔎 {len(results)} results in {(time.perf_counter() - start) * 1000:.1f} ms")
+    elif args.command == 'runs':
+        for run_id, created_at, kind, label, count in archive.runs(args.limit):
+            print(f"#{run_id}  {datetime.fromtimestamp(created_at):%Y-%m-%d %H:%M}  {kind:<8} "
+                  f"{count:>4} articles  {label or ''}")
+    elif args.command == 'rebuild':
+        output, count = rebuild_digest(archive, args.run_id, args.output)
+        print(f"✅ Rebuilt digest #{args.run_id} ({count} articles): {output}")
+    elif args.command == 'reindex':
+        archive.reindex()
+        print("✅ Full-text index rebuilt")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import os
+
+# Inference backends for the summarization model, selected via SUMMARIZER_BACKEND
+# 'extractive' loads no model at all
+BACKENDS = ('pytorch', 'pytorch-int8', 'onnx', 'extractive')
+
+
+def artifact_dir(model_name, backend, cache_dir):
+    """Where exported/quantized artifacts for a model and backend are cached"""
+    return os.path.join(cache_dir, f"{model_name.replace('/', '--')}--{backend}")
+
+
+def build_summarization_pipeline(model_name, backend='pytorch', cache_dir='model_cache'):
+    """Hugging Face summarization pipeline running on the chosen backend"""
+    if backend == 'extractive':
+        return None
+
+    from transformers import AutoTokenizer, pipeline
+
+    if backend == 'pytorch':
+        return pipeline("summarization", model=model_name)
+
+    if backend == 'pytorch-int8':
+        model = load_quantized_model(model_name, artifact_dir(model_name, backend, cache_dir))
+    elif backend == 'onnx':
+        model = load_onnx_model(model_name, artifact_dir(model_name, backend, cache_dir))
+    else:
+        raise ValueError(f"Unknown summarizer backend '{backend}', expected one of {BACKENDS}")
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    return pipeline("summarization", model=model, tokenizer=tokenizer)
+
+
+def load_quantized_model(model_name, path):
+    """fp32 model with dynamic int8 Linear layers; the quantized weights are cached on disk"""
+    import torch
+    from transformers import AutoConfig, AutoModelForSeq2SeqLM
+
+    weights = os.path.join(path, 'quantized_state_dict.pt')
+    if os.path.exists(weights):
+        # Build the quantized module layout from the config alone, then load cached weights,
+        # so warm starts never materialize the fp32 checkpoint
+        model = AutoModelForSeq2SeqLM.from_config(AutoConfig.from_pretrained(model_name))
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        model.load_state_dict(torch.load(weights))
+    else:
+        model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        os.makedirs(path, exist_ok=True)
+        torch.save(model.state_dict(), weights)
+
+    model.eval()
+    return model
+
+
+def load_onnx_model(model_name, path):
+    """ONNX Runtime seq2seq model, exported once and cached on disk"""
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM
+
+    if os.path.isdir(path) and any(name.endswith('.onnx') for name in os.listdir(path)):
+        return ORTModelForSeq2SeqLM.from_pretrained(path)
+
+    model = ORTModelForSeq2SeqLM.from_pretrained(model_name, export=True)
+    model.save_pretrained(path)
+    return model
@@ -0,0 +1,1064 @@
+import argparse
+import contextlib
+import functools
+import io
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import Counter
+from types import SimpleNamespace
+from fixtures import (StubFetcher, StubNewsAPI, StubSMTPServer, StubSummarizer,
+                      sample_articles, sample_profiles)
+
+
+def rouge_n(candidate, reference, n=1):
+    """ROUGE-N F1 over lowercased word n-grams"""
+    def ngrams(text):
+        words = re.findall(r'\w+', text.lower())
+        return Counter(tuple(words[i:i + n]) for i in range(len(words) - n + 1))
+
+    cand, ref = ngrams(candidate), ngrams(reference)
+    overlap = sum((cand & ref).values())
+    if not overlap:
+        return 0.0
+    precision, recall = overlap / sum(cand.values()), overlap / sum(ref.values())
+    return 2 * precision * recall / (precision + recall)
+
+
+def rouge_l(candidate, reference):
+    """ROUGE-L F1 from the longest common subsequence of words"""
+    cand, ref = re.findall(r'\w+', candidate.lower()), re.findall(r'\w+', reference.lower())
+    if not cand or not ref:
+        return 0.0
+    previous = [0] * (len(ref) + 1)
+    for word in cand:
+        current = [0]
+        for j, ref_word in enumerate(ref):
+            current.append(previous[j] + 1 if word == ref_word else max(previous[j + 1], current[j]))
+        previous = current
+    lcs = previous[-1]
+    if not lcs:
+        return 0.0
+    precision, recall = lcs / len(cand), lcs / len(ref)
+    return 2 * precision * recall / (precision + recall)
+
+
+def bench_batching(args):
+    """Articles/sec of ArticleSummarizer.summarize_many at several batch sizes"""
+    from summarizer import ArticleSummarizer
+
+    summarizer = ArticleSummarizer()
+    texts = [article['content'] for article in sample_articles(args.articles)]
+
+    # Warm up the model so the first measured batch size is not penalized
+    summarizer.summarize_many(texts[:2], batch_size=2)
+
+    print(f"{'batch_size':>10} {'seconds':>10} {'articles/sec':>14}")
+    for batch_size in args.batch_sizes:
+        start = time.perf_counter()
+        summarizer.summarize_many(texts, batch_size=batch_size)
+        elapsed = time.perf_counter() - start
+        print(f"{batch_size:>10} {elapsed:>10.2f} {len(texts) / elapsed:>14.2f}")
+
+
+def bench_fetch(args):
+    """Wall time of NewsFetcher.get_articles, serial vs concurrent, against a slow stub API"""
+    from news_fetcher import NewsFetcher
+
+    latency = dict(zip(args.topics, args.latencies))
+    print(f"Per-topic latency: {latency} (sum {sum(latency.values()):.2f}s, "
+          f"slowest {max(latency.values()):.2f}s)")
+
+    with StubNewsAPI(latency=latency, fail_first=args.fail_first) as stub:
+        print(f"{'workers':>8} {'seconds':>10} {'articles':>10} {'requests':>10}")
+        for workers in (1, len(args.topics)):
+            stub.requests.clear()
+            fetcher = NewsFetcher('stub-key', base_url=stub.base_url, max_workers=workers,
+                                  backoff_factor=0.01)
+            start = time.perf_counter()
+            articles = fetcher.get_articles(args.topics, max_articles=args.articles)
+            elapsed = time.perf_counter() - start
+            print(f"{workers:>8} {elapsed:>10.2f} {len(articles):>10} {len(stub.requests):>10}")
+
+
+def bench_incremental(args):
+    """Requests and articles handed downstream over repeated runs, full window vs watermarks"""
+    import tempfile
+    from fetch_state import FetchState
+    from news_fetcher import NewsFetcher
+
+    # Runs that find nothing new are the common case for frequent schedules
+    published = [args.new_per_run if run % 3 == 2 else 0 for run in range(args.runs)]
+    print(f"{'mode':>12} {'requests':>9} {'304s':>5} {'cached':>7} {'articles':>9}  per run")
+    for mode in ('full window', 'incremental'):
+        with tempfile.TemporaryDirectory() as tmp, \
+                StubNewsAPI(unpublished=sum(published), etag=True) as stub:
+            state = FetchState(os.path.join(tmp, 'fetch_state.sqlite3')) if mode == 'incremental' else None
+            per_run = []
+            cached = 0
+            for count in published:
+                stub.publish(count)
+                fetcher = NewsFetcher('stub-key', base_url=stub.base_url, state=state)
+                articles = fetcher.get_articles(args.topics, max_articles=args.articles)
+                # Every fetched article goes out in the digest
+                fetcher.commit(articles)
+                per_run.append(len(articles))
+                cached += fetcher.stats['cache_hits']
+            print(f"{mode:>12} {len(stub.requests):>9} {stub.not_modified:>5} "
+                  f"{cached:>7} {sum(per_run):>9}  {per_run}")
+
+
+def bench_paging(args):
+    """Requests and articles returned, single fixed-size page per topic vs the paged request planner"""
+    import requests
+    from news_fetcher import NewsFetcher
+
+    def single_page(base_url, topics, max_articles):
+        # The old strategy: one page of max_articles // len(topics) per topic, then truncate
+        if max_articles // len(topics) == 0:
+            return []
+        articles = []
+        for topic in topics:
+            data = requests.get(f"{base_url}/everything", params={
+                'q': topic, 'pageSize': max_articles // len(topics)
+            }).json()
+            articles.extend(a for a in data.get('articles', [])
+                            if a['content'] and len(a['content']) > 100)
+        return articles[:max_articles]
+
+    print(f"{'max_articles':>12} {'topics':>6} {'strategy':>12} {'requests':>9} {'articles':>9}")
+    for max_articles in args.max_articles:
+        with StubNewsAPI(articles_per_topic=300, short_every=args.short_every) as stub:
+            old = single_page(stub.base_url, args.topics, max_articles)
+            old_requests = len(stub.requests)
+            stub.requests.clear()
+            fetcher = NewsFetcher('stub-key', base_url=stub.base_url)
+            new = fetcher.get_articles(args.topics, max_articles=max_articles)
+            for strategy, count, requests_made in (('single page', len(old), old_requests),
+                                                   ('planner', len(new), len(stub.requests))):
+                print(f"{max_articles:>12} {len(args.topics):>6} {strategy:>12} "
+                      f"{requests_made:>9} {count:>9}")
+
+
+def bench_pipeline(args):
+    """Time-to-first-summary and total time, phase barriers vs streaming pipeline, default settings"""
+    from news_fetcher import NewsFetcher
+    from pipeline import DigestPipeline
+    from ranking import ArticleRanker
+
+    latency = dict(zip(args.topics, args.latencies))
+    summarizer = StubSummarizer(seconds_per_article=args.seconds_per_article)
+
+    with StubNewsAPI(latency=latency) as stub:
+        fetcher = NewsFetcher('stub-key', base_url=stub.base_url, max_workers=len(args.topics))
+        # As NewsAgent builds it by default: ranking on, earliest copy of a duplicate kept
+        pipeline = DigestPipeline(fetcher, summarizer, batch_size=8, dedup_threshold=args.dedup_threshold,
+                                  ranker=ArticleRanker(), candidates=args.candidates, dedup_keep='earliest')
+
+        # Phase barriers: every topic, then dedup and ranking, then every summary
+        start = time.perf_counter()
+        articles = fetcher.get_articles(args.topics, max_articles=args.articles * pipeline.candidates)
+        pipeline.summarize_fetched(articles, args.topics, max_articles=args.articles, start=start)
+        barrier_total = time.perf_counter() - start
+
+        summaries, stats = pipeline.run(args.topics, max_articles=args.articles)
+
+    print(f"{'mode':>10} {'first summary':>14} {'total':>8}")
+    print(f"{'barrier':>10} {barrier_total:>13.2f}s {barrier_total:>7.2f}s")
+    print(f"{'pipeline':>10} {stats['time_to_first_summary']:>13.2f}s {stats['total_seconds']:>7.2f}s")
+    print(f"Pipeline stages: fetch {stats['fetch_seconds']:.2f}s, "
+          f"summarize {stats['summarize_seconds']:.2f}s in {stats['batches']} batches, "
+          f"{stats['duplicates_dropped']} duplicates dropped")
+
+
+def legacy_clean_text(text):
+    """The original four-pass ArticleSummarizer.clean_text, kept as the reference output"""
+    text = re.sub(r'\[\+\s*\d+\s*chars?\]', '', text)
+    text = re.sub(r'\[\+\s*\d+\s*characters?\]', '', text)
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'[^\w\s.,!?-]', '', text)
+    return text.strip()
+
+
+def bench_cleaning(args):
+    """Four re.sub passes vs the single-pass normalizer on the recorded corpus"""
+    from cleaning import normalize_text
+    from fixtures import load_corpus
+
+    texts = [article['content'] for articles in load_corpus().values()
+             for article in articles if article['content']]
+    mismatches = sum(legacy_clean_text(text) != normalize_text(text) for text in texts)
+    megabytes = sum(len(text) for text in texts) / 1e6
+    print(f"{len(texts)} texts, {megabytes:.1f} MB, {mismatches} outputs differ from the original")
+    print(f"{'normalizer':>16} {'us/text':>8} {'MB/sec':>8}")
+    for name, fn in (('4x re.sub', legacy_clean_text), ('normalize_text', normalize_text)):
+        result = measure(lambda: [fn(text) for text in texts], len(texts), args.repeat)
+        seconds = result['median_seconds']
+        print(f"{name:>16} {seconds / len(texts) * 1e6:>8.1f} {megabytes / seconds:>8.1f}")
+
+
+def bench_dedup(args):
+    """Dedup throughput and drop counts over the fixture corpus with injected near-duplicates"""
+    from dedup import ArticleDeduplicator
+
+    articles = [{
+        'title': article['title'],
+        'content': article['content'],
+        'url': article['url'],
+        'published': article['publishedAt']
+    } for article in sample_articles(args.articles)]
+
+    # Every tenth story reappears from another outlet with a lightly edited body
+    for article in articles[::10]:
+        words = article['content'].split()
+        words[len(words) // 2] = 'reportedly'
+        articles.append(dict(article, url=article['url'].replace('example.com', 'mirror.example.org'),
+                             content=' '.join(words)))
+
+    for count in (len(articles) // 4, len(articles) // 2, len(articles)):
+        dedup = ArticleDeduplicator(args.dedup_threshold)
+        start = time.perf_counter()
+        kept = dedup.deduplicate(articles[:count])
+        elapsed = time.perf_counter() - start
+        print(f"{count:>7} articles: kept {len(kept)}, dropped {dedup.duplicates} "
+              f"in {elapsed:.2f}s ({count / elapsed:.0f} articles/sec)")
+
+
+def bench_metrics(args):
+    """Per-call overhead of the metrics layer, disabled vs enabled, plus a sample export"""
+    import tempfile
+    from metrics import Metrics
+
+    calls = 200000
+    print(f"{'mode':>9} {'timer ns':>9} {'inc ns':>7}")
+    for enabled in (False, True):
+        registry = Metrics(enabled=enabled)
+        start = time.perf_counter()
+        for _ in range(calls):
+            with registry.timer('bench_seconds', stage='fetch'):
+                pass
+        timer_ns = (time.perf_counter() - start) / calls * 1e9
+        start = time.perf_counter()
+        for _ in range(calls):
+            registry.inc('bench_total', stage='fetch')
+        inc_ns = (time.perf_counter() - start) / calls * 1e9
+        print(f"{'enabled' if enabled else 'disabled':>9} {timer_ns:>9.0f} {inc_ns:>7.0f}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'digest.prom')
+        registry.write_prometheus(path)
+        with open(path) as f:
+            print(f"\nPrometheus textfile sample:\n{''.join(f.readlines()[:6])}")
+
+
+def bench_multi_user(args):
+    """Multi-user fan-out: work done vs a naive per-profile loop, with stub fetcher and summarizer"""
+    from multi_user import MultiUserDigest, profile_queries
+
+    profiles = sample_profiles(args.profiles)
+    fetcher = StubFetcher()
+    summarizer = StubSummarizer()
+    engine = MultiUserDigest(fetcher, summarizer, dedup_threshold=args.dedup_threshold)
+
+    start = time.perf_counter()
+    digests, stats = engine.run(profiles)
+    elapsed = time.perf_counter() - start
+
+    naive_queries = sum(len(profile_queries(profile)) for profile in profiles)
+    naive_articles = sum(len(digest) for digest in digests)
+    print(f"Profiles:          {stats['profiles']}")
+    print(f"Fetch calls:       {fetcher.calls} (naive per-profile loop: {naive_queries})")
+    print(f"Summaries:         {summarizer.texts} (naive per-profile loop: {naive_articles})")
+    print(f"Distinct digests:  {stats['distinct_digests']}")
+    print(f"Duplicates:        {stats['duplicates_dropped']}")
+    print(f"Wall time:         {elapsed:.2f}s (fetch {stats['fetch_seconds']:.2f}s, "
+          f"summarize {stats['summarize_seconds']:.2f}s, assemble {stats['assemble_seconds']:.2f}s)")
+
+
+def bench_scheduler(args):
+    """Send lag past the deadline with and without prefetching, with stub fetcher and summarizer"""
+    from datetime import datetime, timedelta, timezone
+    from multi_user import MultiUserDigest
+    from scheduler import DigestScheduler
+
+    profiles = sample_profiles(args.profiles)
+    print(f"{'prefetch s':>10} {'prepare s':>10} {'send lag s':>11}")
+    for prefetch in (0.0, args.prefetch_seconds):
+        # Shift the clock so the next send_time minute is a couple of seconds past the prefetch lead
+        now = datetime.now(timezone.utc)
+        send_at = now.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        offset = send_at - now - timedelta(seconds=prefetch + 2)
+        group = [dict(profile, send_time=send_at.strftime('%H:%M'), timezone='UTC') for profile in profiles]
+
+        engine = MultiUserDigest(StubFetcher(), StubSummarizer(args.seconds_per_article))
+        sent = []
+        agent = SimpleNamespace(
+            prepare_profile_digests=lambda group, scope=None: engine.run(group, scope)[0],
+            deliver_profile_digests=lambda group, digests: sent.append(datetime.now(timezone.utc) + offset),
+            export_metrics=lambda: None
+        )
+        scheduler = DigestScheduler(agent, lambda: group, prefetch_seconds=prefetch,
+                                    clock=lambda: datetime.now(timezone.utc) + offset)
+        scheduler.run_once(send_at - timedelta(seconds=1))
+        print(f"{prefetch:>10.1f} {scheduler.last_prepare_seconds:>10.2f} "
+              f"{(sent[0] - send_at).total_seconds():>11.2f}")
+
+
+def bench_ranking(args):
+    """Inference calls and on-topic share, first-k vs pre-ranked top-k, over the recorded corpus"""
+    from datetime import datetime, timezone
+    from fixtures import load_corpus
+    from multi_user import MultiUserDigest
+    from ranking import ArticleRanker, terms
+
+    corpus = load_corpus()
+    profiles = sample_profiles(args.profiles)
+    newest = max(raw['publishedAt'] for raws in corpus.values() for raw in raws)
+    now = datetime.strptime(newest, '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=timezone.utc)
+
+    def on_topic(digest, profile):
+        topic_terms = set(term for topic in profile['topics'] for term in terms(topic))
+        return sum(1 for item in digest
+                   if topic_terms & set(terms(f"{item.title} {item.article.clean_content[:300]}")))
+
+    single = [dict(profiles[0], topics=args.topics, sources=[], max_articles=6)]
+    print(f"{'profiles':>8} {'selection':>22} {'candidates':>11} {'summarized':>11} {'on-topic':>9} {'seconds':>8}")
+    for group in (single, profiles):
+        for name, ranker in (('first max_articles', None),
+                             (f"ranked top-k (x{args.candidates})", ArticleRanker(now=now))):
+            summarizer = StubSummarizer()
+            engine = MultiUserDigest(StubFetcher(corpus=corpus), summarizer, ranker=ranker,
+                                     candidates=args.candidates)
+            start = time.perf_counter()
+            digests, stats = engine.run(group)
+            elapsed = time.perf_counter() - start
+            hits = sum(on_topic(digest, profile) for digest, profile in zip(digests, group))
+            total = sum(len(digest) for digest in digests)
+            print(f"{len(group):>8} {name:>22} {stats['articles']:>11} {summarizer.texts:>11} "
+                  f"{hits / total:>9.0%} {elapsed:>8.2f}")
+        # Picking the same top-k by ranking summaries would need every candidate summarized
+        print(f"{'':>8} pre-ranking saves {stats['articles'] - summarizer.texts} of {stats['articles']} "
+              f"inference calls vs summarizing every candidate")
+
+
+def bench_tiering(args):
+    """Digest time and tier mix under several latency budgets, with a simulated model"""
+    from datetime import datetime, timezone
+    from fixtures import load_corpus
+    from multi_user import MultiUserDigest
+    from ranking import ArticleRanker
+    from simulated_summarizer import SimulatedModelSummarizer
+
+    corpus = load_corpus()
+    newest = max(raw['publishedAt'] for raws in corpus.values() for raw in raws)
+    now = datetime.strptime(newest, '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=timezone.utc)
+    profile = dict(sample_profiles(1)[0], topics=args.topics, sources=[], max_articles=args.max_articles[-1])
+
+    print(f"{'budget':>7} {'costs':>10} {'seconds':>8} {'met':>4} {'abstractive':>12} {'extractive':>11} "
+          f"{'lead':>5} {'abstractive ranks':>18}")
+    for budget in args.budgets:
+        # Cold starts from the cost priors; warm has measured the model on the previous run
+        summarizer = SimulatedModelSummarizer(seconds_per_unit=args.seconds_per_unit)
+        for costs in ('cold', 'warm'):
+            engine = MultiUserDigest(StubFetcher(corpus=corpus), summarizer, ranker=ArticleRanker(now=now),
+                                     budget_seconds=budget)
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                digests, _ = engine.run([profile])
+            elapsed = time.perf_counter() - start
+            summaries = digests[0]
+            tiers = Counter(item.tier for item in summaries)
+            ranks = [rank for rank, item in enumerate(summaries, 1) if item.tier == 'abstractive']
+            shown = f"{ranks[0]}-{ranks[-1]}" if ranks else '-'
+            met = 'yes' if not budget or elapsed <= budget else 'no'
+            print(f"{budget or 'none':>7} {costs:>10} {elapsed:>8.2f} {met:>4} "
+                  f"{tiers['abstractive']:>12} {tiers['extractive']:>11} {tiers['lead']:>5} {shown:>18}")
+
+
+def bench_concurrency(args):
+    """Digests per process: back-to-back run_daily_digest vs concurrent run_daily_digest_async"""
+    import json
+    import tempfile
+    from fixtures import load_corpus
+
+    script = ("import asyncio, contextlib, io, json, sys, time, main\n"
+              "count = int(sys.argv[1])\n"
+              "agent = main.NewsAgent()\n"
+              "preferences = agent.load_preferences()\n"
+              "async def concurrent():\n"
+              "    await asyncio.gather(*(agent.run_daily_digest_async(preferences, headless=True, label=str(i))\n"
+              "                           for i in range(count)))\n"
+              "seconds = {}\n"
+              "with contextlib.redirect_stdout(io.StringIO()):\n"
+              "    start = time.perf_counter()\n"
+              "    for _ in range(count):\n"
+              "        agent.run_daily_digest(headless=True)\n"
+              "    seconds['sequential'] = time.perf_counter() - start\n"
+              "    start = time.perf_counter()\n"
+              "    asyncio.run(concurrent())\n"
+              "    seconds['async'] = time.perf_counter() - start\n"
+              "agent.close()\n"
+              "print(json.dumps(seconds))\n")
+    corpus = load_corpus()
+    topics = [topic for topic in args.topics if topic in corpus] or list(corpus)[:4]
+    latency = dict(zip(topics, args.latencies))
+
+    print(f"{'digests':>8} {'mode':>11} {'seconds':>8} {'digests/sec':>12} {'speedup':>8}")
+    with StubNewsAPI(corpus=corpus, latency=latency) as stub, \
+            StubSMTPServer(connect_latency=args.smtp_latency) as sink:
+        host, port = sink.address
+        # Fetch state and the summary cache are off, so every digest does the full work
+        env = dict(os.environ,
+                   PYTHONPATH=os.path.dirname(os.path.abspath(__file__)),
+                   NEWS_API_KEY='stub-key', NEWS_API_URL=stub.base_url,
+                   EMAIL_ADDRESS='digest@example.com', EMAIL_PASSWORD='',
+                   SMTP_SERVER=host, SMTP_PORT=str(port), SMTP_USE_TLS='False',
+                   FETCH_INCREMENTAL='False', FETCH_HTTP_CACHE='False', SUMMARY_CACHE_ENABLED='False',
+                   SUMMARIZER_BACKEND='extractive')
+        for count in args.digests:
+            with tempfile.TemporaryDirectory() as tmp:
+                with open(os.path.join(tmp, 'user_preferences.json'), 'w') as f:
+                    json.dump({'topics': topics, 'sources': [], 'max_articles': args.articles,
+                               'send_email': True,
+                               'email_recipients': [f"user{i}@example.com" for i in range(args.recipients)]}, f)
+                output = subprocess.run([sys.executable, '-c', script, str(count)], cwd=tmp, env=env,
+                                        capture_output=True, text=True, check=True).stdout
+            seconds = json.loads(output.strip().splitlines()[-1])
+            for mode in ('sequential', 'async'):
+                print(f"{count:>8} {mode:>11} {seconds[mode]:>8.2f} {count / seconds[mode]:>12.2f} "
+                      f"{seconds['sequential'] / seconds[mode]:>7.2f}x")
+
+
+def bench_email(args):
+    """Per-message SMTP sessions vs pooled send_many against a local SMTP sink"""
+    from email_sender import EmailSender
+
+    with StubSMTPServer(connect_latency=args.smtp_latency, drop_every=args.drop_every) as sink:
+        host, port = sink.address
+        config = SimpleNamespace(EMAIL_ADDRESS='digest@example.com', EMAIL_PASSWORD='',
+                                 SMTP_SERVER=host, SMTP_PORT=port, SMTP_USE_TLS=False,
+                                 SMTP_TIMEOUT=10)
+        sender = EmailSender(config)
+        html = '<p>' + ' '.join(article['content'] for article in sample_articles(6)) + '</p>'
+        messages = [(f"user{i}@example.com", html) for i in range(args.recipients)]
+
+        print(f"{'mode':>22} {'seconds':>8} {'msgs/sec':>9} {'sent':>6} {'connections':>12}")
+
+        def report(mode, elapsed, sent):
+            print(f"{mode:>22} {elapsed:>8.2f} {len(messages) / elapsed:>9.1f} "
+                  f"{sent:>6} {sink.connections:>12}")
+
+        start = time.perf_counter()
+        sent = sum(1 for recipient, body in messages if sender.send_digest(recipient, body))
+        report('send_digest per msg', time.perf_counter() - start, sent)
+
+        for workers in args.smtp_workers:
+            sink.connections = 0
+            start = time.perf_counter()
+            results = sender.send_many(messages, workers=workers)
+            report(f"send_many x{workers}", time.perf_counter() - start,
+                   sum(1 for result in results if result['sent']))
+
+
+def bench_records(args):
+    """Memory per 100k articles and summaries: the original dicts vs slotted records"""
+    import json
+    import tracemalloc
+    from cleaning import normalize_text
+    from fixtures import load_corpus
+    from records import Article, Summary
+
+    corpus = [article for articles in load_corpus().values() for article in articles
+              if article['content'] and len(article['content']) > 100]
+    count = args.records
+
+    def raw_pages(page_size=5000):
+        # Parsed from JSON page by page, so strings are separate objects as in real responses
+        for start in range(0, count, page_size):
+            page = [dict(corpus[i % len(corpus)], url=f"{corpus[i % len(corpus)]['url']}?n={i}")
+                    for i in range(start, min(count, start + page_size))]
+            yield json.loads(json.dumps(page))
+
+    def as_dicts(raw):
+        # The shapes the original fetcher and digest built: raw content, no normalized copy
+        article = {'title': raw['title'], 'content': raw['content'], 'url': raw['url'],
+                   'source': raw['source']['name'], 'published': raw['publishedAt']}
+        summary = {'title': article['title'], 'summary': normalize_text(raw['content'])[:200],
+                   'url': article['url'], 'source': article['source']}
+        return article, summary
+
+    def as_records(raw):
+        article = Article(raw['title'], raw['content'], raw['url'], raw['source']['name'],
+                          published=raw['publishedAt'], clean_content=normalize_text(raw['content']))
+        return article, Summary(article, article.clean_content[:200])
+
+    def footprint(convert):
+        tracemalloc.start()
+        kept = []
+        for page in raw_pages():
+            kept.extend(convert(item) for item in page)
+            del page
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return size, kept
+
+    scale = 100000 / count
+    print(f"{count} articles, reported per 100k")
+    print(f"{'representation':>28} {'MB / 100k':>10} {'bytes/article':>14}")
+
+    def report(name, size):
+        print(f"{name:>28} {size * scale / 1e6:>10.1f} {size / count:>14.0f}")
+
+    size, kept = footprint(as_dicts)
+    report('dict article + dict summary', size)
+    del kept
+    size, kept = footprint(as_records)
+    report('Article + Summary (slots)', size)
+    del kept
+
+    # Fields only, with the strings shared by every representation left out
+    sample = [as_dicts(raw) for raw in next(raw_pages(100))]
+    records = [as_records(raw) for raw in next(raw_pages(100))]
+    dict_overhead = sum(sys.getsizeof(a) + sys.getsizeof(s) for a, s in sample) / len(sample)
+    record_overhead = sum(sys.getsizeof(a) + sys.getsizeof(s) for a, s in records) / len(records)
+    print(f"Container overhead per article: {dict_overhead:.0f} bytes as dicts, "
+          f"{record_overhead:.0f} bytes as records")
+
+
+def bench_streaming(args):
+    """Peak memory writing huge page and email digests: whole-document strings vs streamed writers"""
+    import tempfile
+    import tracemalloc
+    from records import Article, Summary
+    from templates import STREAM_BUFFER_SIZE, DigestRenderer
+
+    def whole(render):
+        def write(f, summaries):
+            f.write(render(summaries))
+        return write
+
+    print(f"{'articles':>9} {'document':>8} {'writer':>9} {'MB written':>11} {'peak MB':>8} {'seconds':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'digest.html')
+        for size in args.digest_sizes:
+            summaries = [Summary(Article(raw['title'], raw['content'], raw['url'], raw['source']['name']),
+                                 raw['content'][:300]) for raw in sample_articles(size)]
+            renderer = DigestRenderer()
+            for document, render, stream in (('page', renderer.render_page, renderer.write_page),
+                                             ('email', renderer.render_email, renderer.write_email)):
+                for writer, write in (('string', whole(render)), ('streamed', stream)):
+                    tracemalloc.start()
+                    start = time.perf_counter()
+                    with open(path, 'w', encoding='utf-8', buffering=STREAM_BUFFER_SIZE) as f:
+                        write(f, summaries)
+                    elapsed = time.perf_counter() - start
+                    peak = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.stop()
+                    # Page cards cached by the string renderer would count against the next case
+                    renderer = DigestRenderer()
+                    print(f"{size:>9} {document:>8} {writer:>9} {os.path.getsize(path) / 1e6:>11.1f} "
+                          f"{peak / 1e6:>8.1f} {elapsed:>8.2f}")
+
+
+def bench_render(args):
+    """Email digests/sec for many recipients: fresh render each vs shared precompiled fragments"""
+    from multi_user import MultiUserDigest
+    from templates import DigestRenderer
+
+    digests, _ = MultiUserDigest(StubFetcher(), StubSummarizer()).run(sample_profiles(args.profiles))
+    recipients = list(digests)
+
+    def report(mode, elapsed):
+        print(f"{mode:>28} {elapsed:>8.2f}s {len(recipients) / elapsed:>12.0f} digests/sec")
+
+    start = time.perf_counter()
+    for summaries in recipients:
+        DigestRenderer().render_email(summaries)
+    report('fresh render per recipient', time.perf_counter() - start)
+
+    start = time.perf_counter()
+    renderer = DigestRenderer()
+    for summaries in recipients:
+        renderer.render_email(summaries)
+    report('shared card fragments', time.perf_counter() - start)
+
+
+def bench_archive(args):
+    """Archive ingest rate and query latency vs scanning per-run .txt backups"""
+    import tempfile
+    from archive import DigestArchive, rebuild_digest
+    from cleaning import normalize_text
+    from fixtures import load_corpus
+    from records import Article, Summary
+    from templates import write_txt_entry, write_txt_header
+
+    articles = [(topic, raw) for topic, raws in load_corpus().items() for raw in raws
+                if raw['content'] and len(raw['content']) > 100]
+    per_run = args.articles
+    with tempfile.TemporaryDirectory() as directory:
+        archive = DigestArchive(os.path.join(directory, 'archive.sqlite3'))
+        start = time.perf_counter()
+        for run in range(args.runs):
+            digest = []
+            for i in range(run * per_run, (run + 1) * per_run):
+                topic, raw = articles[i % len(articles)]
+                clean = normalize_text(raw['content'])
+                article = Article(raw['title'], raw['content'], f"{raw['url']}?run={run}", raw['source']['name'],
+                                  published=raw['publishedAt'], clean_content=clean, topic=topic)
+                digest.append(Summary(article, clean[:300]))
+            archive.add_run(digest, 'bench')
+            with open(os.path.join(directory, f"digest_{run:04d}.txt"), 'w', encoding='utf-8') as f:
+                write_txt_header(f)
+                for index, item in enumerate(digest, 1):
+                    write_txt_entry(f, index, item)
+        elapsed = time.perf_counter() - start
+        total = args.runs * per_run
+        print(f"Archived {args.runs} runs x {per_run} articles in {elapsed:.2f}s "
+              f"({total / elapsed:.0f} articles/sec, with .txt backups)")
+
+        # The fixture vocabulary is small, so a single word matches most articles;
+        # a title phrase stands in for a selective search
+        word = re.findall(r'[a-z]{4,}', articles[0][1]['title'].lower())[0]
+        phrase = ' '.join(articles[0][1]['title'].lower().split()[:4])
+        txt_files = [os.path.join(directory, name) for name in os.listdir(directory) if name.endswith('.txt')]
+
+        def scan():
+            hits = 0
+            for path in txt_files:
+                with open(path, encoding='utf-8') as f:
+                    hits += sum(1 for line in f if phrase in line.lower())
+            return hits
+
+        published = sorted(raw['publishedAt'] for _, raw in articles)
+        since = published[len(published) // 2]
+        print(f"{'query':>34} {'ms':>8} {'results':>8}")
+        for name, query in (("scan .txt backups for phrase", scan),
+                            ("FTS5 phrase", lambda: archive.search(f'"{phrase}"', limit=10 ** 9)),
+                            (f"FTS5 '{word}', best 20", lambda: archive.search(word)),
+                            ("published since (index)", lambda: archive.search(since=since)),
+                            ("topic + time range", lambda: archive.search(topic=articles[0][0], since=since)),
+                            ("rebuild one digest (HTML)",
+                             lambda: rebuild_digest(archive, 1, os.path.join(directory, 'rebuilt.html'))[1])):
+            result = measure(query, 1, args.repeat)
+            found = query()
+            print(f"{name:>34} {result['median_seconds'] * 1000:>8.1f} "
+                  f"{found if isinstance(found, int) else len(found):>8}")
+
+
+def bench_backends(args):
+    """Speed and ROUGE agreement with the fp32 PyTorch baseline for each inference backend"""
+    from summarizer import ArticleSummarizer
+
+    texts = [article['content'] for article in sample_articles(args.articles, seed=42)]
+    baseline = None
+
+    print(f"{'backend':>14} {'load s':>8} {'articles/sec':>13} {'ROUGE-1':>8} {'ROUGE-2':>8} {'ROUGE-L':>8}")
+    for backend in ['pytorch'] + [name for name in args.backends if name != 'pytorch']:
+        start = time.perf_counter()
+        summarizer = ArticleSummarizer(backend=backend, model_name=args.model,
+                                       model_cache_dir=args.model_cache_dir)
+        available = summarizer.warmup()
+        load_seconds = time.perf_counter() - start
+        if not available:
+            print(f"{backend:>14} unavailable")
+            continue
+
+        summarizer.summarize_many(texts[:2], batch_size=2)
+        start = time.perf_counter()
+        outputs = summarizer.summarize_many(texts, batch_size=args.batch_sizes[-1])
+        rate = len(texts) / (time.perf_counter() - start)
+
+        if baseline is None:
+            baseline = outputs
+        scores = [sum(metric(out, ref) for out, ref in zip(outputs, baseline)) / len(outputs)
+                  for metric in (rouge_n, lambda c, r: rouge_n(c, r, 2), rouge_l)]
+        print(f"{backend:>14} {load_seconds:>8.1f} {rate:>13.2f} "
+              f"{scores[0]:>8.3f} {scores[1]:>8.3f} {scores[2]:>8.3f}")
+
+
+def bench_chunking(args):
+    """Long articles: 1024-character truncation vs token-aware map-reduce chunking"""
+    from summarizer import ArticleSummarizer, GENERATION_PARAMS
+
+    summarizer = ArticleSummarizer(model_name=args.model, backend=args.backends[0],
+                                   model_cache_dir=args.model_cache_dir)
+    if not summarizer.warmup():
+        print("Summarization model unavailable")
+        return
+    pipe = summarizer.summarizer
+    # Long articles: several fixture articles' worth of text each
+    contents = [article['content'] for article in sample_articles(args.articles * 6, seed=7)]
+    texts = [summarizer.clean_text(' '.join(contents[i:i + 6])) for i in range(0, len(contents), 6)]
+    total_tokens = sum(len(ids) for ids in pipe.tokenizer(texts, add_special_tokens=False)['input_ids'])
+    params = dict(max_length=GENERATION_PARAMS['max_length'], min_length=GENERATION_PARAMS['min_length'],
+                  do_sample=GENERATION_PARAMS['do_sample'])
+
+    start = time.perf_counter()
+    truncated = [text[:1024] for text in texts]
+    pipe(truncated, batch_size=8, **params)
+    truncation_seconds = time.perf_counter() - start
+    seen = sum(len(ids) for ids in pipe.tokenizer(truncated, add_special_tokens=False)['input_ids'])
+
+    start = time.perf_counter()
+    summarizer.abstractive_summaries(texts, batch_size=8)
+    chunked_seconds = time.perf_counter() - start
+    chunks = summarizer.chunk_token_ids(texts)
+
+    print(f"{len(texts)} articles, {total_tokens / len(texts):.0f} tokens each on average")
+    print(f"{'strategy':>12} {'seconds':>8} {'input tokens used':>18} {'chunks/article':>15}")
+    print(f"{'truncate':>12} {truncation_seconds:>8.2f} {seen / total_tokens:>17.0%} {1:>15.1f}")
+    print(f"{'map-reduce':>12} {chunked_seconds:>8.2f} "
+          f"{sum(len(ids) for c in chunks for ids in c) / total_tokens:>17.0%} "
+          f"{sum(map(len, chunks)) / len(chunks):>15.1f}")
+
+
+def bench_startup(args):
+    """Cold-start time and peak RSS of constructing NewsAgent, lazy vs warmed up"""
+    scripts = {
+        'lazy (default)': "import main; main.NewsAgent()",
+        'warmup': "import main; main.NewsAgent().summarizer.warmup()",
+    }
+
+    print(f"{'mode':>16} {'seconds':>8} {'peak RSS MB':>12}")
+    for mode, script in scripts.items():
+        start = time.perf_counter()
+        process = subprocess.Popen([sys.executable, '-c', script],
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        # wait4 gives this child's own resource usage; ru_maxrss is in KB on Linux
+        _, status, usage = os.wait4(process.pid, 0)
+        elapsed = time.perf_counter() - start
+        result = f"{elapsed:>8.2f} {usage.ru_maxrss / 1024:>12.0f}"
+        print(f"{mode:>16} {result}" + ("" if status == 0 else "  (failed)"))
+
+
+def bench_extractive(args):
+    """Extractive summarization throughput, one article at a time vs one batch"""
+    from extractive import ExtractiveEngine
+
+    texts = [article['content'] for article in sample_articles(args.articles)]
+    for method in ('frequency', 'textrank'):
+        engine = ExtractiveEngine(method)
+
+        start = time.perf_counter()
+        for text in texts:
+            engine.summarize_many([text])
+        single = time.perf_counter() - start
+
+        start = time.perf_counter()
+        engine.summarize_many(texts)
+        batched = time.perf_counter() - start
+        print(f"{method:>10}: {len(texts) / single:>8.0f} articles/sec one at a time, "
+              f"{len(texts) / batched:>8.0f} articles/sec batched")
+
+
+def bench_workers(args):
+    """Scaling curve of the multi-process summarizer pool from 1 to N workers"""
+    from worker_pool import SummarizerPool
+
+    if args.stub_summarizer:
+        factory = functools.partial(StubSummarizer, args.seconds_per_article, 0.0, True)
+    else:
+        from summarizer import ArticleSummarizer
+        factory = functools.partial(ArticleSummarizer, model_name=args.model,
+                                    backend=args.backends[0], model_cache_dir=args.model_cache_dir)
+    texts = [article['content'] for article in sample_articles(args.articles, seed=42)]
+
+    print(f"{'workers':>8} {'seconds':>8} {'articles/sec':>13} {'speedup':>8}  per-worker articles/sec")
+    baseline = None
+    for workers in args.workers:
+        with SummarizerPool(factory, num_workers=workers, batch_size=args.batch_sizes[-1]) as pool:
+            pool.summarize_many(texts[:workers], batch_size=1)
+            for stats in pool.worker_stats.values():
+                stats.update(batches=0, articles=0, busy_seconds=0.0)
+
+            start = time.perf_counter()
+            pool.summarize_many(texts)
+            elapsed = time.perf_counter() - start
+            per_worker = ' '.join(f"{stats['articles_per_sec']:.1f}" for stats in pool.stats().values())
+        baseline = baseline or elapsed
+        print(f"{workers:>8} {elapsed:>8.2f} {len(texts) / elapsed:>13.2f} "
+              f"{baseline / elapsed:>7.2f}x  {per_worker}")
+
+
+def measure(fn, items=1, repeat=5):
+    """Wall-time stats of `repeat` calls to fn, with items/sec from the median run"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    times.sort()
+    median = times[len(times) // 2]
+    return {
+        'runs': repeat,
+        'items': items,
+        'min_seconds': times[0],
+        'median_seconds': median,
+        'max_seconds': times[-1],
+        'items_per_sec': items / median if median else None
+    }
+
+
+def latencies(fn, inputs):
+    """Per-item latency percentiles, in milliseconds, of fn over inputs"""
+    samples = []
+    for item in inputs:
+        start = time.perf_counter()
+        fn(item)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+
+    def pick(quantile):
+        return samples[min(len(samples) - 1, int(quantile * len(samples)))] * 1000
+    return {'p50_ms': pick(0.5), 'p95_ms': pick(0.95), 'p99_ms': pick(0.99)}
+
+
+def suite_end_to_end(args, corpus):
+    """NewsAgent.run_daily_digest in a subprocess against the stub API and SMTP sink"""
+    import json
+    import tempfile
+
+    script = ("import json, time, main\n"
+              "agent = main.NewsAgent()\n"
+              "start = time.perf_counter()\n"
+              "agent.run_daily_digest()\n"
+              "print(json.dumps({'seconds': time.perf_counter() - start}))\n")
+    topics = list(corpus)[:4]
+    times = []
+    with StubNewsAPI(corpus=corpus) as stub, StubSMTPServer() as sink:
+        host, port = sink.address
+        env = dict(os.environ,
+                   PYTHONPATH=os.path.dirname(os.path.abspath(__file__)),
+                   BROWSER='true',
+                   NEWS_API_KEY='stub-key', NEWS_API_URL=stub.base_url,
+                   EMAIL_ADDRESS='digest@example.com', EMAIL_PASSWORD='',
+                   SMTP_SERVER=host, SMTP_PORT=str(port), SMTP_USE_TLS='False',
+                   SUMMARIZER_MODEL=args.model,
+                   SUMMARIZER_BACKEND=args.backends[0] if args.abstractive else 'extractive')
+        for _ in range(args.repeat):
+            # A fresh directory per run, so fetch state and caches start cold every time
+            with tempfile.TemporaryDirectory() as tmp:
+                with open(os.path.join(tmp, 'user_preferences.json'), 'w') as f:
+                    json.dump({'topics': topics, 'sources': [], 'max_articles': args.articles,
+                               'send_email': True,
+                               'email_recipients': [f"user{i}@example.com" for i in range(args.recipients)]}, f)
+                output = subprocess.run([sys.executable, '-c', script], cwd=tmp, env=env,
+                                        capture_output=True, text=True, check=True).stdout
+                times.append(json.loads(output.strip().splitlines()[-1])['seconds'])
+    times.sort()
+    return {'runs': len(times), 'items': args.articles, 'min_seconds': times[0],
+            'median_seconds': times[len(times) // 2], 'max_seconds': times[-1],
+            'items_per_sec': args.articles / times[len(times) // 2]}
+
+
+def bench_suite(args):
+    """Throughput and latency of every stage on the recorded corpus, saved as JSON"""
+    import json
+    import platform
+    from email_sender import EmailSender
+    from fixtures import load_corpus
+    from news_fetcher import NewsFetcher
+    from summarizer import ArticleSummarizer
+    from templates import DigestRenderer
+
+    corpus = load_corpus()
+    raw = [article for articles in corpus.values() for article in articles]
+    contents = [article['content'] for article in raw if article['content']]
+    summarizer = ArticleSummarizer(backend='extractive')
+    cleaned = [summarizer.clean_text(text) for text in contents]
+    digest = [{'title': article['title'], 'summary': summarizer.first_sentences(article['content'] or ''),
+               'url': article['url'], 'source': article['source']['name']} for article in raw[:10]]
+
+    def clean_case():
+        result = measure(lambda: [summarizer.clean_text(text) for text in contents],
+                         len(contents), args.repeat)
+        return dict(result, **latencies(summarizer.clean_text, contents))
+
+    def extractive_case():
+        sample = cleaned[:args.articles * 10]
+        result = measure(lambda: summarizer.extractive_summaries(sample), len(sample), args.repeat)
+        return dict(result, **latencies(summarizer.extractive_summary, sample[:args.articles]))
+
+    def abstractive_case():
+        model = ArticleSummarizer(model_name=args.model, backend=args.backends[0],
+                                  model_cache_dir=args.model_cache_dir)
+        if not model.warmup():
+            raise RuntimeError(f"model {args.model} unavailable")
+        sample = contents[:args.articles]
+        result = measure(lambda: model.summarize_many(sample, batch_size=8), len(sample), args.repeat)
+        return dict(result, **latencies(model.summarize, sample[:8]))
+
+    def render_case():
+        renderer = DigestRenderer()
+        result = measure(lambda: [renderer.render_email(digest) for _ in range(1000)], 1000, args.repeat)
+        return dict(result, page_ms=measure(lambda: renderer.render_page(digest), 1, args.repeat)['median_seconds'] * 1000,
+                    **latencies(lambda _: DigestRenderer().render_email(digest), range(200)))
+
+    def fetch_case():
+        topics = list(corpus)[:4]
+        with StubNewsAPI(corpus=corpus) as stub:
+            fetcher = NewsFetcher('stub-key', base_url=stub.base_url, max_workers=len(topics))
+            result = measure(lambda: fetcher.get_articles(topics, max_articles=args.articles),
+                             args.articles, args.repeat)
+            return dict(result, **latencies(lambda topic: fetcher.fetch_topic(topic, limit=10), topics * 5))
+
+    def email_case():
+        with StubSMTPServer() as sink:
+            host, port = sink.address
+            sender = EmailSender(SimpleNamespace(EMAIL_ADDRESS='digest@example.com', EMAIL_PASSWORD='',
+                                                 SMTP_SERVER=host, SMTP_PORT=port, SMTP_USE_TLS=False,
+                                                 SMTP_TIMEOUT=10))
+            html = DigestRenderer().render_email(digest)
+            messages = [(f"user{i}@example.com", html) for i in range(args.recipients)]
+            result = measure(lambda: sender.send_many(messages, workers=4), len(messages), args.repeat)
+            return dict(result, **latencies(lambda message: sender.send_digest(*message), messages[:20]))
+
+    cases = {
+        'clean_text': clean_case,
+        'extractive_summary': extractive_case,
+        'abstractive_summarize': abstractive_case,
+        'render': render_case,
+        'fetch': fetch_case,
+        'email': email_case,
+        'end_to_end': lambda: suite_end_to_end(args, corpus),
+    }
+    if not args.abstractive:
+        del cases['abstractive_summarize']
+
+    results = {}
+    for name, case in cases.items():
+        print(f"⏱️ {name}...")
+        # The stages' own progress prints would swamp the report
+        with contextlib.redirect_stdout(io.StringIO()):
+            try:
+                results[name] = case()
+            except Exception as e:
+                results[name] = {'error': str(e)}
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ''
+    report = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'corpus_articles': len(raw),
+        'settings': {'articles': args.articles, 'recipients': args.recipients, 'repeat': args.repeat,
+                     'model': args.model if args.abstractive else None},
+        'results': results
+    }
+    os.makedirs(args.output_dir, exist_ok=True)
+    path = os.path.join(args.output_dir, f"bench_{time.strftime('%Y%m%d_%H%M%S')}_{commit or 'nocommit'}.json")
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+    print(f"{'case':>22} {'median s':>10} {'items/sec':>11} {'p95 ms':>9}" + (f" {'vs baseline':>12}" if baseline else ""))
+    for name, result in results.items():
+        if 'error' in result:
+            print(f"{name:>22} error: {result['error']}")
+            continue
+        p95 = f"{result['p95_ms']:>9.2f}" if 'p95_ms' in result else f"{'-':>9}"
+        line = f"{name:>22} {result['median_seconds']:>10.4f} {result['items_per_sec']:>11.1f} {p95}"
+        previous = (baseline or {}).get(name, {})
+        if previous.get('median_seconds'):
+            line += f" {result['median_seconds'] / previous['median_seconds']:>11.2f}x"
+        print(line)
+    print(f"Results saved: {path}")
+
+
+def bench_record_corpus(args):
+    """Regenerate the recorded benchmark corpus file"""
+    from fixtures import CORPUS_PATH, record_corpus
+
+    corpus = record_corpus()
+    print(f"Recorded {sum(map(len, corpus.values()))} articles to {CORPUS_PATH}")
+
+
+BENCHMARKS = {
+    'archive': bench_archive,
+    'backends': bench_backends,
+    'batching': bench_batching,
+    'chunking': bench_chunking,
+    'cleaning': bench_cleaning,
+    'concurrency': bench_concurrency,
+    'dedup': bench_dedup,
+    'email': bench_email,
+    'extractive': bench_extractive,
+    'fetch': bench_fetch,
+    'incremental': bench_incremental,
+    'metrics': bench_metrics,
+    'multi-user': bench_multi_user,
+    'paging': bench_paging,
+    'pipeline': bench_pipeline,
+    'ranking': bench_ranking,
+    'record-corpus': bench_record_corpus,
+    'records': bench_records,
+    'render': bench_render,
+    'scheduler': bench_scheduler,
+    'startup': bench_startup,
+    'streaming': bench_streaming,
+    'suite': bench_suite,
+    'tiering': bench_tiering,
+    'workers': bench_workers,
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AI Digest Reader benchmarks")
+    parser.add_argument('benchmark', choices=sorted(BENCHMARKS))
+    parser.add_argument('--articles', type=int, default=32)
+    parser.add_argument('--records', type=int, default=100000)
+    parser.add_argument('--candidates', type=int, default=3,
+                        help="Candidates fetched per selected article when ranking")
+    parser.add_argument('--digest-sizes', type=int, nargs='+', default=[5000, 50000])
+    parser.add_argument('--digests', type=int, nargs='+', default=[1, 4, 16],
+                        help="Concurrent digests per process")
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 4, 8, 16])
+    parser.add_argument('--topics', nargs='+',
+                        default=['technology', 'business', 'science', 'health'])
+    parser.add_argument('--latencies', type=float, nargs='+', default=[0.2, 0.4, 0.6, 0.8])
+    parser.add_argument('--fail-first', type=int, default=0,
+                        help="429 responses per topic before the stub succeeds")
+    parser.add_argument('--seconds-per-article', type=float, default=0.05,
+                        help="Simulated inference cost of the stub summarizer")
+    parser.add_argument('--backends', nargs='+', default=['pytorch', 'pytorch-int8', 'onnx'])
+    parser.add_argument('--model', default='facebook/bart-large-cnn')
+    parser.add_argument('--model-cache-dir', default='model_cache')
+    parser.add_argument('--dedup-threshold', type=float, default=0.8)
+    parser.add_argument('--profiles', type=int, default=10000)
+    parser.add_argument('--recipients', type=int, default=50)
+    parser.add_argument('--smtp-latency', type=float, default=0.05,
+                        help="Simulated handshake cost per SMTP session")
+    parser.add_argument('--smtp-workers', type=int, nargs='+', default=[1, 4])
+    parser.add_argument('--drop-every', type=int, default=0,
+                        help="Stub SMTP server drops the session after this many messages")
+    parser.add_argument('--max-articles', type=int, nargs='+', default=[3, 10, 40, 600])
+    parser.add_argument('--short-every', type=int, default=4,
+                        help="Every Nth stub article is too short to qualify")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--abstractive', action='store_true',
+                        help="Include model summarization in the suite, using --model "
+                             "(e.g. a small checkpoint like sshleifer/distilbart-cnn-6-6)")
+    parser.add_argument('--output-dir', default='bench_results')
+    parser.add_argument('--baseline', help="Earlier suite JSON to compare against")
+    parser.add_argument('--runs', type=int, default=6)
+    parser.add_argument('--prefetch-seconds', type=float, default=10.0)
+    parser.add_argument('--budgets', type=float, nargs='+', default=[0, 8, 4, 2, 1],
+                        help="Per-run latency budgets in seconds (0 = unlimited)")
+    parser.add_argument('--seconds-per-unit', type=float, default=0.002,
+                        help="Simulated model cost per input/output token")
+    parser.add_argument('--new-per-run', type=int, default=3,
+                        help="Articles the stub API publishes per topic between incremental runs")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--stub-summarizer', action='store_true',
+                        help="Use a CPU-bound stub instead of the real model")
+    args = parser.parse_args()
+    BENCHMARKS[args.benchmark](args)
@@ -0,0 +1,67 @@
+import bisect
+import re
+
+
+def sentence_starts(text, sentences):
+    """Character offset in text where each of its sentences (in order) begins"""
+    starts = []
+    position = 0
+    for sentence in sentences:
+        found = text.find(sentence, position)
+        if found < 0:
+            found = position
+        starts.append(found)
+        position = found + len(sentence)
+    return starts
+
+
+def group_by_sentence(token_ids, offsets, starts):
+    """Split one text's token ids into per-sentence lists, using each token's character offset"""
+    groups = [[] for _ in starts]
+    for token_id, (start, _) in zip(token_ids, offsets):
+        groups[max(0, bisect.bisect_right(starts, start) - 1)].append(token_id)
+    return [group for group in groups if group]
+
+
+def pack_sentences(sentence_ids, max_tokens, balance=True):
+    """Greedily pack whole sentences of token ids into chunks of at most max_tokens.
+
+    A single sentence longer than max_tokens becomes its own chunks, split at token
+    boundaries. With balance, the same number of chunks is repacked to even sizes so
+    the last chunk isn't a short tail.
+    """
+    chunks = _pack(sentence_ids, max_tokens)
+    if balance and len(chunks) > 1:
+        target = -(-sum(len(chunk) for chunk in chunks) // len(chunks))
+        balanced = _pack(sentence_ids, target)
+        if len(balanced) == len(chunks):
+            return balanced
+    return chunks
+
+
+def _pack(sentence_ids, max_tokens):
+    chunks = []
+    current = []
+    for ids in sentence_ids:
+        if len(ids) > max_tokens:
+            if current:
+                chunks.append(current)
+                current = []
+            chunks.extend(ids[start:start + max_tokens] for start in range(0, len(ids), max_tokens))
+            continue
+        if len(current) + len(ids) > max_tokens:
+            chunks.append(current)
+            current = []
+        current.extend(ids)
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def split_sentences(text):
+    """NLTK sentences, or a punctuation split when punkt_tab is not installed"""
+    try:
+        from nltk.tokenize import sent_tokenize
+        return sent_tokenize(text)
+    except LookupError:
+        return [sentence for sentence in re.split(r'(?<=[.!?])\s+', text) if sentence]
@@ -0,0 +1,28 @@
+import re
+
+# NewsAPI truncates content with a "[+1234 chars]" marker; both spellings are seen
+_CHARS_MARKER_RE = re.compile(r'\[\+\s*\d+\s*chars?\]')
+_CHARACTERS_MARKER_RE = re.compile(r'\[\+\s*\d+\s*characters?\]')
+_STRAY_RE = re.compile(r'[^\w\s.,!?-]+')
+
+
+def strip_markers(text):
+    """Text without NewsAPI truncation markers"""
+    if '[+' not in text:
+        return text
+    return _CHARACTERS_MARKER_RE.sub('', _CHARS_MARKER_RE.sub('', text))
+
+
+def article_text(article):
+    """An article's normalized content, as stored at ingest or computed now"""
+    text = article.get('clean_content')
+    return text if text is not None else normalize_text(article.get('content') or '')
+
+
+def normalize_text(text):
+    """Text with markers removed, whitespace collapsed and stray symbols dropped.
+
+    Same output as the original four re.sub passes: str.split/join collapses
+    whitespace (the same characters as \\s) in C, leaving one regex pass.
+    """
+    return _STRAY_RE.sub('', ' '.join(strip_markers(text).split())).strip()
@@ -2,7 +2,45 @@ from decouple import config
 
 class Config:
     NEWS_API_KEY = config('NEWS_API_KEY')
+    NEWS_API_URL = config('NEWS_API_URL', default='https://newsapi.org/v2')
+    NEWS_FETCH_CONCURRENCY = config('NEWS_FETCH_CONCURRENCY', default=4, cast=int)
+    NEWS_FETCH_TIMEOUT = config('NEWS_FETCH_TIMEOUT', default=10, cast=float)
+    NEWS_FETCH_RETRIES = config('NEWS_FETCH_RETRIES', default=3, cast=int)
+    NEWS_DAILY_BUDGET = config('NEWS_DAILY_BUDGET', default=0, cast=int)
+    NEWS_MAX_RESULTS = config('NEWS_MAX_RESULTS', default=100, cast=int)
+    FETCH_INCREMENTAL = config('FETCH_INCREMENTAL', default=True, cast=bool)
+    FETCH_HTTP_CACHE = config('FETCH_HTTP_CACHE', default=True, cast=bool)
+    FETCH_STATE_PATH = config('FETCH_STATE_PATH', default='fetch_state.sqlite3')
+    DEDUP_ENABLED = config('DEDUP_ENABLED', default=True, cast=bool)
+    DEDUP_THRESHOLD = config('DEDUP_THRESHOLD', default=0.8, cast=float)
+    DEDUP_KEEP = config('DEDUP_KEEP', default='earliest')
     EMAIL_ADDRESS = config('EMAIL_ADDRESS')
     EMAIL_PASSWORD = config('EMAIL_PASSWORD')
     SMTP_SERVER = config('SMTP_SERVER', default='smtp.gmail.com')
-    SMTP_PORT = config('SMTP_PORT', default=587, cast=int)
\ No newline at end of file
+    SMTP_PORT = config('SMTP_PORT', default=587, cast=int)
+    SMTP_USE_TLS = config('SMTP_USE_TLS', default=True, cast=bool)
+    SMTP_TIMEOUT = config('SMTP_TIMEOUT', default=30, cast=float)
+    SMTP_WORKERS = config('SMTP_WORKERS', default=1, cast=int)
+    SMTP_RATE_LIMIT = config('SMTP_RATE_LIMIT', default=0, cast=int)
+    SUMMARIZER_MODEL = config('SUMMARIZER_MODEL', default='facebook/bart-large-cnn')
+    SUMMARIZER_BACKEND = config('SUMMARIZER_BACKEND', default='pytorch')
+    MODEL_CACHE_DIR = config('MODEL_CACHE_DIR', default='model_cache')
+    EXTRACTIVE_METHOD = config('EXTRACTIVE_METHOD', default='frequency')
+    SUMMARY_BATCH_SIZE = config('SUMMARY_BATCH_SIZE', default=8, cast=int)
+    SUMMARY_WORKERS = config('SUMMARY_WORKERS', default=0, cast=int)
+    SUMMARY_WORKER_THREADS = config('SUMMARY_WORKER_THREADS', default=0, cast=int)
+    SUMMARY_LATENCY_BUDGET = config('SUMMARY_LATENCY_BUDGET', default=0, cast=float)
+    SUMMARY_CACHE_ENABLED = config('SUMMARY_CACHE_ENABLED', default=True, cast=bool)
+    SUMMARY_CACHE_PATH = config('SUMMARY_CACHE_PATH', default='summary_cache.sqlite3')
+    SUMMARY_CACHE_TTL = config('SUMMARY_CACHE_TTL', default=7 * 24 * 3600, cast=int)
+    SUMMARY_CACHE_MAX_ENTRIES = config('SUMMARY_CACHE_MAX_ENTRIES', default=10000, cast=int)
+    METRICS_ENABLED = config('METRICS_ENABLED', default=False, cast=bool)
+    METRICS_JSON_PATH = config('METRICS_JSON_PATH', default='digest_metrics.json')
+    METRICS_PROMETHEUS_PATH = config('METRICS_PROMETHEUS_PATH', default='')
+    ASYNC_IO_THREADS = config('ASYNC_IO_THREADS', default=32, cast=int)
+    SCHEDULER_PREFETCH_MINUTES = config('SCHEDULER_PREFETCH_MINUTES', default=10, cast=float)
+    RANKING_ENABLED = config('RANKING_ENABLED', default=True, cast=bool)
+    RANKING_CANDIDATES = config('RANKING_CANDIDATES', default=3, cast=int)
+    RANKING_HALF_LIFE_HOURS = config('RANKING_HALF_LIFE_HOURS', default=12, cast=float)
+    ARCHIVE_ENABLED = config('ARCHIVE_ENABLED', default=True, cast=bool)
+    ARCHIVE_PATH = config('ARCHIVE_PATH', default='digest_archive.sqlite3')
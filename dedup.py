@@ -0,0 +1,169 @@
+import re
+import zlib
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from cleaning import article_text
+
+_WORD_RE = re.compile(r'\w+')
+_TRACKING_PARAMS = {'fbclid', 'gclid', 'mc_cid', 'mc_eid', 'ocid', 'cmpid', 'ref', 'smid'}
+
+# Which copy of a duplicated story survives
+KEEP_POLICIES = ('earliest', 'longest', 'first')
+
+
+def normalize_url(url):
+    """Canonical form of an article URL for exact-duplicate checks"""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query)
+        if not key.lower().startswith('utm_') and key.lower() not in _TRACKING_PARAMS
+    )
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit(('https', host, path, urlencode(query), ''))
+
+
+def shingles(text, size=3, seed=0):
+    """Set of 32-bit hashed word n-grams"""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < size:
+        return {zlib.crc32(' '.join(words).encode('utf-8'), seed)} if words else set()
+    return {
+        zlib.crc32(' '.join(words[i:i + size]).encode('utf-8'), seed)
+        for i in range(len(words) - size + 1)
+    }
+
+
+def lsh_params(threshold, num_perm):
+    """Pick (bands, rows) whose S-curve crosses closest to the similarity threshold"""
+    best = None
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        error = abs((1 / bands) ** (1 / rows) - threshold)
+        if best is None or error < best[0]:
+            best = (error, bands, rows)
+    return best[1], best[2]
+
+
+class ArticleDeduplicator:
+    """Drops exact (normalized URL) and near (MinHash-LSH over title + content) duplicates.
+
+    keep picks the surviving copy whatever order copies arrive in: 'earliest' published,
+    'longest' (most complete) content, or 'first' seen.
+    """
+
+    def __init__(self, threshold=0.8, num_perm=64, seed=1, keep='earliest'):
+        if keep not in KEEP_POLICIES:
+            raise ValueError(f"Unknown dedup keep policy '{keep}', expected one of {KEEP_POLICIES}")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.seed = seed
+        self.keep = keep
+        self.bands, self.rows = lsh_params(threshold, num_perm)
+        self.reset()
+
+    def reset(self):
+        self.seen_urls = {}
+        self.buckets = [{} for _ in range(self.bands)]
+        self.signatures = []
+        self.kept = []
+        self.copies = []
+        self.duplicates = 0
+
+    def signature(self, article):
+        """One-permutation MinHash: each shingle is hashed once and binned, so cost is linear"""
+        tokens = shingles(f"{article.get('title', '')} {article_text(article)}", seed=self.seed)
+        if not tokens:
+            return None
+
+        bins = [None] * self.num_perm
+        for token in tokens:
+            index, value = token % self.num_perm, token // self.num_perm
+            if bins[index] is None or value < bins[index]:
+                bins[index] = value
+
+        # Densify: an empty bin borrows the next filled bin's value, tagged by distance
+        signature = []
+        for index in range(self.num_perm):
+            distance = 0
+            while bins[(index + distance) % self.num_perm] is None:
+                distance += 1
+            signature.append((bins[(index + distance) % self.num_perm], distance))
+        return tuple(signature)
+
+    def similarity(self, sig_a, sig_b):
+        """Estimated Jaccard similarity of two signatures"""
+        return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / self.num_perm
+
+    def find_duplicate(self, article, signature=None):
+        """Index of an already kept article this one duplicates, or None"""
+        index = self.seen_urls.get(normalize_url(article['url']))
+        if index is not None:
+            return index
+        signature = signature or self.signature(article)
+        if signature is None:
+            return None
+
+        candidates = set()
+        for band, bucket in enumerate(self.buckets):
+            key = signature[band * self.rows:(band + 1) * self.rows]
+            candidates.update(bucket.get(key, ()))
+        for index in sorted(candidates):
+            if self.similarity(signature, self.signatures[index]) >= self.threshold:
+                return index
+        return None
+
+    def prefers(self, article, kept):
+        """True if the keep policy would rather have `article` than the copy kept so far"""
+        if self.keep == 'earliest':
+            published, current = article.get('published') or '', kept.get('published') or ''
+            return bool(published) and (not current or published < current)
+        if self.keep == 'longest':
+            return len(article_text(article)) > len(article_text(kept))
+        return False
+
+    def add(self, article):
+        """Returns True if the article is new, False if it duplicates one already seen"""
+        return self.resolve(article)[1]
+
+    def resolve(self, article):
+        """(index of the kept copy, is_new) for an article, indexing it if it is new.
+
+        A duplicate the keep policy prefers replaces the copy at that index in `kept`.
+        """
+        signature = self.signature(article)
+        index = self.find_duplicate(article, signature)
+        if index is not None:
+            self.duplicates += 1
+            if self.prefers(article, self.kept[index]):
+                self.kept[index], article = article, self.kept[index]
+                self.seen_urls[normalize_url(self.kept[index]['url'])] = index
+            self.copies[index].append(article)
+            return index, False
+
+        index = len(self.signatures)
+        self.seen_urls[normalize_url(article['url'])] = index
+        self.signatures.append(signature)
+        self.kept.append(article)
+        self.copies.append([])
+        if signature is not None:
+            for band, bucket in enumerate(self.buckets):
+                key = signature[band * self.rows:(band + 1) * self.rows]
+                bucket.setdefault(key, []).append(index)
+        return index, True
+
+    def survivors(self):
+        """The kept Articles, each carrying the copies dropped in its favour as `duplicates`"""
+        for article, copies in zip(self.kept, self.copies):
+            article.duplicates = tuple(copies)
+        return list(self.kept)
+
+    def deduplicate(self, articles):
+        """Batch dedup under the keep policy; survivors keep their original relative order"""
+        for article in articles:
+            self.resolve(article)
+        kept = set(id(article) for article in self.kept)
+        return [article for article in articles if id(article) in kept]
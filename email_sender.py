@@ -1,31 +1,162 @@
+import queue
 import smtplib
+import threading
+import time
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime
+from metrics import metrics
+
+class RateLimiter:
+    """Spaces out calls so no more than `per_minute` happen in any minute, across threads"""
+
+    def __init__(self, per_minute):
+        self.interval = 60.0 / per_minute if per_minute else 0.0
+        self.next_slot = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
 
 class EmailSender:
     def __init__(self, config):
         self.config = config
-    
+
+    def build_message(self, recipient, digest_html):
+        msg = MIMEMultipart('alternative')
+        msg['Subject'] = f"📰 Daily News Digest - {datetime.now().strftime('%Y-%m-%d')}"
+        msg['From'] = self.config.EMAIL_ADDRESS
+        msg['To'] = recipient
+
+        # Attach HTML content
+        html_part = MIMEText(digest_html, 'html')
+        msg.attach(html_part)
+        return msg
+
+    def connect(self):
+        """Open an authenticated SMTP connection"""
+        metrics.inc('smtp_connections_total')
+        server = smtplib.SMTP(self.config.SMTP_SERVER, self.config.SMTP_PORT,
+                              timeout=self.config.SMTP_TIMEOUT)
+        try:
+            if self.config.SMTP_USE_TLS:
+                server.starttls()
+            if self.config.EMAIL_PASSWORD:
+                server.login(self.config.EMAIL_ADDRESS, self.config.EMAIL_PASSWORD)
+        except Exception:
+            server.close()
+            raise
+        return server
+
     def send_digest(self, recipient, digest_html):
         try:
             # Create message
-            msg = MIMEMultipart('alternative')
-            msg['Subject'] = f"📰 Daily News Digest - {datetime.now().strftime('%Y-%m-%d')}"
-            msg['From'] = self.config.EMAIL_ADDRESS
-            msg['To'] = recipient
-            
-            # Attach HTML content
-            html_part = MIMEText(digest_html, 'html')
-            msg.attach(html_part)
-            
+            msg = self.build_message(recipient, digest_html)
+
             # Send email
-            with smtplib.SMTP(self.config.SMTP_SERVER, self.config.SMTP_PORT) as server:
-                server.starttls()
-                server.login(self.config.EMAIL_ADDRESS, self.config.EMAIL_PASSWORD)
-                server.send_message(msg)
-            
+            with metrics.timer('email_send_seconds'):
+                with self.connect() as server:
+                    server.send_message(msg)
+
             print(f"✅ Email sent to {recipient}")
-            
+            metrics.inc('emails_total', result='sent')
+            return True
+
         except Exception as e:
-            print(f"❌ Email error: {e}")
\ No newline at end of file
+            print(f"❌ Email error: {e}")
+            metrics.inc('emails_total', result='error')
+            return False
+
+    def send_many(self, messages, workers=1, rate_limit_per_minute=0):
+        """Send (recipient, digest_html) pairs over pooled connections, one per worker.
+
+        Returns one {'recipient', 'sent', 'error'} result per message, in input order.
+        """
+        messages = list(messages)
+        if not messages:
+            return []
+        results = [None] * len(messages)
+        pending = queue.Queue()
+        for index in range(len(messages)):
+            pending.put(index)
+        limiter = RateLimiter(rate_limit_per_minute)
+
+        def worker():
+            server = None
+            try:
+                while True:
+                    try:
+                        index = pending.get_nowait()
+                    except queue.Empty:
+                        return
+                    recipient, digest_html = messages[index]
+                    error = None
+                    limiter.wait()
+                    send_start = time.perf_counter()
+
+                    # A dropped session gets one fresh connection before the message fails
+                    for attempt in range(2):
+                        try:
+                            if server is None:
+                                server = self.connect()
+                            server.send_message(self.build_message(recipient, digest_html))
+                            error = None
+                            break
+                        except smtplib.SMTPServerDisconnected as e:
+                            error = e
+                            metrics.inc('smtp_reconnects_total')
+                            self.close_quietly(server)
+                            server = None
+                        except smtplib.SMTPException as e:
+                            # Rejected by the server; the session itself is still usable
+                            error = e
+                            break
+                        except OSError as e:
+                            # Socket-level failure: reconnect and retry once
+                            error = e
+                            metrics.inc('smtp_reconnects_total')
+                            self.close_quietly(server)
+                            server = None
+
+                    metrics.observe('email_send_seconds', time.perf_counter() - send_start)
+                    metrics.inc('emails_total', result='error' if error else 'sent')
+                    results[index] = {
+                        'recipient': recipient,
+                        'sent': error is None,
+                        'error': str(error) if error else None
+                    }
+            finally:
+                if server is not None:
+                    self.close_quietly(server, quit=True)
+
+        threads = [threading.Thread(target=worker, name=f"smtp-worker-{i}", daemon=True)
+                   for i in range(max(1, min(workers, len(messages))))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        sent = sum(1 for result in results if result['sent'])
+        print(f"📧 Sent {sent}/{len(results)} emails")
+        for result in results:
+            if not result['sent']:
+                print(f"❌ Email error for {result['recipient']}: {result['error']}")
+        return results
+
+    def close_quietly(self, server, quit=False):
+        if server is None:
+            return
+        try:
+            if quit:
+                server.quit()
+            else:
+                server.close()
+        except Exception:
+            pass
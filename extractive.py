@@ -0,0 +1,127 @@
+import numpy as np
+from scipy import sparse
+from nltk.corpus import stopwords
+from nltk.tokenize import sent_tokenize, word_tokenize
+
+METHODS = ('frequency', 'textrank')
+_stop_words = None
+
+
+def english_stop_words():
+    """NLTK English stopwords, loaded once per process"""
+    global _stop_words
+    if _stop_words is None:
+        _stop_words = frozenset(stopwords.words('english'))
+    return _stop_words
+
+
+class ExtractiveEngine:
+    """Batched extractive summarizer.
+
+    Every sentence of every article is tokenized once into one sparse
+    sentence x term count matrix, and all sentences are scored with matrix ops.
+    'frequency' reproduces the original word-frequency scoring; 'textrank'
+    ranks sentences by PageRank over their cosine-similarity graph.
+    """
+
+    def __init__(self, method='frequency'):
+        if method not in METHODS:
+            raise ValueError(f"Unknown extractive method '{method}', expected one of {METHODS}")
+        self.method = method
+
+    def summarize_many(self, texts, num_sentences=2):
+        stop_words = english_stop_words()
+        vocab = {}
+        rows, cols = [], []
+        doc_sentences = []
+        sentence_doc = []
+
+        # Tokenize: one pass per sentence, keeping only alphanumeric non-stopword terms
+        for doc, text in enumerate(texts):
+            sentences = sent_tokenize(text)
+            doc_sentences.append(sentences)
+            if len(sentences) <= 2:
+                continue
+            for sentence in sentences:
+                row = len(sentence_doc)
+                sentence_doc.append(doc)
+                for word in word_tokenize(sentence.lower()):
+                    if word.isalnum() and word not in stop_words:
+                        rows.append(row)
+                        cols.append(vocab.setdefault(word, len(vocab)))
+
+        scores = self.score(np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64),
+                            np.array(sentence_doc, dtype=np.int64), len(vocab), len(texts))
+        return self.select(texts, doc_sentences, sentence_doc, scores, num_sentences)
+
+    def score(self, rows, cols, sentence_doc, num_terms, num_docs):
+        """Score for every sentence row; NaN where a sentence has no scoring terms"""
+        num_sentences = len(sentence_doc)
+        counts = sparse.csr_matrix(
+            (np.ones(len(rows)), (rows, cols)), shape=(num_sentences, num_terms)
+        )
+        word_counts = np.asarray(counts.sum(axis=1)).ravel()
+
+        if self.method == 'textrank':
+            scores = self.textrank(counts, sentence_doc)
+        else:
+            # Article term frequencies F = A @ C, with A the article x sentence indicator;
+            # a sentence scores sum(count * article frequency) / its scoring-word count
+            membership = sparse.csr_matrix(
+                (np.ones(num_sentences), (sentence_doc, np.arange(num_sentences))),
+                shape=(num_docs, num_sentences)
+            )
+            doc_freq = (membership @ counts).tocsr()
+            entries = counts.tocoo()
+            freq = np.asarray(doc_freq[sentence_doc[entries.row], entries.col]).ravel()
+            totals = np.bincount(entries.row, weights=entries.data * freq, minlength=num_sentences)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                scores = totals / word_counts
+
+        scores[word_counts == 0] = np.nan
+        return scores
+
+    def textrank(self, counts, sentence_doc, damping=0.85, iterations=30):
+        """PageRank over each article's sentence cosine-similarity graph"""
+        norms = np.sqrt(np.asarray(counts.multiply(counts).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        normalized = sparse.diags(1.0 / norms) @ counts
+        scores = np.zeros(len(sentence_doc))
+
+        # Sentences of one article are contiguous rows, so each article is a block
+        boundaries = np.flatnonzero(np.diff(sentence_doc)) + 1
+        for block in np.split(np.arange(len(sentence_doc)), boundaries):
+            if not len(block):
+                continue
+            start, end = block[0], block[-1] + 1
+            similarity = (normalized[start:end] @ normalized[start:end].T).toarray()
+            np.fill_diagonal(similarity, 0.0)
+            out_weight = similarity.sum(axis=1)
+            out_weight[out_weight == 0] = 1.0
+            transition = similarity / out_weight[:, None]
+            rank = np.full(end - start, 1.0 / (end - start))
+            for _ in range(iterations):
+                rank = (1 - damping) / (end - start) + damping * transition.T @ rank
+            scores[start:end] = rank
+        return scores
+
+    def select(self, texts, doc_sentences, sentence_doc, scores, num_sentences):
+        """Top sentences per article (ties go to the earlier sentence), in original order"""
+        summaries = list(texts)
+        row = 0
+        for doc, sentences in enumerate(doc_sentences):
+            if len(sentences) <= 2:
+                continue
+            doc_scores = scores[row:row + len(sentences)]
+            row += len(sentences)
+
+            # A repeated sentence is one candidate, scored at its first position
+            candidates = {}
+            for position, sentence in enumerate(sentences):
+                if sentence not in candidates and not np.isnan(doc_scores[position]):
+                    candidates[sentence] = (-doc_scores[position], position)
+            top = sorted(candidates, key=candidates.get)[:num_sentences]
+
+            selected = set(top)
+            summaries[doc] = ' '.join(sentence for sentence in sentences if sentence in selected)
+        return summaries
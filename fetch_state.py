@@ -0,0 +1,170 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import weakref
+
+
+class FetchState:
+    """Persistent per-query fetch watermarks, seen URLs and HTTP response cache in SQLite"""
+
+    def __init__(self, path, seen_retention_seconds=3 * 24 * 3600):
+        self.path = path
+        self.seen_retention_seconds = seen_retention_seconds
+        self._local = threading.local()
+        if hasattr(os, 'register_at_fork'):
+            # A forked child (e.g. a summarizer worker) must never use this process's connections
+            ref = weakref.ref(self)
+            os.register_at_fork(after_in_child=lambda: ref() is not None and ref().after_fork())
+
+        conn = self._connect()
+        conn.executescript('''
+            CREATE TABLE IF NOT EXISTS watermarks (
+                query TEXT PRIMARY KEY,
+                published TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS seen_urls (
+                query TEXT NOT NULL,
+                url TEXT NOT NULL,
+                seen_at REAL NOT NULL,
+                PRIMARY KEY (query, url)
+            );
+            CREATE TABLE IF NOT EXISTS http_cache (
+                key TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                expires REAL,
+                cached_at REAL NOT NULL,
+                body TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS api_usage (
+                day TEXT PRIMARY KEY,
+                requests INTEGER NOT NULL
+            );
+        ''')
+
+    def _connect(self):
+        # One connection per thread; WAL lets readers run alongside a writer
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def after_fork(self):
+        """Drop connections inherited from the parent process; a child opens its own"""
+        self._local = threading.local()
+
+    def watermark(self, query):
+        """Latest publishedAt seen for a query, or None on its first run"""
+        row = self._connect().execute(
+            'SELECT published FROM watermarks WHERE query = ?', (query,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def unseen(self, query, urls):
+        """The subset of urls not yet returned for this query"""
+        urls = list(urls)
+        seen = set()
+        conn = self._connect()
+        for i in range(0, len(urls), 500):
+            chunk = urls[i:i + 500]
+            placeholders = ','.join('?' * len(chunk))
+            seen.update(url for (url,) in conn.execute(
+                f'SELECT url FROM seen_urls WHERE query = ? AND url IN ({placeholders})',
+                [query] + chunk
+            ))
+        return [url for url in urls if url not in seen]
+
+    def advance(self, query, articles, until=None):
+        """Record articles as seen and move the watermark to the newest publishedAt, but not past `until`"""
+        if not articles:
+            return
+        now = time.time()
+        newest = max(article['published'] for article in articles)
+        if until:
+            newest = min(newest, until)
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                conn.executemany('INSERT OR REPLACE INTO seen_urls VALUES (?, ?, ?)',
+                                 [(query, article['url'], now) for article in articles])
+                conn.execute('''
+                    INSERT INTO watermarks VALUES (?, ?, ?)
+                    ON CONFLICT (query) DO UPDATE SET
+                        published = MAX(published, excluded.published),
+                        updated_at = excluded.updated_at
+                ''', (query, newest, now))
+                # Older URLs fall before every later window, so they no longer need tracking
+                conn.execute('DELETE FROM seen_urls WHERE seen_at < ?',
+                             (now - self.seen_retention_seconds,))
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        except sqlite3.Error as e:
+            print(f"⚠️ Fetch state write failed: {e}")
+
+    def cached_response(self, key):
+        """(etag, last_modified, fresh, payload) for a request key, or None"""
+        row = self._connect().execute(
+            'SELECT etag, last_modified, expires, body FROM http_cache WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        etag, last_modified, expires, body = row
+        return etag, last_modified, expires is not None and expires > time.time(), json.loads(body)
+
+    def store_response(self, key, headers, payload):
+        """Cache a response body as allowed by its Cache-Control, ETag and Last-Modified headers"""
+        cache_control = headers.get('Cache-Control', '').lower()
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        if 'no-store' in cache_control:
+            return
+        now = time.time()
+        max_age = re.search(r'max-age=(\d+)', cache_control)
+        expires = None
+        if max_age and 'no-cache' not in cache_control:
+            expires = now + int(max_age.group(1))
+        if expires is None and not etag and not last_modified:
+            return
+        conn = self._connect()
+        try:
+            conn.execute('INSERT OR REPLACE INTO http_cache VALUES (?, ?, ?, ?, ?, ?)',
+                         (key, etag, last_modified, expires, now, json.dumps(payload)))
+            # Incremental windows change the request key every run, so old entries go stale
+            conn.execute('DELETE FROM http_cache WHERE cached_at < ?',
+                         (now - self.seen_retention_seconds,))
+        except sqlite3.Error as e:
+            print(f"⚠️ Fetch state write failed: {e}")
+
+    def usage(self, day):
+        row = self._connect().execute('SELECT requests FROM api_usage WHERE day = ?', (day,)).fetchone()
+        return row[0] if row else 0
+
+    def spend(self, day, limit=0):
+        """Count one API request for day unless that would exceed limit (0 = unlimited).
+
+        Returns the day's new total, or None when the budget is used up. Runs in one
+        write transaction so concurrent processes share the budget.
+        """
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            used = self.usage(day)
+            if limit and used >= limit:
+                conn.execute('ROLLBACK')
+                return None
+            conn.execute('INSERT OR REPLACE INTO api_usage VALUES (?, ?)', (day, used + 1))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return used + 1
@@ -0,0 +1,420 @@
+import gzip
+import json
+import os
+import random
+import socketserver
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from cleaning import normalize_text
+from records import Article
+
+# Offline, deterministic NewsAPI-shaped data for benchmarks
+
+WORDS = (
+    "market company growth report research study health patients science data "
+    "technology startup investors energy climate policy government users device "
+    "software model network security revenue quarter analysts results launch "
+    "hospital doctors treatment trial vaccine cells space mission satellite "
+    "economy inflation rates bank chips supply demand battery electric vehicle "
+    "platform privacy regulators court ruling deal acquisition shares profit"
+).split()
+
+SOURCES = ["Reuters", "BBC News", "TechCrunch", "The Verge", "CNN",
+           "Bloomberg", "Wired", "Ars Technica", "The Guardian", "CNBC"]
+
+
+def make_sentence(rng, min_words=8, max_words=20):
+    words = [rng.choice(WORDS) for _ in range(rng.randint(min_words, max_words))]
+    return ' '.join(words).capitalize() + '.'
+
+
+def make_text(rng, min_sentences=4, max_sentences=12):
+    return ' '.join(make_sentence(rng) for _ in range(rng.randint(min_sentences, max_sentences)))
+
+
+def sample_articles(count, seed=0, prefix='article', start=None):
+    """Generate NewsAPI-style raw article dicts, newest first"""
+    rng = random.Random(seed)
+    start = start or datetime(2024, 1, 1, 12, 0, 0)
+    articles = []
+    for i in range(count):
+        source = rng.choice(SOURCES)
+        articles.append({
+            'source': {'id': None, 'name': source},
+            'author': None,
+            'title': make_sentence(rng, 5, 12).rstrip('.'),
+            'description': make_sentence(rng, 15, 30),
+            'url': f"https://example.com/{source.lower().replace(' ', '-')}/{prefix}-{i}",
+            'urlToImage': None,
+            'publishedAt': (start - timedelta(minutes=7 * i)).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'content': make_text(rng)
+        })
+    return articles
+
+
+def topic_articles(topic, count=100, shared_every=5, start=None):
+    """Stable per-topic article list; every Nth item is a wire story shared by all topics"""
+    articles = sample_articles(count, seed=zlib.crc32(topic.encode('utf-8')), prefix=topic, start=start)
+    if shared_every:
+        wire = sample_articles(count, seed=0, prefix='wire', start=start)
+        for i in range(0, count, shared_every):
+            # Same story, republished by another outlet under its own URL
+            copy = dict(wire[i])
+            copy['url'] = f"{wire[i]['url']}?utm_source={topic}"
+            articles[i] = copy
+    return articles
+
+
+TOPICS = ["technology", "business", "science", "health", "sports", "politics",
+          "climate", "finance", "space", "ai", "energy", "education"]
+
+SOURCE_SETS = [[], ["bbc-news"], ["reuters", "bbc-news"], ["techcrunch", "the-verge"]]
+
+
+# Recorded benchmark corpus: {topic: [NewsAPI article, ...]}, newest first
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_corpus.json.gz')
+
+
+def build_corpus(topics=TOPICS, per_topic=250, seed=2024):
+    """NewsAPI-shaped articles with the quirks of real responses.
+
+    Some content is cut off with a '[+N chars]' marker, some is missing or too short
+    to qualify, and some has typographic punctuation and stray markup.
+    """
+    rng = random.Random(seed)
+    corpus = {}
+    for topic in topics:
+        articles = topic_articles(topic, per_topic)
+        for i, article in enumerate(articles):
+            article = dict(article, source=dict(article['source']))
+            roll = rng.random()
+            if roll < 0.25:
+                article['content'] = f"{article['content'][:200]}… [+{rng.randint(500, 6000)} chars]"
+            elif roll < 0.30:
+                article['content'] = None
+            elif roll < 0.35:
+                article['content'] = article['content'][:60]
+            elif roll < 0.55:
+                article['content'] = (f"<p>“{article['content']}” — {article['source']['name']}</p>\r\n"
+                                      f"{make_text(rng, 2, 4)}")
+            articles[i] = article
+        corpus[topic] = articles
+    return corpus
+
+
+def load_corpus(path=CORPUS_PATH):
+    """The recorded corpus; rebuilt from the generator if the file is missing"""
+    if not os.path.exists(path):
+        print(f"⚠️ {path} not found, generating the corpus instead "
+              f"(record it with: python benchmark.py record-corpus)")
+        return build_corpus()
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def record_corpus(path=CORPUS_PATH, **kwargs):
+    corpus = build_corpus(**kwargs)
+    # mtime=0 keeps the file byte-identical across recordings
+    with open(path, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) as f:
+        f.write(json.dumps(corpus, sort_keys=True).encode('utf-8'))
+    return corpus
+
+
+def sample_profiles(count, seed=0):
+    """Synthetic subscriber preference profiles with heavily overlapping topics"""
+    rng = random.Random(seed)
+    profiles = []
+    for i in range(count):
+        profiles.append({
+            'id': f"user-{i}",
+            'topics': rng.sample(TOPICS, rng.randint(1, 4)),
+            'sources': rng.choice(SOURCE_SETS),
+            'max_articles': rng.choice([4, 6, 8, 10]),
+            'send_email': True,
+            'email_recipients': [f"user{i}@example.com"]
+        })
+    return profiles
+
+
+class StubFetcher:
+    """Stand-in for NewsFetcher serving fixture articles without any network.
+
+    With a corpus ({topic: raw NewsAPI articles}), topics in it are served from it
+    through NewsFetcher's own parsing.
+    """
+
+    def __init__(self, max_workers=4, corpus=None):
+        self.max_workers = max_workers
+        self.corpus = corpus
+        self.calls = 0
+
+    def fetch_topic(self, topic, sources=None, limit=10, scope=None):
+        self.calls += 1
+        if self.corpus and topic in self.corpus:
+            from news_fetcher import NewsFetcher
+            return NewsFetcher('stub-key').parse_articles(self.corpus[topic], topic)[:limit]
+        return [Article(
+            article['title'],
+            article['content'],
+            article['url'],
+            article['source']['name'],
+            published=article['publishedAt'],
+            clean_content=normalize_text(article['content']),
+            topic=topic
+        ) for article in topic_articles(f"{topic}:{','.join(sources or [])}", limit)]
+
+
+class StubSummarizer:
+    """Stand-in for ArticleSummarizer with a fixed per-batch and per-article cost"""
+
+    def __init__(self, seconds_per_article=0.0, seconds_per_batch=0.0, busy=False):
+        self.seconds_per_article = seconds_per_article
+        self.seconds_per_batch = seconds_per_batch
+        # busy: spend the cost spinning on the CPU, like real inference, instead of sleeping
+        self.busy = busy
+        self.calls = 0
+        self.texts = 0
+
+    def summarize_many(self, texts, batch_size=8, cleaned=False, deadline=None, reserve=0):
+        return [summary for summary, _ in self.summarize_tiered(texts, batch_size, cleaned, deadline, reserve)]
+
+    def summarize_tiered(self, texts, batch_size=8, cleaned=False, deadline=None, reserve=0):
+        self.calls += 1
+        self.texts += len(texts)
+        for i in range(0, len(texts), max(1, batch_size)):
+            batch = texts[i:i + batch_size]
+            cost = self.seconds_per_batch + self.seconds_per_article * len(batch)
+            if self.busy:
+                # CPU time, so oversubscribed workers slow down like real inference would
+                deadline = time.process_time() + cost
+                while time.process_time() < deadline:
+                    pass
+            else:
+                time.sleep(cost)
+        return [(' '.join(text.split('. ')[:2]), 'abstractive') for text in texts]
+
+    def summarize(self, text, max_length=3):
+        return self.summarize_many([text])[0]
+
+
+class StubNewsAPI:
+    """Local stand-in for NewsAPI /v2/everything with injectable latency and failures"""
+
+    def __init__(self, latency=0.0, fail_first=0, articles_per_topic=100, unpublished=None,
+                 etag=False, max_age=None, short_every=0, corpus=None):
+        # latency: seconds per request, or a dict of topic -> seconds
+        self.latency = latency
+        # fail_first: number of 429 responses each topic gets before succeeding
+        self.fail_first = fail_first
+        self.articles_per_topic = articles_per_topic
+        # unpublished: newest articles held back until publish() releases them. When set,
+        # articles are dated up to now and the 'from' parameter is honored
+        self.unpublished = unpublished
+        self.newest = None
+        if unpublished is not None:
+            self.newest = datetime.utcnow().replace(microsecond=0) + timedelta(minutes=7 * unpublished)
+        # etag: send an ETag and answer a matching If-None-Match with 304;
+        # max_age: send Cache-Control: max-age
+        self.etag = etag
+        self.max_age = max_age
+        # short_every: every Nth article has content too short to qualify for the digest
+        self.short_every = short_every
+        # corpus: serve these {topic: articles} instead of generated ones
+        self.corpus = corpus
+        self.not_modified = 0
+        self.requests = []
+        self._failures = {}
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/v2"
+
+    def publish(self, count):
+        """Release the next `count` held-back articles for every topic"""
+        with self._lock:
+            self.unpublished = max(0, self.unpublished - count)
+
+    def respond(self, params):
+        """Return (status, payload) for a query"""
+        topic = params.get('q', '')
+        with self._lock:
+            self.requests.append(params)
+            failures = self._failures.get(topic, 0)
+            if failures < self.fail_first:
+                self._failures[topic] = failures + 1
+                return 429, {'status': 'error', 'code': 'rateLimited'}
+
+        delay = self.latency.get(topic, 0.0) if isinstance(self.latency, dict) else self.latency
+        time.sleep(delay)
+
+        if self.corpus is not None:
+            articles = self.corpus.get(topic, [])
+        elif self.newest is None:
+            articles = topic_articles(topic, self.articles_per_topic)
+        else:
+            articles = topic_articles(topic, self.unpublished + self.articles_per_topic,
+                                      start=self.newest)[self.unpublished:]
+            if params.get('from'):
+                since = datetime.fromisoformat(params['from'].rstrip('Z'))
+                articles = [article for article in articles
+                            if datetime.fromisoformat(article['publishedAt'].rstrip('Z')) >= since]
+        if self.short_every:
+            articles = [dict(article, content=article['content'][:80]) if i % self.short_every == 0
+                        else article for i, article in enumerate(articles, 1)]
+        # Like NewsAPI, pages hold at most 100 articles
+        page_size = min(100, int(params.get('pageSize', 100)))
+        page = int(params.get('page', 1))
+        start = (page - 1) * page_size
+        return 200, {
+            'status': 'ok',
+            'totalResults': len(articles),
+            'articles': articles[start:start + page_size]
+        }
+
+    def start(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Headers and body go out in separate writes; without this, Nagle plus delayed
+            # ACKs add ~40ms to every request on a reused keep-alive connection
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                query = parse_qs(urlparse(self.path).query)
+                status, payload = stub.respond({key: values[0] for key, values in query.items()})
+                body = json.dumps(payload).encode('utf-8')
+                headers = {'Content-Type': 'application/json'}
+                if status == 200 and stub.etag:
+                    headers['ETag'] = f'"{zlib.crc32(body):08x}"'
+                    if self.headers.get('If-None-Match') == headers['ETag']:
+                        status, body = 304, b''
+                        with stub._lock:
+                            stub.not_modified += 1
+                if status in (200, 304) and stub.max_age is not None:
+                    headers['Cache-Control'] = f"max-age={stub.max_age}"
+
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class StubSMTPServer:
+    """Minimal local SMTP sink (no TLS/AUTH) that records deliveries.
+
+    connect_latency simulates the TCP+TLS+login cost of a fresh session, and
+    drop_every closes the session after that many messages to exercise reconnects.
+    Recipients containing 'reject' are refused.
+    """
+
+    def __init__(self, connect_latency=0.0, drop_every=0):
+        self.connect_latency = connect_latency
+        self.drop_every = drop_every
+        self.connections = 0
+        self.messages = []
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def address(self):
+        return self._server.server_address
+
+    def start(self):
+        stub = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            # Multi-line replies go out as separate writes; keep Nagle from delaying them
+            disable_nagle_algorithm = True
+
+            def reply(self, line):
+                self.wfile.write(f"{line}\r\n".encode('ascii'))
+
+            def handle(self):
+                with stub._lock:
+                    stub.connections += 1
+                time.sleep(stub.connect_latency)
+                self.reply("220 stub ESMTP")
+                sent = 0
+                recipients = []
+                while True:
+                    line = self.rfile.readline()
+                    if not line:
+                        return
+                    command = line.decode('utf-8', 'replace').strip()
+                    verb = command[:4].upper()
+                    if verb in ('EHLO', 'HELO'):
+                        self.reply("250-stub")
+                        self.reply("250 SIZE 10000000")
+                    elif verb == 'MAIL':
+                        recipients = []
+                        self.reply("250 OK")
+                    elif verb == 'RCPT':
+                        if 'reject' in command.lower():
+                            self.reply("550 Mailbox unavailable")
+                        else:
+                            recipients.append(command.split(':', 1)[1].strip(' <>'))
+                            self.reply("250 OK")
+                    elif verb == 'DATA':
+                        self.reply("354 End data with <CR><LF>.<CR><LF>")
+                        while self.rfile.readline() not in (b".\r\n", b".\n", b""):
+                            pass
+                        with stub._lock:
+                            stub.messages.extend(recipients)
+                        self.reply("250 OK")
+                        sent += 1
+                        if stub.drop_every and sent % stub.drop_every == 0:
+                            return
+                    elif verb == 'QUIT':
+                        self.reply("221 Bye")
+                        return
+                    else:
+                        self.reply("250 OK")
+
+        self._server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
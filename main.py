@@ -1,506 +1,470 @@
+import argparse
+import asyncio
+import functools
 import json
 import webbrowser
 import os
+import sqlite3
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from news_fetcher import NewsFetcher
-from summarizer import ArticleSummarizer
+from fetch_state import FetchState
+from archive import DigestArchive
+from summarizer import ArticleSummarizer, GENERATION_PARAMS
+from summary_cache import SummaryCache
+from worker_pool import SummarizerPool
+from pipeline import DigestPipeline
+from multi_user import MultiUserDigest
+from ranking import ArticleRanker
+from scheduler import DigestScheduler
+from templates import DigestRenderer, STREAM_BUFFER_SIZE, write_txt_entry, write_txt_header
 from email_sender import EmailSender
+from metrics import metrics
 from config import Config
 
+def create_summary_cache(config):
+    if not config.SUMMARY_CACHE_ENABLED:
+        return None
+    return SummaryCache(
+        config.SUMMARY_CACHE_PATH,
+        # Backends produce slightly different summaries, so each gets its own entries
+        model_name=f"{config.SUMMARIZER_MODEL}@{config.SUMMARIZER_BACKEND}",
+        generation_params=GENERATION_PARAMS,
+        ttl_seconds=config.SUMMARY_CACHE_TTL,
+        max_entries=config.SUMMARY_CACHE_MAX_ENTRIES
+    )
+
+def create_summarizer(config, cache=None):
+    """ArticleSummarizer built from config; module-level so worker processes can build their own"""
+    return ArticleSummarizer(
+        cache=cache if cache is not None else create_summary_cache(config),
+        model_name=config.SUMMARIZER_MODEL,
+        backend=config.SUMMARIZER_BACKEND,
+        model_cache_dir=config.MODEL_CACHE_DIR,
+        extractive_method=config.EXTRACTIVE_METHOD
+    )
+
 class NewsAgent:
     def __init__(self):
         self.config = Config()
-        self.fetcher = NewsFetcher(self.config.NEWS_API_KEY)
-        self.summarizer = ArticleSummarizer()
+        if self.config.METRICS_ENABLED:
+            metrics.enable()
+        self.fetcher = NewsFetcher(
+            self.config.NEWS_API_KEY,
+            base_url=self.config.NEWS_API_URL,
+            max_workers=self.config.NEWS_FETCH_CONCURRENCY,
+            timeout=self.config.NEWS_FETCH_TIMEOUT,
+            retries=self.config.NEWS_FETCH_RETRIES,
+            state=self.create_fetch_state(),
+            incremental=self.config.FETCH_INCREMENTAL,
+            http_cache=self.config.FETCH_HTTP_CACHE,
+            daily_budget=self.config.NEWS_DAILY_BUDGET,
+            max_results=self.config.NEWS_MAX_RESULTS,
+            # Async digests issue requests from every I/O thread at once
+            pool_size=self.config.ASYNC_IO_THREADS
+        )
+        if self.config.SUMMARY_WORKERS > 0:
+            # Each worker process holds its own model and opens the shared cache itself
+            self.summary_cache = None
+            self.summarizer = SummarizerPool(
+                functools.partial(create_summarizer, self.config),
+                num_workers=self.config.SUMMARY_WORKERS,
+                batch_size=self.config.SUMMARY_BATCH_SIZE,
+                threads_per_worker=self.config.SUMMARY_WORKER_THREADS or None
+            )
+            # Workers start on first use, or up front with --warmup
+        else:
+            self.summary_cache = create_summary_cache(self.config)
+            self.summarizer = create_summarizer(self.config, self.summary_cache)
         self.email_sender = EmailSender(self.config)
+        ranker = None
+        if self.config.RANKING_ENABLED:
+            ranker = ArticleRanker(half_life_hours=self.config.RANKING_HALF_LIFE_HOURS)
+        self.pipeline = DigestPipeline(
+            self.fetcher,
+            self.summarizer,
+            batch_size=self.config.SUMMARY_BATCH_SIZE,
+            dedup_threshold=self.config.DEDUP_THRESHOLD if self.config.DEDUP_ENABLED else None,
+            ranker=ranker,
+            candidates=self.config.RANKING_CANDIDATES,
+            budget_seconds=self.config.SUMMARY_LATENCY_BUDGET,
+            dedup_keep=self.config.DEDUP_KEEP
+        )
+        self.archive = DigestArchive(self.config.ARCHIVE_PATH) if self.config.ARCHIVE_ENABLED else None
+        self.multi_user = MultiUserDigest(
+            self.fetcher,
+            self.summarizer,
+            batch_size=self.config.SUMMARY_BATCH_SIZE,
+            dedup_threshold=self.config.DEDUP_THRESHOLD if self.config.DEDUP_ENABLED else None,
+            ranker=ranker,
+            candidates=self.config.RANKING_CANDIDATES,
+            budget_seconds=self.config.SUMMARY_LATENCY_BUDGET,
+            dedup_keep=self.config.DEDUP_KEEP
+        )
+        # Async digests share one summarizer thread, so the model only ever runs one batch at a time,
+        # and a pool of threads for their blocking network and file calls
+        self.summarize_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='digest-summarize')
+        self.io_executor = ThreadPoolExecutor(max_workers=max(1, self.config.ASYNC_IO_THREADS),
+                                              thread_name_prefix='digest-io')
         
+    def create_fetch_state(self):
+        if not (self.config.FETCH_INCREMENTAL or self.config.FETCH_HTTP_CACHE):
+            return None
+        return FetchState(self.config.FETCH_STATE_PATH)
+    
     def load_preferences(self):
         with open('user_preferences.json', 'r') as f:
             return json.load(f)
     
-    def generate_frontend_html(self, summaries):
+    def load_profiles(self, path):
+        """Load a JSON list of preference profiles, one per subscriber"""
+        with open(path, 'r') as f:
+            return json.load(f)
+    
+    def generate_frontend_html(self, summaries, renderer=None):
         """Generate a dynamic HTML frontend with real news data"""
-        current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        
-        # Convert summaries to JavaScript format
-        js_articles = []
-        for item in summaries:
-            js_articles.append({
-                'title': item['title'].replace('"', '\\"').replace("'", "\\'"),
-                'summary': item['summary'].replace('"', '\\"').replace("'", "\\'"),
-                'source': item['source'],
-                'url': item['url']
-            })
-        
-        articles_json = json.dumps(js_articles, indent=2)
-        
-        html_content = f'''<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>AI News Digest - {current_time}</title>
-    <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css">
-    <style>
-        * {{
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }}
-
-        body {{
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            background: linear-gradient(135deg, #0c0c0c 0%, #1a1a2e 50%, #16213e 100%);
-            color: #ffffff;
-            min-height: 100vh;
-            overflow-x: hidden;
-        }}
-
-        .container {{
-            max-width: 1200px;
-            margin: 0 auto;
-            padding: 20px;
-            position: relative;
-        }}
-
-        .header {{
-            text-align: center;
-            margin-bottom: 40px;
-            position: relative;
-        }}
-
-        .header::before {{
-            content: '';
-            position: absolute;
-            top: -50px;
-            left: 50%;
-            transform: translateX(-50%);
-            width: 200px;
-            height: 200px;
-            background: radial-gradient(circle, rgba(0, 255, 255, 0.1) 0%, transparent 70%);
-            border-radius: 50%;
-            z-index: -1;
-        }}
-
-        h1 {{
-            font-size: 3rem;
-            font-weight: 700;
-            background: linear-gradient(45deg, #00ffff, #ff00ff, #ffff00);
-            background-size: 300% 300%;
-            -webkit-background-clip: text;
-            -webkit-text-fill-color: transparent;
-            animation: gradientShift 3s ease-in-out infinite;
-            margin-bottom: 10px;
-        }}
-
-        @keyframes gradientShift {{
-            0%, 100% {{ background-position: 0% 50%; }}
-            50% {{ background-position: 100% 50%; }}
-        }}
-
-        .subtitle {{
-            font-size: 1.2rem;
-            color: #a0a0a0;
-            margin-bottom: 30px;
-        }}
-
-        .news-grid {{
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(400px, 1fr));
-            gap: 30px;
-            margin-top: 40px;
-        }}
-
-        .news-card {{
-            background: rgba(255, 255, 255, 0.05);
-            backdrop-filter: blur(20px);
-            border: 1px solid rgba(255, 255, 255, 0.1);
-            border-radius: 20px;
-            padding: 30px;
-            transition: all 0.3s ease;
-            position: relative;
-            overflow: hidden;
-            animation: slideInUp 0.6s ease forwards;
-        }}
-
-        .news-card::before {{
-            content: '';
-            position: absolute;
-            top: 0;
-            left: -100%;
-            width: 100%;
-            height: 100%;
-            background: linear-gradient(90deg, transparent, rgba(255, 255, 255, 0.1), transparent);
-            transition: left 0.5s ease;
-        }}
-
-        .news-card:hover::before {{
-            left: 100%;
-        }}
-
-        .news-card:hover {{
-            transform: translateY(-10px);
-            box-shadow: 0 20px 60px rgba(0, 255, 255, 0.2);
-            border-color: rgba(0, 255, 255, 0.3);
-        }}
-
-        .news-header {{
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            margin-bottom: 20px;
-        }}
-
-        .news-number {{
-            background: linear-gradient(45deg, #ff6b6b, #ee5a24);
-            color: white;
-            width: 40px;
-            height: 40px;
-            border-radius: 50%;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            font-weight: bold;
-            font-size: 1.2rem;
-        }}
-
-        .news-source {{
-            background: rgba(0, 255, 255, 0.2);
-            color: #00ffff;
-            padding: 6px 15px;
-            border-radius: 15px;
-            font-size: 0.9rem;
-            font-weight: 600;
-        }}
-
-        .news-title {{
-            font-size: 1.3rem;
-            font-weight: 600;
-            margin-bottom: 15px;
-            line-height: 1.4;
-            color: #ffffff;
-        }}
-
-        .news-summary {{
-            color: #b0b0b0;
-            line-height: 1.6;
-            margin-bottom: 20px;
-            font-size: 1rem;
-        }}
-
-        .news-link {{
-            display: inline-flex;
-            align-items: center;
-            gap: 8px;
-            color: #00ffff;
-            text-decoration: none;
-            font-weight: 600;
-            transition: all 0.3s ease;
-            padding: 8px 0;
-        }}
-
-        .news-link:hover {{
-            color: #ff00ff;
-            transform: translateX(5px);
-        }}
-
-        .stats {{
-            display: flex;
-            justify-content: center;
-            gap: 40px;
-            margin: 40px 0;
-            flex-wrap: wrap;
-        }}
-
-        .stat {{
-            text-align: center;
-            padding: 20px;
-            background: rgba(255, 255, 255, 0.05);
-            border-radius: 15px;
-            backdrop-filter: blur(10px);
-            border: 1px solid rgba(255, 255, 255, 0.1);
-            min-width: 150px;
-        }}
-
-        .stat-number {{
-            font-size: 2rem;
-            font-weight: bold;
-            color: #00ffff;
-            display: block;
-        }}
-
-        .stat-label {{
-            color: #a0a0a0;
-            font-size: 0.9rem;
-        }}
-
-        .footer {{
-            text-align: center;
-            margin-top: 60px;
-            padding: 30px;
-            border-top: 1px solid rgba(255, 255, 255, 0.1);
-            background: rgba(0, 0, 0, 0.3);
-            border-radius: 20px;
-        }}
-
-        .footer p {{
-            color: #888;
-            margin-bottom: 10px;
-        }}
-
-        @keyframes slideInUp {{
-            from {{
-                opacity: 0;
-                transform: translateY(30px);
-            }}
-            to {{
-                opacity: 1;
-                transform: translateY(0);
-            }}
-        }}
-
-        @media (max-width: 768px) {{
-            .news-grid {{
-                grid-template-columns: 1fr;
-            }}
-            
-            h1 {{
-                font-size: 2rem;
-            }}
-        }}
-
-        .auto-refresh {{
-            position: fixed;
-            top: 20px;
-            right: 20px;
-            background: rgba(0, 255, 255, 0.2);
-            color: #00ffff;
-            padding: 10px 20px;
-            border-radius: 20px;
-            font-size: 0.9rem;
-            backdrop-filter: blur(10px);
-            border: 1px solid rgba(0, 255, 255, 0.3);
-        }}
-    </style>
-</head>
-<body>
-    <div class="auto-refresh">
-        <i class="fas fa-sync-alt"></i> Auto-generated: {current_time}
-    </div>
-
-    <div class="container">
-        <div class="header">
-            <h1><i class="fas fa-robot"></i> AI News Digest</h1>
-            <p class="subtitle">Your personalized daily news summary powered by AI</p>
-            <p class="subtitle">Generated on {current_time}</p>
-        </div>
-
-        <div class="stats">
-            <div class="stat">
-                <span class="stat-number">{len(summaries)}</span>
-                <span class="stat-label">Articles</span>
-            </div>
-            <div class="stat">
-                <span class="stat-number">{len(set(item['source'] for item in summaries))}</span>
-                <span class="stat-label">Sources</span>
-            </div>
-            <div class="stat">
-                <span class="stat-number">{len(summaries) * 2}</span>
-                <span class="stat-label">Min Read</span>
-            </div>
-        </div>
-
-        <div class="news-grid">
-            {"".join([f'''
-            <div class="news-card" style="animation-delay: {i * 0.1}s;">
-                <div class="news-header">
-                    <div class="news-number">{i + 1}</div>
-                    <div class="news-source">{item['source']}</div>
-                </div>
-                <h3 class="news-title">{item['title']}</h3>
-                <p class="news-summary">{item['summary']}</p>
-                <a href="{item['url']}" target="_blank" class="news-link">
-                    <i class="fas fa-external-link-alt"></i>
-                    Read Full Article
-                </a>
-            </div>
-            ''' for i, item in enumerate(summaries)])}
-        </div>
-
-        <div class="footer">
-            <p><i class="fas fa-heart" style="color: #ff6b6b;"></i> News Summarization</p>
-            <p>Stay informed, stay ahead</p>
-        </div>
-    </div>
-
-    <script>
-        // Add floating particles effect
-        function createParticle() {{
-            const particle = document.createElement('div');
-            particle.style.cssText = `
-                position: fixed;
-                width: 4px;
-                height: 4px;
-                background: rgba(0, 255, 255, 0.5);
-                border-radius: 50%;
-                pointer-events: none;
-                z-index: -1;
-                left: ${{Math.random() * 100}}vw;
-                top: 100vh;
-                animation: float 8s linear infinite;
-            `;
-            
-            document.body.appendChild(particle);
-            
-            setTimeout(() => {{
-                particle.remove();
-            }}, 8000);
-        }}
-
-        // Add floating animation
-        const floatStyle = document.createElement('style');
-        floatStyle.textContent = `
-            @keyframes float {{
-                to {{
-                    transform: translateY(-100vh);
-                    opacity: 0;
-                }}
-            }}
-        `;
-        document.head.appendChild(floatStyle);
-
-        // Create particles periodically
-        setInterval(createParticle, 500);
-
-        // Auto-scroll effect
-        let scrollDirection = 1;
-        setInterval(() => {{
-            window.scrollBy(0, scrollDirection);
-            if (window.scrollY >= document.body.scrollHeight - window.innerHeight - 10) {{
-                scrollDirection = -1;
-            }} else if (window.scrollY <= 0) {{
-                scrollDirection = 1;
-            }}
-        }}, 100);
-    </script>
-</body>
-</html>'''
-        
-        return html_content
+        return (renderer or DigestRenderer()).render_page(summaries)
     
-    def run_daily_digest(self):
+    def run_daily_digest(self, headless=False):
         print(f"🚀 Starting news digest - {datetime.now()}")
         
         preferences = self.load_preferences()
         
-        # Fetch articles
-        articles = self.fetcher.get_articles(
-            topics=preferences['topics'],
-            max_articles=preferences['max_articles']
-        )
-        
-        print(f"📰 Fetched {len(articles)} articles")
+        # Fetch, summarize and render as a stream: summarization starts as soon as
+        # the first topic returns and the text backup is written as summaries arrive
+        txt_filename = f"news_digest_{datetime.now().strftime('%Y%m%d_%H%M')}.txt"
+        with open(txt_filename, 'w', encoding='utf-8', buffering=STREAM_BUFFER_SIZE) as txt_file:
+            self.write_txt_header(txt_file)
+            
+            def render(index, item):
+                self.write_txt_entry(txt_file, index, item)
+                print(f"📝 [{index}] {item.title} ({item.source}) [{item.tier}]")
+            
+            summaries, stats = self.pipeline.run(
+                topics=preferences['topics'],
+                sources=preferences.get('sources'),
+                max_articles=preferences['max_articles'],
+                on_summary=render
+            )
         
-        # Summarize articles
-        summaries = []
-        for article in articles:
-            summary = self.summarizer.summarize(article['content'])
-            summaries.append({
-                'title': article['title'],
-                'summary': summary,
-                'url': article['url'],
-                'source': article['source']
-            })
+        if self.pipeline.ranker:
+            print(f"🎯 Ranked {stats['candidates']} candidates, kept the top {stats['articles']}")
+        print(f"📰 Summarized {stats['articles']} articles in {stats['batches']} batches")
+        self.print_tiers(summaries)
+        if stats['duplicates_dropped']:
+            print(f"🧹 Dropped {stats['duplicates_dropped']} duplicate articles")
+        if stats['time_to_first_summary'] is not None:
+            print(f"⏱️ First summary after {stats['time_to_first_summary']:.2f}s")
+        print(f"⏱️ Fetch {stats['fetch_seconds']:.2f}s, summarize {stats['summarize_seconds']:.2f}s, "
+              f"render {stats['render_seconds']:.2f}s, total {stats['total_seconds']:.2f}s")
+        print(f"💾 Text backup saved: {txt_filename}")
+        self.print_fetch_stats()
+        run_id = self.archive_digest(summaries, 'daily')
+        if run_id:
+            print(f"🗄️ Archived digest #{run_id} ({len(summaries)} articles)")
         
-        # Generate and save HTML frontend
-        html_content = self.generate_frontend_html(summaries)
-        html_filename = f"news_digest_{datetime.now().strftime('%Y%m%d_%H%M')}.html"
+        if self.summary_cache:
+            stats = self.summary_cache.stats()
+            print(f"🗃️ Summary cache: {stats['hits']} hits, {stats['misses']} misses")
+        if isinstance(self.summarizer, SummarizerPool):
+            self.print_worker_stats()
         
-        with open(html_filename, 'w', encoding='utf-8') as f:
-            f.write(html_content)
+        # Stream the HTML frontend straight to disk, card by card
+        renderer = DigestRenderer()
+        html_filename = self.save_page(summaries, renderer=renderer)
         
         print(f"✅ Frontend generated: {html_filename}")
         
         # Open in browser
-        file_path = os.path.abspath(html_filename)
-        webbrowser.open(f'file://{file_path}')
-        print("🌐 Opening in browser...")
+        if not headless:
+            file_path = os.path.abspath(html_filename)
+            webbrowser.open(f'file://{file_path}')
+            print("🌐 Opening in browser...")
         
-        # Also send email if requested
+        self.deliver_digest(summaries, preferences, renderer)
+        print("✅ Digest completed!")
+    
+    def deliver_digest(self, summaries, preferences, renderer):
+        """Email the digest if requested, then commit fetch state once it has gone out"""
+        delivered = True
         if preferences.get('send_email', True):
             try:
-                digest_email = self.create_email_digest(summaries)
-                for recipient in preferences['email_recipients']:
-                    self.email_sender.send_digest(recipient, digest_email)
-                print("📧 Email digest sent successfully!")
+                with metrics.timer('render_seconds', kind='email'):
+                    digest_email = self.create_email_digest(summaries, renderer)
+                results = self.send_emails(
+                    (recipient, digest_email) for recipient in preferences['email_recipients']
+                )
+                delivered = not results or any(result['sent'] for result in results)
             except Exception as e:
                 print(f"❌ Email sending failed: {e}")
+                delivered = False
+        if delivered:
+            self.commit_delivered(summaries)
         
-        # Save text version too
-        self.save_to_txt(summaries)
+        self.export_metrics()
+    
+    def run_blocking(self, fn, *args):
+        """Awaitable result of fn(*args) on the I/O thread pool"""
+        return asyncio.get_running_loop().run_in_executor(self.io_executor, functools.partial(fn, *args))
+    
+    async def run_daily_digest_async(self, preferences=None, headless=False, label=None):
+        """run_daily_digest as a coroutine, so one process can serve many digests at once.
         
-        print("✅ Digest completed!")
+        NewsAPI requests, SMTP and file writes are blocking calls run on the I/O
+        thread pool; ranking and summarization run on the summarizer thread.
+        label tells concurrent digests' output files and archive runs apart.
+        """
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        name = f"digest {label}" if label else "digest"
+        print(f"🚀 Starting async news {name} - {datetime.now()}")
         
-    def create_email_digest(self, summaries):
-        """Create HTML email digest"""
-        current_time = datetime.now().strftime('%Y-%m-%d %H:%M')
+        preferences = preferences or await self.run_blocking(self.load_preferences)
+        topics = preferences['topics']
+        max_articles = preferences['max_articles']
         
-        digest = f"""
-        <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto; background: #1a1a1a; color: #ffffff; padding: 20px;">
-            <div style="text-align: center; margin-bottom: 30px;">
-                <h1 style="color: #00ffff; font-size: 28px; margin-bottom: 10px;">🤖 AI News Digest</h1>
-                <p style="color: #a0a0a0; font-size: 16px;">Generated on {current_time}</p>
-            </div>
-            
-            <div style="background: rgba(255,255,255,0.05); padding: 20px; border-radius: 10px; margin-bottom: 20px; text-align: center;">
-                <span style="color: #00ffff; font-size: 24px; font-weight: bold;">{len(summaries)}</span>
-                <span style="color: #a0a0a0; margin-left: 10px;">Articles Summarized</span>
-            </div>
-        """
+        # The synchronous fetch with every topic's requests in flight at once, then the same top-up
+        wanted = max_articles * self.pipeline.candidates
+        # Planning reads the request budget from SQLite, so it stays off the event loop too
+        plan = await self.run_blocking(self.fetcher.plan, topics, wanted)
+        streams = await self.run_blocking(self.fetcher.open_streams, plan, preferences.get('sources'))
+        results = await asyncio.gather(*(
+            self.run_blocking(stream.take, quota) for stream, (_, quota, _, _) in zip(streams, plan)
+        ))
+        fetched = await self.run_blocking(self.fetcher.complete, streams, list(results), wanted)
+        fetch_seconds = time.perf_counter() - start
+        
+        summaries, stats = await loop.run_in_executor(
+            self.summarize_executor, self.pipeline.summarize_fetched,
+            fetched, topics, max_articles, start
+        )
+        prefix = f"{label}:" if label else ""
+        for index, item in enumerate(summaries, 1):
+            print(f"📝 [{prefix}{index}] {item.title} ({item.source}) [{item.tier}]")
+        print(f"📰 Summarized {stats['articles']} of {stats['candidates']} candidates "
+              f"(fetch {fetch_seconds:.2f}s, summarize {stats['summarize_seconds']:.2f}s)")
+        self.print_tiers(summaries)
+        
+        stamp = datetime.now().strftime('%Y%m%d_%H%M') + (f"_{label}" if label else "")
+        renderer = DigestRenderer()
+        txt_filename, html_filename = await asyncio.gather(
+            self.run_blocking(self.save_to_txt, summaries, f"news_digest_{stamp}.txt"),
+            self.run_blocking(self.save_page, summaries, f"news_digest_{stamp}.html", renderer)
+        )
+        print(f"✅ Frontend generated: {html_filename}")
+        run_id = await self.run_blocking(self.archive_digest, summaries, 'daily', label)
+        if run_id:
+            print(f"🗄️ Archived digest #{run_id} ({len(summaries)} articles)")
         
-        for i, item in enumerate(summaries, 1):
-            digest += f"""
-            <div style="background: rgba(255,255,255,0.05); border-radius: 15px; padding: 25px; margin-bottom: 20px; border-left: 4px solid #00ffff;">
-                <div style="display: flex; justify-content: space-between; align-items: center; margin-bottom: 15px;">
-                    <span style="background: #ff6b6b; color: white; width: 30px; height: 30px; border-radius: 50%; display: inline-flex; align-items: center; justify-content: center; font-weight: bold;">{i}</span>
-                    <span style="background: rgba(0,255,255,0.2); color: #00ffff; padding: 5px 15px; border-radius: 10px; font-size: 12px;">{item['source']}</span>
-                </div>
-                <h3 style="color: #ffffff; font-size: 18px; margin-bottom: 15px; line-height: 1.4;">{item['title']}</h3>
-                <p style="color: #b0b0b0; line-height: 1.6; margin-bottom: 15px; font-size: 14px;">{item['summary']}</p>
-                <a href="{item['url']}" style="color: #00ffff; text-decoration: none; font-weight: 600; font-size: 14px;" target="_blank">
-                    📖 Read Full Article →
-                </a>
-            </div>
-            """
+        if not headless:
+            await self.run_blocking(webbrowser.open, f'file://{os.path.abspath(html_filename)}')
         
-        digest += """
-            <div style="text-align: center; margin-top: 30px; padding: 20px; border-top: 1px solid rgba(255,255,255,0.1);">
-                <p style="color: #888; margin-bottom: 10px;">💖 AI-Summary</p>
-                <p style="color: #888;">Stay informed, stay ahead</p>
-            </div>
-        </div>
+        await self.run_blocking(self.deliver_digest, summaries, preferences, renderer)
+        print(f"✅ Async {name} completed in {time.perf_counter() - start:.2f}s")
+        return summaries
+        
+    def run_multi_user_digest(self, profiles_path):
+        """Fetch and summarize once, then send each profile its own digest"""
+        print(f"🚀 Starting multi-user digest - {datetime.now()}")
+        
+        profiles = self.load_profiles(profiles_path)
+        digests = self.prepare_profile_digests(profiles)
+        self.deliver_profile_digests(profiles, digests)
+        
+        self.export_metrics()
+        print("✅ Multi-user digest completed!")
+        return digests
+    
+    def prepare_profile_digests(self, profiles, scope=None):
+        """Fetch and summarize once for all profiles; returns each profile's summaries, in order.
+        
+        scope: separate incremental-fetch state for this group of profiles (see slot_scope)
         """
+        digests, stats = self.multi_user.run(profiles, scope)
         
-        return digest
+        print(f"👥 {stats['profiles']} profiles, {stats['queries']} unique queries, "
+              f"{stats['articles']} unique articles, {stats['distinct_digests']} distinct digests")
+        print(f"📰 Summarized {stats['summarized']} of {stats['articles']} articles")
+        self.print_tiers(set(item for summaries in digests for item in summaries))
+        if stats['duplicates_dropped']:
+            print(f"🧹 Dropped {stats['duplicates_dropped']} duplicate articles")
+        print(f"⏱️ Fetch {stats['fetch_seconds']:.2f}s, summarize {stats['summarize_seconds']:.2f}s, "
+              f"assemble {stats['assemble_seconds']:.2f}s")
+        self.print_fetch_stats()
+        return digests
+    
+    def deliver_profile_digests(self, profiles, digests):
+        """Render and send each profile's prepared digest"""
+        # Profiles with the same settings share a digest, so render each one once;
+        # the renderer also reuses article cards across different digests
+        renderer = DigestRenderer()
+        rendered = {}
+        messages = []
+        message_digests = []
+        for index, profile in enumerate(profiles):
+            if not profile.get('send_email', True):
+                continue
+            summaries = digests[index]
+            if id(summaries) not in rendered:
+                with metrics.timer('render_seconds', kind='email'):
+                    rendered[id(summaries)] = self.create_email_digest(summaries, renderer)
+            for recipient in profile.get('email_recipients', []):
+                messages.append((recipient, rendered[id(summaries)]))
+                message_digests.append(summaries)
+        results = self.send_emails(messages)
+        
+        # Each distinct digest that reached at least one recipient counts as delivered
+        delivered = {}
+        for summaries, result in zip(message_digests, results):
+            if result['sent']:
+                delivered[id(summaries)] = summaries
+        for summaries in delivered.values():
+            self.commit_delivered(summaries)
+        
+        # Archive each distinct digest once, labelled with the profiles that received it
+        receivers = {}
+        for index, profile in enumerate(profiles):
+            receivers.setdefault(id(digests[index]), (digests[index], []))[1].append(
+                self.multi_user.profile_id(profile, index))
+        archived = 0
+        for summaries, profile_ids in receivers.values():
+            label = profile_ids[0] if len(profile_ids) == 1 else f"{profile_ids[0]} (+{len(profile_ids) - 1} more)"
+            archived += bool(self.archive_digest(summaries, 'profiles', label))
+        if archived:
+            print(f"🗄️ Archived {archived} distinct digests")
+        return results
+    
+    def commit_delivered(self, summaries):
+        """Move incremental fetch state past a digest's articles once it has gone out"""
+        self.fetcher.commit([item.article for item in summaries])
+    
+    def archive_digest(self, summaries, kind, label=None):
+        """Store a digest in the searchable archive; returns its run id, or None"""
+        if self.archive is None or not summaries:
+            return
+        try:
+            with metrics.timer('stage_seconds', stage='archive'):
+                return self.archive.add_run(summaries, kind, label)
+        except sqlite3.Error as e:
+            print(f"⚠️ Could not archive digest: {e}")
+    
+    def print_tiers(self, summaries):
+        tiers = Counter(item.tier for item in summaries)
+        budget = f" (budget {self.config.SUMMARY_LATENCY_BUDGET:g}s)" if self.config.SUMMARY_LATENCY_BUDGET else ""
+        print(f"🧠 Tiers{budget}: " + ", ".join(f"{count} {tier}" for tier, count in tiers.most_common()))
+    
+    def print_fetch_stats(self):
+        stats = self.fetcher.stats
+        if self.fetcher.state:
+            print(f"🌐 News API: {stats['requests']} requests, {stats['not_modified']} not modified, "
+                  f"{stats['cache_hits']} served from cache, {stats['already_seen']} already-seen articles skipped")
+        remaining = self.fetcher.budget.remaining()
+        if remaining is not None:
+            print(f"🌐 NewsAPI budget: {remaining} of {self.fetcher.budget.daily_limit} requests left today")
+    
+    def print_worker_stats(self):
+        for worker_id, stats in self.summarizer.stats().items():
+            print(f"⚙️ Worker {worker_id}: {stats['articles']} articles, "
+                  f"{stats['articles_per_sec']:.2f} articles/sec, {stats['restarts']} restarts")
+    
+    def close(self):
+        self.summarize_executor.shutdown()
+        self.io_executor.shutdown()
+        if isinstance(self.summarizer, SummarizerPool):
+            self.summarizer.close()
+    
+    def send_emails(self, messages):
+        """Send (recipient, html) pairs over pooled SMTP connections"""
+        with metrics.timer('stage_seconds', stage='email'):
+            return self.email_sender.send_many(
+                messages,
+                workers=self.config.SMTP_WORKERS,
+                rate_limit_per_minute=self.config.SMTP_RATE_LIMIT
+            )
+    
+    def export_metrics(self):
+        """Write the run's metrics as a JSON report and, if configured, a Prometheus textfile"""
+        if not metrics.enabled:
+            return
+        try:
+            metrics.write_json(self.config.METRICS_JSON_PATH)
+            print(f"📊 Metrics report saved: {self.config.METRICS_JSON_PATH}")
+            if self.config.METRICS_PROMETHEUS_PATH:
+                metrics.write_prometheus(self.config.METRICS_PROMETHEUS_PATH)
+        except OSError as e:
+            print(f"⚠️ Could not write metrics: {e}")
+    
+    def create_email_digest(self, summaries, renderer=None):
+        """Create HTML email digest"""
+        return (renderer or DigestRenderer()).render_email(summaries)
         
-    def save_to_txt(self, summaries):
+    def save_to_txt(self, summaries, filename=None):
         """Save text version for backup"""
-        filename = f"news_digest_{datetime.now().strftime('%Y%m%d_%H%M')}.txt"
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write(f"AI NEWS DIGEST - {datetime.now().strftime('%Y-%m-%d %H:%M')}\n")
-            f.write("="*60 + "\n\n")
+        filename = filename or f"news_digest_{datetime.now().strftime('%Y%m%d_%H%M')}.txt"
+        with open(filename, 'w', encoding='utf-8', buffering=STREAM_BUFFER_SIZE) as f:
+            self.write_txt_header(f)
             
             for i, item in enumerate(summaries, 1):
-                f.write(f"{i}. {item['title']}\n")
-                f.write(f"Source: {item['source']}\n")
-                f.write(f"Summary: {item['summary']}\n")
-                f.write(f"URL: {item['url']}\n")
-                f.write("-" * 50 + "\n\n")
+                self.write_txt_entry(f, i, item)
         
         print(f"💾 Text backup saved: {filename}")
+        return filename
+    
+    def save_page(self, summaries, filename=None, renderer=None):
+        """Stream the HTML frontend to disk; returns the file name"""
+        filename = filename or f"news_digest_{datetime.now().strftime('%Y%m%d_%H%M')}.html"
+        with metrics.timer('render_seconds', kind='page'):
+            with open(filename, 'w', encoding='utf-8', buffering=STREAM_BUFFER_SIZE) as f:
+                (renderer or DigestRenderer()).write_page(f, summaries)
+        return filename
+    
+    def write_txt_header(self, f):
+        write_txt_header(f)
+    
+    def write_txt_entry(self, f, index, item):
+        write_txt_entry(f, index, item)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AI News Digest")
+    parser.add_argument('--profiles', help="JSON list of preference profiles to serve in one run")
+    parser.add_argument('--warmup', action='store_true',
+                        help="Load the summarization model up front instead of on first use")
+    parser.add_argument('--daemon', action='store_true',
+                        help="Stay resident and send each profile's digest at its send_time")
+    parser.add_argument('--headless', action='store_true',
+                        help="Never open a browser or wait for input")
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                        help="Run the daily digest on an asyncio event loop")
+    args = parser.parse_args()
+    
     agent = NewsAgent()
-    agent.run_daily_digest()
-    print("🎉 All done! Check your browser and email!")
-    input("Press Enter to exit...")
\ No newline at end of file
+    try:
+        if args.warmup or args.daemon:
+            print("🔥 Warming up summarization model...")
+            agent.summarizer.warmup()
+        if args.daemon:
+            # Profiles are re-read before every slot, so edits apply without a restart
+            if args.profiles:
+                load = functools.partial(agent.load_profiles, args.profiles)
+            else:
+                load = lambda: [agent.load_preferences()]
+            scheduler = DigestScheduler(
+                agent, load, prefetch_seconds=agent.config.SCHEDULER_PREFETCH_MINUTES * 60
+            )
+            scheduler.run()
+        elif args.profiles:
+            agent.run_multi_user_digest(args.profiles)
+            print("🎉 All done!")
+        else:
+            if args.use_async:
+                asyncio.run(agent.run_daily_digest_async(headless=args.headless))
+            else:
+                agent.run_daily_digest(headless=args.headless)
+            print("🎉 All done! Check your browser and email!")
+            if not args.headless and sys.stdin.isatty():
+                input("Press Enter to exit...")
+    finally:
+        agent.close()
\ No newline at end of file
@@ -0,0 +1,179 @@
+import json
+import math
+import os
+import threading
+import time
+from datetime import datetime
+
+# Latency buckets in seconds, from a cache lookup up to a slow model batch or SMTP session
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class _NullTimer:
+    """Shared do-nothing timer handed out while metrics are disabled"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    def __init__(self, metrics, name, labels):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class Metrics:
+    """Process-wide counters, gauges and timing histograms with JSON and Prometheus export.
+
+    Every method returns immediately while disabled, so instrumented code pays
+    one attribute check per call.
+    """
+
+    def __init__(self, enabled=False, buckets=DEFAULT_BUCKETS):
+        self.enabled = enabled
+        self.buckets = tuple(buckets)
+        self.reset()
+
+    def reset(self):
+        self.started_at = datetime.now()
+        self._start = time.perf_counter()
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+        self.reset()
+
+    def inc(self, name, amount=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def set(self, name, value, **labels):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.gauges[(name, tuple(sorted(labels.items())))] = value
+
+    def observe(self, name, value, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = {
+                    'count': 0, 'sum': 0.0, 'min': math.inf, 'max': -math.inf,
+                    'buckets': [0] * len(self.buckets)
+                }
+            histogram['count'] += 1
+            histogram['sum'] += value
+            histogram['min'] = min(histogram['min'], value)
+            histogram['max'] = max(histogram['max'], value)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    histogram['buckets'][i] += 1
+                    break
+
+    def timer(self, name, **labels):
+        """Context manager recording its block's wall time into histogram `name`"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name, labels)
+
+    def report(self):
+        """JSON-serializable snapshot of everything recorded this run"""
+        with self._lock:
+            histograms = {}
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                histograms.setdefault(name, []).append({
+                    'labels': dict(labels),
+                    'count': histogram['count'],
+                    'sum': histogram['sum'],
+                    'mean': histogram['sum'] / histogram['count'],
+                    'min': histogram['min'],
+                    'max': histogram['max'],
+                    'buckets': dict(zip(map(str, self.buckets), histogram['buckets']))
+                })
+            return {
+                'started_at': self.started_at.isoformat(),
+                'duration_seconds': time.perf_counter() - self._start,
+                'counters': self._series(self.counters),
+                'gauges': self._series(self.gauges),
+                'histograms': histograms
+            }
+
+    def _series(self, values):
+        series = {}
+        for (name, labels), value in sorted(values.items()):
+            series.setdefault(name, []).append({'labels': dict(labels), 'value': value})
+        return series
+
+    def write_json(self, path):
+        self._write(path, json.dumps(self.report(), indent=2))
+
+    def write_prometheus(self, path, prefix='digest_'):
+        """Prometheus text exposition format, for node_exporter's textfile collector"""
+        lines = []
+        with self._lock:
+            for kind, values in (('counter', self.counters), ('gauge', self.gauges)):
+                for name in sorted({name for name, _ in values}):
+                    lines.append(f"# TYPE {prefix}{name} {kind}")
+                    for (series_name, labels), value in sorted(values.items()):
+                        if series_name == name:
+                            lines.append(f"{prefix}{name}{_labels(labels)} {value}")
+
+            for name in sorted({name for name, _ in self.histograms}):
+                lines.append(f"# TYPE {prefix}{name} histogram")
+                for (series_name, labels), histogram in sorted(self.histograms.items()):
+                    if series_name != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(self.buckets, histogram['buckets']):
+                        cumulative += count
+                        lines.append(f"{prefix}{name}_bucket{_labels(labels + (('le', str(bound)),))} {cumulative}")
+                    lines.append(f"{prefix}{name}_bucket{_labels(labels + (('le', '+Inf'),))} {histogram['count']}")
+                    lines.append(f"{prefix}{name}_sum{_labels(labels)} {histogram['sum']}")
+                    lines.append(f"{prefix}{name}_count{_labels(labels)} {histogram['count']}")
+        self._write(path, '\n'.join(lines) + '\n')
+
+    def _write(self, path, content):
+        # Write-then-rename so scrapers never read a half-written file
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(temp_path, path)
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for _, value in labels)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + '}'
+
+
+# Shared registry; main.py enables it when METRICS_ENABLED is set
+metrics = Metrics()
@@ -0,0 +1,168 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from cleaning import article_text
+from dedup import ArticleDeduplicator, normalize_url
+from metrics import metrics
+from news_fetcher import topic_quotas
+from records import Summary
+
+
+def profile_queries(profile):
+    """(topic, sources) queries a profile needs, with how many articles it needs from each"""
+    sources = tuple(sorted(profile.get('sources') or ()))
+    quotas = topic_quotas(profile.get('topics') or [], profile.get('max_articles', 10))
+    return {(topic, sources): quota for topic, quota in quotas if quota > 0}
+
+
+class MultiUserDigest:
+    """Fetches each unique query and summarizes each unique article once for many profiles.
+
+    With a ranker, each query fetches `candidates` times its quota, every profile
+    shape picks its top articles from its candidates, and only articles some profile
+    picked are summarized.
+    """
+
+    def __init__(self, fetcher, summarizer, batch_size=8, dedup_threshold=None, ranker=None,
+                 candidates=3, budget_seconds=None, dedup_keep='earliest'):
+        self.fetcher = fetcher
+        self.summarizer = summarizer
+        self.batch_size = batch_size
+        self.dedup_threshold = dedup_threshold
+        self.dedup_keep = dedup_keep
+        self.ranker = ranker
+        self.candidates = max(1, candidates) if ranker else 1
+        self.budget_seconds = budget_seconds or None
+
+    def plan_queries(self, profiles):
+        """Union of all profiles' queries, each sized for the profile that needs the most"""
+        queries = {}
+        for profile in profiles:
+            for query, quota in profile_queries(profile).items():
+                queries[query] = max(queries.get(query, 0), quota * self.candidates)
+        return queries
+
+    def run(self, profiles, scope=None):
+        """Return ([summaries per profile, in order], stats); profiles with equal settings share one list.
+
+        scope: fetch-state scope, so incremental fetches of one send slot don't consume another's articles
+        """
+        stats = {
+            'profiles': len(profiles),
+            'queries': 0,
+            'articles': 0,
+            'summarized': 0,
+            'duplicates_dropped': 0,
+            'fetch_seconds': 0.0,
+            'select_seconds': 0.0,
+            'summarize_seconds': 0.0,
+            'assemble_seconds': 0.0
+        }
+
+        # Fetch: each unique (topic, sources) query once
+        start = time.perf_counter()
+        deadline = start + self.budget_seconds if self.budget_seconds else None
+        queries = self.plan_queries(profiles)
+        stats['queries'] = len(queries)
+        query_list = list(queries.items())
+        with ThreadPoolExecutor(max_workers=max(1, min(self.fetcher.max_workers, len(query_list)))) as executor:
+            fetched = list(executor.map(
+                lambda item: self.fetcher.fetch_topic(item[0][0], list(item[0][1]) or None, item[1], scope),
+                query_list
+            ))
+        stats['fetch_seconds'] = time.perf_counter() - start
+
+        # Pool: each unique article once, keyed by its position in the pool
+        start = time.perf_counter()
+        dedup = ArticleDeduplicator(self.dedup_threshold, keep=self.dedup_keep) if self.dedup_threshold else None
+        pool = []
+        by_url = {}
+        query_articles = {}
+        for (query, _), articles in zip(query_list, fetched):
+            keys = []
+            for article in articles:
+                if dedup:
+                    key, is_new = dedup.resolve(article)
+                else:
+                    url = normalize_url(article.url)
+                    key = by_url.setdefault(url, len(pool))
+                    is_new = key == len(pool)
+                if is_new:
+                    pool.append(article)
+                keys.append(key)
+            query_articles[query] = keys
+        if dedup:
+            # A later copy the keep policy prefers has replaced the one pooled first
+            pool = dedup.survivors()
+        stats['duplicates_dropped'] = dedup.duplicates if dedup else 0
+        stats['articles'] = len(pool)
+
+        # Select: each distinct profile shape's articles once, before anything is summarized
+        start = time.perf_counter()
+        shapes = {}
+        profile_shapes = []
+        for profile in profiles:
+            shape = (tuple(profile.get('topics') or ()),
+                     tuple(sorted(profile.get('sources') or ())),
+                     profile.get('max_articles', 10))
+            if shape not in shapes:
+                shapes[shape] = self.select(profile, query_articles, pool)
+            profile_shapes.append(shape)
+        # Best first: an article's priority is its best rank in any digest, so a tight
+        # budget spends the model on every digest's top articles before the rest
+        rank = {}
+        for keys in shapes.values():
+            for position, key in enumerate(keys):
+                rank[key] = min(rank.get(key, position), position)
+        selected = sorted(rank, key=lambda key: (rank[key], key))
+        stats['select_seconds'] = time.perf_counter() - start
+
+        # Summarize: each selected article once
+        start = time.perf_counter()
+        summary_texts = self.summarizer.summarize_tiered(
+            [article_text(pool[key]) for key in selected], batch_size=self.batch_size, cleaned=True,
+            deadline=deadline
+        )
+        summaries = {key: Summary(pool[key], summary, tier)
+                     for key, (summary, tier) in zip(selected, summary_texts)}
+        stats['summarized'] = len(selected)
+        stats['summarize_seconds'] = time.perf_counter() - start
+
+        # Assemble: each distinct profile shape once, shared by every profile with that shape
+        start = time.perf_counter()
+        shape_digests = {shape: [summaries[key] for key in keys] for shape, keys in shapes.items()}
+        # Positional, since two profiles without an id can share a first recipient
+        digests = [shape_digests[shape] for shape in profile_shapes]
+        stats['distinct_digests'] = len(shapes)
+        stats['assemble_seconds'] = time.perf_counter() - start
+        for name, value in stats.items():
+            metrics.set(f"multi_user_{name}", value)
+
+        return digests, stats
+
+    def select(self, profile, query_articles, pool):
+        """Pool keys of one profile's digest: its top-ranked candidates, or each query's first articles"""
+        max_articles = profile.get('max_articles', 10)
+        queries = profile_queries(profile)
+        if self.ranker:
+            candidates = list(dict.fromkeys(
+                key for query, quota in queries.items()
+                for key in query_articles.get(query, [])[:quota * self.candidates]
+            ))
+            order = self.ranker.select([pool[key] for key in candidates], profile.get('topics') or [], max_articles)
+            return [candidates[i] for i in order]
+
+        keys = []
+        seen = set()
+        for query, quota in queries.items():
+            for key in query_articles.get(query, [])[:quota]:
+                if key not in seen:
+                    seen.add(key)
+                    keys.append(key)
+        return keys[:max_articles]
+
+    def profile_id(self, profile, index):
+        """Label for a profile in logs and archives; not necessarily unique"""
+        if profile.get('id'):
+            return profile['id']
+        recipients = profile.get('email_recipients') or []
+        return recipients[0] if recipients else f"profile-{index}"
@@ -1,50 +1,392 @@
+import math
+import sqlite3
+import threading
 import requests
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlencode
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.util.retry import Retry
+from cleaning import normalize_text, strip_markers
+from metrics import metrics
+from records import Article
+
+# NewsAPI serves at most 100 articles per page
+MAX_PAGE_SIZE = 100
+
+
+class BudgetExhausted(requests.exceptions.RequestException):
+    """The daily NewsAPI request budget is used up"""
+
+
+def topic_quotas(topics, max_articles):
+    """Split max_articles over topics as evenly as possible; earlier topics take the remainder"""
+    if not topics:
+        return []
+    share, extra = divmod(max_articles, len(topics))
+    return [(topic, share + (1 if i < extra else 0)) for i, topic in enumerate(topics)]
+
+
+def plan_requests(topics, max_articles, max_page_size=MAX_PAGE_SIZE, headroom=1.5):
+    """(topic, quota, page_size, pages) for the fewest paged calls that cover each topic's quota.
+
+    Pages are sized with some headroom over the quota because articles with short
+    content don't qualify, and a slightly larger page is cheaper than a second request.
+    """
+    plan = []
+    for topic, quota in topic_quotas(topics, max_articles):
+        if quota > 0:
+            page_size = min(max_page_size, math.ceil(quota * headroom))
+            plan.append((topic, quota, page_size, math.ceil(quota / page_size)))
+    return plan
+
+
+class ApiBudget:
+    """Daily NewsAPI request allowance (0 = unlimited), shared through FetchState when given"""
+
+    def __init__(self, daily_limit=0, state=None):
+        self.daily_limit = daily_limit
+        self.state = state
+        self.day = None
+        self.used = 0
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        # NewsAPI quotas reset on the UTC day
+        today = datetime.now(timezone.utc).date().isoformat()
+        if today != self.day:
+            self.day = today
+            self.used = 0
+        if self.state:
+            try:
+                self.used = self.state.usage(self.day)
+            except sqlite3.Error as e:
+                print(f"⚠️ Shared NewsAPI budget unreadable, counting in this process: {e}")
+
+    def remaining(self):
+        """Requests left today, or None when unlimited"""
+        if not self.daily_limit:
+            return None
+        with self._lock:
+            self.refresh()
+            return max(0, self.daily_limit - self.used)
+
+    def acquire(self):
+        """Count one request against today's budget; raises BudgetExhausted once it is spent"""
+        with self._lock:
+            self.refresh()
+            if self.state:
+                try:
+                    used = self.state.spend(self.day, self.daily_limit)
+                except sqlite3.Error as e:
+                    # A locked or unwritable state file shouldn't stop the fetch
+                    print(f"⚠️ Shared NewsAPI budget unwritable, counting in this process: {e}")
+                    used = self.spend_local()
+            else:
+                used = self.spend_local()
+            if used is None:
+                raise BudgetExhausted(f"Daily NewsAPI budget of {self.daily_limit} requests used up")
+            self.used = used
+
+    def spend_local(self):
+        """Today's total after one more request counted in this process, or None if that exceeds the limit"""
+        return self.used + 1 if not self.daily_limit or self.used < self.daily_limit else None
+
+
+class TopicStream:
+    """One topic's results, requesting the next page only when more articles are needed"""
+
+    def __init__(self, fetcher, topic, sources, page_size, scope=None):
+        self.fetcher = fetcher
+        self.topic = topic
+        self.query = fetcher.query_key(topic, sources, scope)
+        self.params = fetcher.topic_params(topic, sources, page_size, scope)
+        fetcher.release(self.query)
+        self.page_size = page_size
+        self.page = 0
+        self.buffer = []
+        self.exhausted = False
+
+    def has_more(self):
+        return bool(self.buffer) or not self.exhausted
+
+    def take(self, count):
+        """Up to `count` qualifying, not yet seen articles; stops paging as soon as it has them"""
+        with metrics.timer('fetch_topic_seconds', topic=self.topic):
+            while len(self.buffer) < count and not self.exhausted:
+                self.buffer.extend(self.next_page())
+        taken, self.buffer = self.buffer[:count], self.buffer[count:]
+        self.fetcher.hold(self.query, taken)
+        metrics.inc('articles_fetched_total', len(taken), topic=self.topic)
+        return taken
+
+    def next_page(self):
+        self.page += 1
+        params = dict(self.params, page=self.page) if self.page > 1 else self.params
+        try:
+            with metrics.timer('fetch_page_seconds', topic=self.topic):
+                data = self.fetcher.get_json(f"{self.fetcher.base_url}/everything", params)
+        except requests.exceptions.RequestException as e:
+            metrics.inc('news_api_errors_total', topic=self.topic, error=type(e).__name__)
+            print(f"❌ Error fetching news for {self.topic}: {e}")
+            self.exhausted = True
+            return []
+
+        raw_articles = data.get('articles', [])
+        fetched = self.page * self.page_size
+        if (len(raw_articles) < self.page_size or fetched >= data.get('totalResults', 0)
+                or (self.fetcher.max_results and fetched >= self.fetcher.max_results)):
+            self.exhausted = True
+
+        articles = self.fetcher.parse_articles(raw_articles, self.topic)
+        if self.fetcher.incremental and articles:
+            # 'from' is inclusive, so articles at the watermark come back; drop those already seen
+            new_urls = set(self.fetcher.state.unseen(self.query, [article.url for article in articles]))
+            self.fetcher.count('already_seen', len(articles) - len(new_urls))
+            articles = [article for article in articles if article.url in new_urls]
+        return articles
+
 
 class NewsFetcher:
-    def __init__(self, api_key):
+    def __init__(self, api_key, base_url="https://newsapi.org/v2", max_workers=4,
+                 timeout=10, retries=3, backoff_factor=0.5, state=None, incremental=True,
+                 http_cache=True, daily_budget=0, max_results=None, pool_size=None):
         self.api_key = api_key
-        self.base_url = "https://newsapi.org/v2"
-    
+        self.base_url = base_url
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        # Pooled connections; callers that issue requests from more threads than
+        # max_workers (like the async digests' I/O pool) size it to match
+        self.pool_size = max(self.max_workers, pool_size or 0)
+        self.session = self.create_session(retries, backoff_factor)
+        # Optional FetchState: per-query watermarks/seen URLs and cached responses
+        self.state = state
+        self.incremental = incremental and state is not None
+        self.http_cache = http_cache and state is not None
+        self.budget = ApiBudget(daily_budget, state)
+        # Deepest result the API will page to (NewsAPI developer plans stop at 100)
+        self.max_results = max_results
+        self.stats = {'requests': 0, 'cache_hits': 0, 'not_modified': 0, 'already_seen': 0}
+        self._stats_lock = threading.Lock()
+        # Articles each query's latest fetch handed on that no delivered digest has included yet
+        self.pending = {}
+        self._pending_lock = threading.Lock()
+
+    def create_session(self, retries, backoff_factor):
+        """Shared keep-alive session that retries 429/5xx with exponential backoff"""
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(['GET']),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        # One pooled connection per concurrent request so every topic reuses TCP+TLS
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size,
+                              max_retries=retry)
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
     def get_articles(self, topics, sources=None, max_articles=10):
+        plan = self.plan(topics, max_articles)
+        if not plan:
+            return []
+
+        streams = self.open_streams(plan, sources)
+        workers = min(self.max_workers, len(plan))
+
+        # map() keeps results in topic order, whichever request finishes first
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(
+                lambda item: item[0].take(item[1][1]), zip(streams, plan)
+            ))
+        return self.complete(streams, results, max_articles)
+
+    def iter_topics(self, topics, sources=None, max_articles=10):
+        """Yield (topic, articles) as soon as each topic's first pages return.
+
+        Articles topped up from other topics to cover a shortfall come last, as one
+        batch with topic None.
+        """
+        plan = self.plan(topics, max_articles)
+        if not plan:
+            return
+
+        streams = self.open_streams(plan, sources)
+        executor = ThreadPoolExecutor(max_workers=min(self.max_workers, len(plan)))
+        futures = [executor.submit(stream.take, quota) for stream, (_, quota, _, _) in zip(streams, plan)]
+        topic_of = {future: topic for future, (topic, _, _, _) in zip(futures, plan)}
+        count = 0
+
+        try:
+            for future in as_completed(futures):
+                articles = future.result()
+                count += len(articles)
+                yield topic_of[future], articles
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        extra = [article for _, article in self.top_up(streams, max_articles - count)]
+        if extra:
+            yield None, extra
+
+    def plan(self, topics, max_articles):
+        plan = plan_requests(topics, max_articles)
+        remaining = self.budget.remaining()
+        pages = sum(pages for _, _, _, pages in plan)
+        if remaining is not None and remaining < pages:
+            print(f"⚠️ NewsAPI budget has {remaining} requests left today, {pages} planned")
+        return plan
+
+    def open_streams(self, plan, sources=None):
+        """One TopicStream per planned topic, in plan order"""
+        return [TopicStream(self, topic, sources, page_size) for topic, _, page_size, _ in plan]
+
+    def complete(self, streams, results, max_articles):
+        """Per-topic first takes, topped up from other topics where some came up short, in topic order"""
+        for index, article in self.top_up(streams, max_articles - sum(map(len, results))):
+            results[index].append(article)
+        return [article for topic_articles in results for article in topic_articles]
+
+    def top_up(self, streams, shortfall):
+        """Yield (stream index, article) from topics that still have results when others came up short"""
+        while shortfall > 0 and self.budget.remaining() != 0:
+            open_streams = [i for i, stream in enumerate(streams) if stream.has_more()]
+            if not open_streams:
+                return
+            for index in open_streams:
+                for article in streams[index].take(shortfall):
+                    shortfall -= 1
+                    yield index, article
+                if shortfall <= 0:
+                    return
+
+    def release(self, query):
+        """Forget what an earlier fetch of this query left undelivered; a new fetch replaces it"""
+        if self.incremental:
+            with self._pending_lock:
+                self.pending.pop(query, None)
+
+    def hold(self, query, articles):
+        """Track a query's fetched articles until a digest that includes them is delivered"""
+        if not self.incremental or not articles:
+            return
+        with self._pending_lock:
+            self.pending.setdefault(query, {}).update((article.url, article) for article in articles)
+
+    def commit(self, articles):
+        """Advance fetch state past articles that reached a delivered digest.
+
+        They, and the copies dedup dropped in their favour, are marked seen for every
+        query that fetched them. Each query's watermark moves to its newest delivered
+        article, but never past an older one its latest fetch returned that is still
+        undelivered, so articles ranked out or lost with a failed delivery come back
+        next run.
+        """
+        if not self.incremental:
+            return
+        urls = set()
+        for article in articles:
+            urls.add(article['url'])
+            urls.update(copy['url'] for copy in getattr(article, 'duplicates', ()))
+        updates = []
+        with self._pending_lock:
+            for query, fetched in self.pending.items():
+                delivered = [fetched.pop(url) for url in urls.intersection(fetched)]
+                if delivered:
+                    oldest = min((article['published'] for article in fetched.values()), default=None)
+                    updates.append((query, delivered, oldest))
+        for query, delivered, oldest in updates:
+            self.state.advance(query, delivered, until=oldest)
+
+    def count(self, name, amount=1):
+        with self._stats_lock:
+            self.stats[name] += amount
+        metrics.inc(f"news_api_{name}_total", amount)
+
+    def query_key(self, topic, sources=None, scope=None):
+        """Fetch-state key of a query; a scope keeps separate state for the same query"""
+        key = f"{topic}|{','.join(sorted(sources or []))}"
+        return f"{scope}|{key}" if scope else key
+
+    def fetch_topic(self, topic, sources=None, limit=10, scope=None):
+        """Fetch up to `limit` qualifying articles for a single topic, paging as needed"""
+        return TopicStream(self, topic, sources, min(MAX_PAGE_SIZE, max(1, limit)), scope).take(limit)
+
+    def topic_params(self, topic, sources=None, page_size=10, scope=None):
+        """Query parameters for a topic's first page"""
+        # Incremental runs only ask for what was published since the previous run
+        watermark = self.state.watermark(self.query_key(topic, sources, scope)) if self.incremental else None
+        # Whole hours keep the request URL stable between runs, so cached responses can match
+        since = (datetime.now() - timedelta(days=1)).replace(minute=0, second=0, microsecond=0)
+        params = {
+            'q': topic,
+            'apiKey': self.api_key,
+            'language': 'en',
+            'sortBy': 'publishedAt',
+            'pageSize': page_size,
+            'from': watermark or since.isoformat()
+        }
+
+        if sources:
+            params['sources'] = ','.join(sources)
+        return params
+
+    def parse_articles(self, raw_articles, topic=None):
+        """Qualifying articles (content over 100 chars) in the digest's article shape"""
         articles = []
-        
-        for topic in topics:
-            url = f"{self.base_url}/everything"
-            params = {
-                'q': topic,
-                'apiKey': self.api_key,
-                'language': 'en',
-                'sortBy': 'publishedAt',
-                'pageSize': max_articles // len(topics),
-                'from': (datetime.now() - timedelta(days=1)).isoformat()
-            }
-            
-            if sources:
-                params['sources'] = ','.join(sources)
-            
-            try:
-                response = requests.get(url, params=params)
-                response.raise_for_status()
-                data = response.json()
-                
-                for article in data.get('articles', []):
-                    if article['content'] and len(article['content']) > 100:
-                        # Clean content and use description if content is truncated
-                        content = article['content']
-                        if '[+' in content and 'chars]' in content:
-                            # Content is truncated, use description instead
-                            content = article.get('description', content)
-                        
-                        articles.append({
-                            'title': article['title'],
-                            'content': content,
-                            'url': article['url'],
-                            'source': article['source']['name'],
-                            'published': article['publishedAt']
-                        })
-                        
-            except requests.exceptions.RequestException as e:
-                print(f"❌ Error fetching news for {topic}: {e}")
-        
-        return articles[:max_articles]
\ No newline at end of file
+        for article in raw_articles:
+            if article['content'] and len(article['content']) > 100:
+                # Strip truncation markers once here; truncated content falls back to the description
+                content = strip_markers(article['content'])
+                if len(content) != len(article['content']):
+                    content = article.get('description') or content
+
+                articles.append(Article(
+                    article['title'],
+                    content,
+                    article['url'],
+                    article['source']['name'],
+                    published=article['publishedAt'],
+                    clean_content=normalize_text(content),
+                    topic=topic
+                ))
+        return articles
+
+    def get_json(self, url, params):
+        """GET a JSON payload, reusing a cached response while its ETag/Cache-Control allow"""
+        key = cached = None
+        headers = {}
+        if self.http_cache:
+            key = f"{url}?{urlencode(sorted((k, v) for k, v in params.items() if k != 'apiKey'))}"
+            cached = self.state.cached_response(key)
+        if cached:
+            etag, last_modified, fresh, payload = cached
+            if fresh:
+                self.count('cache_hits')
+                return payload
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+
+        self.budget.acquire()
+        self.count('requests')
+        response = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+        if response.status_code == 304 and cached:
+            self.count('not_modified')
+            # A 304 may omit validators; keep the stored ones and take any new freshness info
+            merged = CaseInsensitiveDict({'ETag': etag, 'Last-Modified': last_modified})
+            merged.update(response.headers)
+            self.state.store_response(key, merged, payload)
+            return payload
+
+        response.raise_for_status()
+        payload = response.json()
+        if key:
+            self.state.store_response(key, response.headers, payload)
+        return payload
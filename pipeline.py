@@ -0,0 +1,267 @@
+import queue
+import threading
+import time
+from cleaning import article_text
+from dedup import ArticleDeduplicator
+from metrics import metrics
+from news_fetcher import topic_quotas
+from records import Summary
+
+_DONE = object()
+
+
+class TopicSelection:
+    """Picks a digest's articles topic by topic, as each topic's candidates arrive.
+
+    Each topic gets its share of max_articles, ranked when there is a ranker, with
+    the articles already picked counting towards its diversity discounts. Shares a
+    topic can't fill are covered at the end from every topic's leftovers. Picks are
+    keys into `articles`: with dedup, a later copy the keep policy prefers replaces
+    the copy under the same key, so the digest links to the copy the policy keeps
+    even when an earlier one was already on its way to the summarizer.
+    """
+
+    def __init__(self, topics, max_articles, ranker=None, dedup=None):
+        self.topics = topics
+        self.max_articles = max_articles
+        self.ranker = ranker
+        self.dedup = dedup
+        self.shares = dict(topic_quotas(topics, max_articles))
+        self.articles = dedup.kept if dedup else []
+        self.picked = []
+        self.leftovers = []
+        self.candidates = 0
+        self.duplicates = 0
+        self.lock = threading.Lock()
+
+    def add(self, topic, articles):
+        """Keys to summarize now out of one topic's fetched articles"""
+        with self.lock:
+            keys = []
+            for article in articles:
+                if self.dedup:
+                    key, is_new = self.dedup.resolve(article)
+                    if not is_new:
+                        self.duplicates += 1
+                        continue
+                else:
+                    key = len(self.articles)
+                    self.articles.append(article)
+                keys.append(key)
+            self.candidates += len(keys)
+            picked = self.pick(keys, self.shares.get(topic, 0))
+            self.leftovers.extend(key for key in keys if key not in picked)
+            return picked
+
+    def finish(self):
+        """Keys that cover the shares topics came up short on"""
+        with self.lock:
+            return self.pick(self.leftovers, self.max_articles)
+
+    def pick(self, keys, count):
+        count = min(count, self.max_articles - len(self.picked))
+        if count <= 0 or not keys:
+            return []
+        if self.ranker:
+            chosen = [self.articles[key] for key in self.picked]
+            order = self.ranker.select([self.articles[key] for key in keys], self.topics, count, chosen)
+            picked = [keys[index] for index in order]
+        else:
+            picked = keys[:count]
+        self.picked.extend(picked)
+        return picked
+
+    def article(self, key):
+        """The copy currently kept under key"""
+        with self.lock:
+            return self.articles[key]
+
+    def settle(self):
+        """Once fetching is done: kept copies carry the duplicates dropped in their favour"""
+        if self.dedup:
+            with self.lock:
+                self.dedup.survivors()
+
+
+class DigestPipeline:
+    """Streams articles through fetch -> summarize -> render stages connected by bounded queues"""
+
+    def __init__(self, fetcher, summarizer, batch_size=8, queue_size=32, batch_wait=0.05,
+                 dedup_threshold=None, ranker=None, candidates=3, budget_seconds=None,
+                 dedup_keep='earliest'):
+        self.fetcher = fetcher
+        self.summarizer = summarizer
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        # How long the summarizer waits to fill a batch once it has at least one article
+        self.batch_wait = batch_wait
+        # Similarity above which an article counts as a near-duplicate; None disables dedup
+        self.dedup_threshold = dedup_threshold
+        # Which copy of a duplicate survives (see TopicSelection for how it streams)
+        self.dedup_keep = dedup_keep
+        # With a ranker, `candidates` times max_articles are fetched and only the top
+        # ones of each topic go on to summarization, as soon as that topic returns
+        self.ranker = ranker
+        self.candidates = max(1, candidates) if ranker else 1
+        # Seconds from the start of a run by which every summary should be ready; the
+        # summarizer drops lower-ranked articles to cheaper tiers to meet it
+        self.budget_seconds = budget_seconds or None
+
+    def summarize_fetched(self, articles, topics, max_articles=10, start=None):
+        """Dedup, rank and summarize already fetched candidates in one call; returns (summaries, stats).
+
+        For callers that do their own fetching, like the async digest; `start` is the
+        time.perf_counter() the run began at, which the latency budget counts from.
+        """
+        batch_start = time.perf_counter()
+        # The same per-topic selection as the streaming run, with every topic already in
+        selection = TopicSelection(topics, max_articles, self.ranker, self.create_deduplicator())
+        by_topic = {}
+        for article in articles:
+            by_topic.setdefault(article.get('topic'), []).append(article)
+        keys = []
+        for topic, topic_articles in by_topic.items():
+            keys.extend(selection.add(topic, topic_articles))
+        keys.extend(selection.finish())
+        selection.settle()
+        selected = [selection.article(key) for key in keys]
+        ready_by = (start or batch_start) + self.budget_seconds if self.budget_seconds else None
+        results = self.summarizer.summarize_tiered(
+            [article_text(article) for article in selected], batch_size=self.batch_size, cleaned=True,
+            deadline=ready_by
+        )
+        stats = {
+            'articles': len(selected),
+            'candidates': selection.candidates,
+            'duplicates_dropped': selection.duplicates,
+            'summarize_seconds': time.perf_counter() - batch_start
+        }
+        return [Summary(article, summary, tier) for article, (summary, tier) in zip(selected, results)], stats
+
+    def create_deduplicator(self):
+        if not self.dedup_threshold:
+            return None
+        return ArticleDeduplicator(self.dedup_threshold, keep=self.dedup_keep)
+
+    def run(self, topics, sources=None, max_articles=10, on_summary=None):
+        """Run all stages; on_summary(index, item) is called as each summary is ready"""
+        articles = queue.Queue(maxsize=self.queue_size)
+        results = queue.Queue(maxsize=self.queue_size)
+        errors = []
+        selection = TopicSelection(topics, max_articles, self.ranker, self.create_deduplicator())
+        stats = {
+            'articles': 0,
+            'candidates': 0,
+            'duplicates_dropped': 0,
+            'batches': 0,
+            'fetch_seconds': 0.0,
+            'summarize_seconds': 0.0,
+            'render_seconds': 0.0,
+            'time_to_first_summary': None,
+            'total_seconds': 0.0
+        }
+        start = time.perf_counter()
+        ready_by = start + self.budget_seconds if self.budget_seconds else None
+
+        def fetch_stage():
+            try:
+                # Duplicates are dropped, and each topic's picks handed on, before the next topic returns
+                for topic, fetched in self.fetcher.iter_topics(topics, sources, max_articles * self.candidates):
+                    for key in selection.add(topic, fetched):
+                        articles.put(key)
+                for key in selection.finish():
+                    articles.put(key)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                stats['fetch_seconds'] = time.perf_counter() - start
+                articles.put(_DONE)
+
+        def summarize_stage():
+            done = False
+            summarized = 0
+            try:
+                while not done:
+                    batch = [articles.get()]
+                    if batch[0] is _DONE:
+                        done = True
+                        break
+
+                    # Top the batch up with whatever arrives shortly after
+                    deadline = time.perf_counter() + self.batch_wait
+                    while len(batch) < self.batch_size:
+                        try:
+                            key = articles.get(timeout=max(0.0, deadline - time.perf_counter()))
+                        except queue.Empty:
+                            break
+                        if key is _DONE:
+                            done = True
+                            break
+                        batch.append(key)
+
+                    batch_start = time.perf_counter()
+                    batch_articles = [selection.article(key) for key in batch]
+                    # Picks arrive best first within each topic, and the shortfall last, so later
+                    # batches are the ones squeezed by the budget
+                    summary_texts = self.summarizer.summarize_tiered(
+                        [article_text(article) for article in batch_articles], batch_size=self.batch_size,
+                        cleaned=True, deadline=ready_by,
+                        reserve=max(0, max_articles - summarized - len(batch))
+                    )
+                    summarized += len(batch)
+                    stats['summarize_seconds'] += time.perf_counter() - batch_start
+                    stats['batches'] += 1
+                    metrics.observe('pipeline_batch_seconds', time.perf_counter() - batch_start)
+
+                    for key, article, (summary, tier) in zip(batch, batch_articles, summary_texts):
+                        results.put((key, Summary(article, summary, tier)))
+            except Exception as e:
+                errors.append(e)
+                # Keep draining so the fetch stage never blocks on a full queue
+                while not done and articles.get() is not _DONE:
+                    pass
+            finally:
+                results.put(_DONE)
+
+        threads = [
+            threading.Thread(target=fetch_stage, name='digest-fetch', daemon=True),
+            threading.Thread(target=summarize_stage, name='digest-summarize', daemon=True)
+        ]
+        for thread in threads:
+            thread.start()
+
+        # Render stage runs on the calling thread and sees summaries as they complete
+        summaries = []
+        keys = []
+        while True:
+            result = results.get()
+            if result is _DONE:
+                break
+            if stats['time_to_first_summary'] is None:
+                stats['time_to_first_summary'] = time.perf_counter() - start
+            key, item = result
+            keys.append(key)
+            summaries.append(item)
+            if on_summary:
+                render_start = time.perf_counter()
+                on_summary(len(summaries), item)
+                stats['render_seconds'] += time.perf_counter() - render_start
+
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise errors[0]
+
+        # A copy the keep policy preferred may have arrived after its story went to the
+        # summarizer; the digest still links to the kept copy
+        selection.settle()
+        for key, item in zip(keys, summaries):
+            item.article = selection.article(key)
+        stats['candidates'] = selection.candidates
+        stats['duplicates_dropped'] = selection.duplicates
+        stats['articles'] = len(summaries)
+        stats['total_seconds'] = time.perf_counter() - start
+        for name, value in stats.items():
+            if value is not None:
+                metrics.set(f"pipeline_{name}", value)
+        return summaries, stats
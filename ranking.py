@@ -0,0 +1,116 @@
+import heapq
+import math
+import re
+from collections import Counter
+from datetime import datetime, timezone
+import numpy as np
+
+_TOKEN_RE = re.compile(r'\w+')
+
+# Characters of content scored with the title; NewsAPI content is a ~200 char lead anyway
+LEAD_CHARS = 300
+
+
+def parse_published(values):
+    """NewsAPI publishedAt strings as datetime64[s]; NaT where missing or malformed"""
+    published = np.full(len(values), np.datetime64('NaT'), dtype='datetime64[s]')
+    for i, value in enumerate(values):
+        if value:
+            try:
+                # Drop the 'Z' suffix; NumPy only parses naive (UTC) timestamps
+                published[i] = np.datetime64(value[:19], 's')
+            except ValueError:
+                pass
+    return published
+
+
+def terms(text):
+    """Lowercased word tokens with a plural 's' folded, so 'markets' matches 'market'"""
+    return [token[:-1] if len(token) > 3 and token.endswith('s') and not token.endswith('ss') else token
+            for token in _TOKEN_RE.findall(text.lower())]
+
+
+class ArticleRanker:
+    """Cheap pre-summarization ranking of candidate articles for one profile.
+
+    Each candidate's score mixes BM25 relevance of its title and lead to the
+    profile's topics with an exponential recency decay. Top-k selection then
+    discounts candidates whose source or topic is already in the digest, using
+    a lazily re-scored heap, so only the chosen k ever reach the summarizer.
+    """
+
+    def __init__(self, k1=1.2, b=0.75, relevance_weight=0.7, half_life_hours=12.0,
+                 source_penalty=0.7, topic_penalty=0.85, now=None):
+        self.k1 = k1
+        self.b = b
+        self.relevance_weight = relevance_weight
+        self.half_life_hours = half_life_hours
+        self.source_penalty = source_penalty
+        self.topic_penalty = topic_penalty
+        self.now = now
+
+    def relevance(self, articles, topics):
+        """BM25 of each article's title (counted twice) and lead against the topic terms, scaled to 0-1"""
+        query = set(term for topic in topics for term in terms(topic))
+        docs = [Counter(terms(f"{article['title']} {article['title']} "
+                              f"{(article.get('clean_content') or article.get('content') or '')[:LEAD_CHARS]}"))
+                for article in articles]
+        if not docs or not query:
+            return np.zeros(len(docs))
+        lengths = np.array([sum(doc.values()) for doc in docs], dtype=float)
+        average = lengths.mean() or 1.0
+        scores = np.zeros(len(docs))
+        for term in query:
+            freqs = np.array([doc.get(term, 0) for doc in docs], dtype=float)
+            df = np.count_nonzero(freqs)
+            if not df:
+                continue
+            idf = math.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+            scores += idf * freqs * (self.k1 + 1) / (freqs + self.k1 * (1 - self.b + self.b * lengths / average))
+        best = scores.max()
+        return scores / best if best > 0 else scores
+
+    def recency(self, articles):
+        """0.5 ** (age / half-life) per article; undated articles score 0"""
+        published = parse_published([article.get('published') for article in articles])
+        now = np.datetime64((self.now or datetime.now(timezone.utc)).replace(tzinfo=None), 's')
+        hours = np.maximum((now - published).astype(float) / 3600, 0.0)
+        decay = np.power(0.5, hours / self.half_life_hours)
+        decay[np.isnat(published)] = 0.0
+        return decay
+
+    def scores(self, articles, topics):
+        return (self.relevance_weight * self.relevance(articles, topics)
+                + (1 - self.relevance_weight) * self.recency(articles))
+
+    def select(self, articles, topics, k, chosen=()):
+        """Indexes of the best k articles, best first.
+
+        chosen: articles already in the digest, whose sources and topics count
+        towards the diversity discounts.
+        """
+        if k <= 0 or not articles:
+            return []
+        base = self.scores(articles, topics)
+        sources = Counter(article.get('source') for article in chosen)
+        topic_counts = Counter(article.get('topic') for article in chosen)
+
+        # (-score, index, source count, topic count) with the counts the score was computed at;
+        # penalties only lower scores, so a popped entry whose counts are current is the best
+        heap = [(-score, index, 0, 0) for index, score in enumerate(base)]
+        heapq.heapify(heap)
+        selected = []
+        while heap and len(selected) < k:
+            _, index, seen_sources, seen_topics = heapq.heappop(heap)
+            source = articles[index].get('source')
+            topic = articles[index].get('topic')
+            current = (sources[source], topic_counts[topic])
+            if current != (seen_sources, seen_topics):
+                score = (base[index] * self.source_penalty ** current[0]
+                         * self.topic_penalty ** current[1])
+                heapq.heappush(heap, (-score, index) + current)
+                continue
+            selected.append(index)
+            sources[source] += 1
+            topic_counts[topic] += 1
+        return selected
@@ -0,0 +1,88 @@
+import sys
+from cleaning import normalize_text
+
+
+class Article:
+    """One fetched article.
+
+    Slots keep the per-article cost to the field pointers, and source names are
+    interned so thousands of articles share one string per outlet. Only the
+    normalized text is kept: every stage works from it, so the raw NewsAPI content
+    is dropped at ingest and `content` reads the normalized text. Fields can also
+    be read like dict keys, so code written against article dicts keeps working.
+    duplicates holds the copies dedup dropped in this article's favour.
+    """
+
+    __slots__ = ('title', 'clean_content', 'url', 'source', 'published', 'topic', 'duplicates')
+    FIELDS = ('title', 'content', 'clean_content', 'url', 'source', 'published', 'topic')
+    _fields = frozenset(FIELDS)
+
+    def __init__(self, title, content, url, source, published=None, clean_content=None, topic=None):
+        self.title = title
+        self.clean_content = clean_content if clean_content is not None else normalize_text(content or '')
+        self.url = url
+        self.source = sys.intern(source) if source else source
+        self.published = published
+        self.topic = topic
+        self.duplicates = ()
+
+    @property
+    def content(self):
+        return self.clean_content
+
+    def __getitem__(self, key):
+        if key not in self._fields:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self._fields else default
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def __repr__(self):
+        return f"Article({self.title!r}, source={self.source!r})"
+
+
+class Summary:
+    """An article's summary; title, url and source are read through from the article, not copied.
+
+    tier is how the summary was made (abstractive, extractive, lead, cache, short), if known.
+    """
+
+    __slots__ = ('article', 'summary', 'tier')
+    _fields = frozenset(('title', 'summary', 'url', 'source', 'tier'))
+
+    def __init__(self, article, summary, tier=None):
+        self.article = article
+        self.summary = summary
+        self.tier = tier
+
+    @property
+    def title(self):
+        return self.article.title
+
+    @property
+    def url(self):
+        return self.article.url
+
+    @property
+    def source(self):
+        return self.article.source
+
+    def __getitem__(self, key):
+        if key not in self._fields:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self._fields else default
+
+    def to_dict(self):
+        return {'title': self.title, 'summary': self.summary, 'url': self.url, 'source': self.source,
+                'tier': self.tier}
+
+    def __repr__(self):
+        return f"Summary({self.title!r}, source={self.source!r})"
+
@@ -0,0 +1,139 @@
+import signal
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from metrics import metrics
+
+
+def parse_send_time(value):
+    """(hour, minute) from an 'HH:MM' send_time"""
+    hour, minute = (int(part) for part in value.split(':'))
+    if not (0 <= hour < 24 and 0 <= minute < 60):
+        raise ValueError(f"Invalid send_time '{value}', expected HH:MM")
+    return hour, minute
+
+
+def profile_zone(profile):
+    name = profile.get('timezone') or 'UTC'
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        print(f"⚠️ Unknown timezone '{name}', using UTC")
+        return timezone.utc
+
+
+def next_send(profile, after):
+    """First moment strictly after `after` (aware) when it is send_time in the profile's timezone, in UTC"""
+    hour, minute = parse_send_time(profile.get('send_time') or '08:00')
+    zone = profile_zone(profile)
+    day = after.astimezone(zone).date()
+    while True:
+        # Round-tripping through UTC moves a send_time skipped by a DST change forward an hour
+        candidate = datetime(day.year, day.month, day.day, hour, minute, tzinfo=zone).astimezone(timezone.utc)
+        if candidate > after:
+            return candidate
+        day += timedelta(days=1)
+
+
+def slot_scope(group):
+    """Fetch-state scope of a send slot, stable across DST changes and independent of the day.
+
+    Incremental fetching keeps watermarks and seen URLs per scope, so a profile sent
+    at 09:00 still gets the articles another profile already received at 08:00.
+    """
+    return ','.join(sorted(set(f"{profile.get('send_time') or '08:00'} {profile.get('timezone') or 'UTC'}"
+                               for profile in group)))
+
+
+class DigestScheduler:
+    """Resident loop that prepares each profile's digest shortly before its local send_time.
+
+    Profiles sharing a send instant are prepared together, so their fetches and
+    summaries are shared. Preparation starts `prefetch_seconds` before the deadline,
+    or earlier if the last preparation took longer than that, and the emails go out
+    at the deadline.
+    """
+
+    def __init__(self, agent, load_profiles, prefetch_seconds=600, clock=None):
+        self.agent = agent
+        self.load_profiles = load_profiles
+        self.prefetch_seconds = prefetch_seconds
+        self.clock = clock or (lambda: datetime.now(timezone.utc))
+        self.stop_event = threading.Event()
+        self.last_prepare_seconds = 0.0
+        self.sent_slots = 0
+        self.slot = None
+
+    def lead(self):
+        return timedelta(seconds=max(self.prefetch_seconds, 2 * self.last_prepare_seconds))
+
+    def upcoming(self, profiles, after):
+        """(send_at, profiles) for the next send instant after `after`"""
+        slots = {}
+        for profile in profiles:
+            slots.setdefault(next_send(profile, after), []).append(profile)
+        send_at = min(slots)
+        return send_at, slots[send_at]
+
+    def wait_until(self, moment):
+        """Sleep until moment; False if the scheduler was stopped first"""
+        while not self.stop_event.is_set():
+            remaining = (moment - self.clock()).total_seconds()
+            if remaining <= 0:
+                return True
+            # Wake at least once a minute so clock jumps (suspend, NTP) are noticed
+            self.stop_event.wait(min(remaining, 60))
+        return False
+
+    def run_once(self, after=None):
+        """Wait for the next send instant, prepare and deliver it; returns its send time or None if stopped"""
+        self.slot = None
+        profiles = self.load_profiles()
+        if not profiles:
+            print("⚠️ No profiles to schedule")
+            return None
+        send_at, group = self.upcoming(profiles, after or self.clock())
+        self.slot = send_at
+        print(f"⏰ Next digest for {len(group)} profile(s) at {send_at.isoformat()}")
+
+        if not self.wait_until(send_at - self.lead()):
+            return None
+        start = time.perf_counter()
+        digests = self.agent.prepare_profile_digests(group, scope=slot_scope(group))
+        self.last_prepare_seconds = time.perf_counter() - start
+        metrics.observe('scheduler_prepare_seconds', self.last_prepare_seconds)
+
+        if not self.wait_until(send_at):
+            return None
+        lag = (self.clock() - send_at).total_seconds()
+        metrics.observe('scheduler_send_lag_seconds', lag)
+        if lag > 1:
+            print(f"⚠️ Sending {lag:.1f}s late; preparation took {self.last_prepare_seconds:.1f}s")
+        self.agent.deliver_profile_digests(group, digests)
+        self.sent_slots += 1
+        metrics.inc('scheduler_slots_total')
+        self.agent.export_metrics()
+        return send_at
+
+    def run(self):
+        """Serve digests until SIGINT/SIGTERM"""
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: self.stop())
+        after = None
+        while not self.stop_event.is_set():
+            try:
+                sent_at = self.run_once(after)
+            except Exception as e:
+                # One bad slot (network down, SMTP outage) must not stop the daemon
+                print(f"❌ Scheduled digest failed: {e}")
+                metrics.inc('scheduler_errors_total')
+                sent_at = self.slot or self.clock()
+                self.stop_event.wait(60)
+            # next_send is strictly after the last slot, so it never fires twice; a slot that
+            # came due while an earlier one was being delivered is sent late, not skipped
+            after = sent_at
+        print("👋 Scheduler stopped")
+
+    def stop(self):
+        self.stop_event.set()
@@ -0,0 +1,23 @@
+import time
+from summarizer import ArticleSummarizer
+from tiering import estimate_tokens
+
+
+class SimulatedModelSummarizer(ArticleSummarizer):
+    """ArticleSummarizer whose model is a sleep costing `seconds_per_unit` per work unit.
+
+    Everything else (cleaning, tier planning, extractive and lead tiers) is the real code.
+    """
+
+    def __init__(self, seconds_per_unit=0.002, **kwargs):
+        super().__init__(**kwargs)
+        self.seconds_per_unit = seconds_per_unit
+        self._summarizer = object()
+        self._model_loaded = True
+
+    def abstractive_summaries(self, clean_texts, batch_size=8):
+        start = time.perf_counter()
+        units = sum(self.costs.units(estimate_tokens(text)) for text in clean_texts)
+        time.sleep(self.seconds_per_unit * units)
+        self.costs.observe_model(time.perf_counter() - start, units)
+        return [' '.join(text.split('. ')[:3]) for text in clean_texts]
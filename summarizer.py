@@ -1,123 +1,312 @@
-from transformers import pipeline
 import nltk
-from nltk.corpus import stopwords
-from nltk.tokenize import sent_tokenize, word_tokenize
-import re
-from collections import Counter
+from nltk.tokenize import sent_tokenize
+import threading
+import time
+from backends import build_summarization_pipeline
+from cleaning import normalize_text
+from chunking import group_by_sentence, pack_sentences, sentence_starts, split_sentences
+from extractive import ExtractiveEngine
+from metrics import metrics
+from tiering import SummaryCostModel, plan_tiers
+
+MODEL_NAME = "facebook/bart-large-cnn"
+# Everything that changes the model output; also part of the summary cache key
+GENERATION_PARAMS = {
+    # Inputs are packed into whole-sentence chunks of at most this many tokens; articles
+    # with several chunks get a second, reduce pass over the joined chunk summaries
+    'max_input_tokens': 1024,
+    'max_chunks': 8,
+    'max_reduce_rounds': 2,
+    'max_length': 100,
+    'min_length': 40,
+    'do_sample': False
+}
+
+# sent_tokenize reads punkt_tab since NLTK 3.8.2
+NLTK_RESOURCES = {'punkt_tab': 'tokenizers/punkt_tab', 'stopwords': 'corpora/stopwords'}
+_missing_nltk_resources = None
+
+def check_nltk_data():
+    """Check once per process for the NLTK data we need; never downloads at runtime"""
+    global _missing_nltk_resources
+    if _missing_nltk_resources is None:
+        _missing_nltk_resources = []
+        for name, path in NLTK_RESOURCES.items():
+            try:
+                nltk.data.find(path)
+            except LookupError:
+                _missing_nltk_resources.append(name)
+        if _missing_nltk_resources:
+            print(f"⚠️ Missing NLTK data: {', '.join(_missing_nltk_resources)}. "
+                  f"Install it with: python -m nltk.downloader {' '.join(_missing_nltk_resources)}")
+    return not _missing_nltk_resources
 
 class ArticleSummarizer:
-    def __init__(self):
-        # Initialize Hugging Face summarization pipeline
-        try:
-            self.summarizer = pipeline("summarization", 
-                                     model="facebook/bart-large-cnn")
-        except:
-            print("⚠️ BART model failed, using extractive summarization")
-            self.summarizer = None
+    def __init__(self, cache=None, model_name=MODEL_NAME, backend='pytorch',
+                 model_cache_dir='model_cache', extractive_method='frequency'):
+        self.cache = cache
+        self.extractive = ExtractiveEngine(extractive_method)
+        self.model_name = model_name
+        self.backend = backend
+        self.model_cache_dir = model_cache_dir
         
-        # Download required NLTK data if not present
-        try:
-            nltk.data.find('tokenizers/punkt')
-        except LookupError:
-            nltk.download('punkt')
+        # The model (and transformers/torch) is only loaded by the first article
+        # that actually needs abstractive summarization
+        self._summarizer = None
+        self._model_loaded = False
+        self._model_lock = threading.Lock()
+        # Measured per-tier cost, used to plan tiers when a run has a latency budget
+        self.costs = SummaryCostModel(GENERATION_PARAMS['max_input_tokens'], GENERATION_PARAMS['max_chunks'],
+                                      GENERATION_PARAMS['max_length'])
         
-        try:
-            nltk.data.find('corpora/stopwords')
-        except LookupError:
-            nltk.download('stopwords')
+        check_nltk_data()
+    
+    @property
+    def summarizer(self):
+        """Hugging Face summarization pipeline, built on first use (None if unavailable)"""
+        if not self._model_loaded:
+            with self._model_lock:
+                if not self._model_loaded:
+                    start = time.perf_counter()
+                    try:
+                        self._summarizer = build_summarization_pipeline(
+                            self.model_name, self.backend, self.model_cache_dir
+                        )
+                    except Exception as e:
+                        print(f"⚠️ BART model failed ({self.backend}: {e}), using extractive summarization")
+                        self._summarizer = None
+                    self.costs.observe_model_load(time.perf_counter() - start)
+                    self._model_loaded = True
+        return self._summarizer
+    
+    def warmup(self):
+        """Load the model now, for long-lived workers; returns whether it is available"""
+        return self.summarizer is not None
     
     def clean_text(self, text):
         """Clean and preprocess text"""
-        # Remove truncation indicators
-        text = re.sub(r'\[\+\s*\d+\s*chars?\]', '', text)
-        text = re.sub(r'\[\+\s*\d+\s*characters?\]', '', text)
-        
-        # Remove extra whitespace and clean text
-        text = re.sub(r'\s+', ' ', text)
-        text = re.sub(r'[^\w\s.,!?-]', '', text)
-        return text.strip()
+        return normalize_text(text)
     
     def extractive_summary(self, text, num_sentences=2):
         """Create extractive summary using sentence scoring"""
+        return self.extractive_summaries([text], num_sentences)[0]
+    
+    def extractive_summaries(self, texts, num_sentences=2):
+        """Extractive summaries for many texts, scored together in one batch"""
         try:
-            sentences = sent_tokenize(text)
-            if len(sentences) <= 2:
-                return text
-            
-            # Score sentences based on word frequency
-            words = word_tokenize(text.lower())
-            stop_words = set(stopwords.words('english'))
-            words = [word for word in words if word.isalnum() and word not in stop_words]
-            
-            word_freq = Counter(words)
-            
-            sentence_scores = {}
-            for sentence in sentences:
-                sentence_words = word_tokenize(sentence.lower())
-                score = 0
-                word_count = 0
-                
-                for word in sentence_words:
-                    if word in word_freq:
-                        score += word_freq[word]
-                        word_count += 1
-                
-                if word_count > 0:
-                    sentence_scores[sentence] = score / word_count
-            
-            # Get top sentences
-            top_sentences = sorted(sentence_scores.items(), key=lambda x: x[1], reverse=True)
-            summary_sentences = [sent[0] for sent in top_sentences[:num_sentences]]
-            
-            # Maintain original order
-            summary = []
-            for sentence in sentences:
-                if sentence in summary_sentences:
-                    summary.append(sentence)
-            
-            return ' '.join(summary)
-            
+            return self.extractive.summarize_many(texts, num_sentences=num_sentences)
         except Exception as e:
             print(f"❌ Extractive summarization error: {e}")
-            sentences = sent_tokenize(text)
-            return ' '.join(sentences[:2])
+            metrics.inc('summarizer_errors_total', stage='extractive')
+            return [self.first_sentences(text, num_sentences) for text in texts]
     
     def summarize(self, text, max_length=3):
         """Main summarization method with multiple fallbacks"""
-        try:
-            # Clean the text first
-            clean_text = self.clean_text(text)
-            
-            # If text is very short, return as is
-            if len(clean_text) < 100:
-                return clean_text
-            
-            # Method 1: Try AI summarization if available
-            if self.summarizer:
+        return self.summarize_many([text])[0]
+    
+    def summarize_many(self, texts, batch_size=8, cleaned=False, deadline=None, reserve=0):
+        """Summarize many articles, running the model on length-bucketed batches"""
+        return [summary for summary, _ in self.summarize_tiered(texts, batch_size, cleaned, deadline, reserve)]
+    
+    def summarize_tiered(self, texts, batch_size=8, cleaned=False, deadline=None, reserve=0):
+        """(summary, tier) per text; tier is abstractive, extractive, lead, cache or short.
+        
+        cleaned: texts are already normalized (an article's clean_content from ingest)
+        deadline: time.perf_counter() value the summaries should be ready by. Texts are
+        taken as highest-ranked first and given the most expensive tier the estimated
+        cost allows, keeping extractive time for `reserve` articles still to come.
+        """
+        results = [None] * len(texts)
+        tiers = ['short'] * len(texts)
+        pending = []
+        
+        with metrics.timer('summarize_seconds', method='clean'):
+            for i, text in enumerate(texts):
                 try:
-                    # Limit input length for the model
-                    if len(clean_text) > 1024:
-                        clean_text = clean_text[:1024]
-                    
-                    summary = self.summarizer(
-                        clean_text, 
-                        max_length=100,
-                        min_length=40,
-                        do_sample=False
-                    )
-                    
-                    result = summary[0]['summary_text']
-                    if len(result) > 50:  # Valid summary
-                        return result
-                        
+                    # Clean the text first
+                    clean_text = text if cleaned else self.clean_text(text)
                 except Exception as e:
-                    print(f"❌ AI Summarization failed: {e}")
+                    print(f"❌ All summarization methods failed: {e}")
+                    metrics.inc('summaries_total', method='lead')
+                    results[i] = self.first_sentences(text)
+                    tiers[i] = 'lead'
+                    continue
+                
+                # If text is very short, return as is
+                if len(clean_text) < 100:
+                    results[i] = clean_text
+                else:
+                    pending.append((i, clean_text))
+        metrics.inc('summaries_total', len(texts) - len(pending), method='short')
+        
+        # Serve previously summarized articles from the cache; entries are only
+        # written when the model was available, so a hit never needs to load it
+        if self.cache and pending:
+            cached = self.cache.get_many([clean_text for _, clean_text in pending])
+            misses = []
+            for (i, clean_text), summary in zip(pending, cached):
+                if summary is None:
+                    misses.append((i, clean_text))
+                else:
+                    results[i] = summary
+                    tiers[i] = 'cache'
+            metrics.inc('summaries_total', len(pending) - len(misses), method='cache')
+            pending = misses
+        
+        # With a deadline, only the articles the remaining time allows go to the model
+        model_pending = pending
+        if deadline is not None and pending:
+            model_state = self._summarizer is not None if self._model_loaded else None
+            planned = plan_tiers([clean_text for _, clean_text in pending], deadline - time.perf_counter(),
+                                 self.costs, reserve, model_state)
+            model_pending = [item for item, tier in zip(pending, planned) if tier == 'abstractive']
+            lead = [item for item, tier in zip(pending, planned) if tier == 'lead']
+            for i, clean_text in lead:
+                results[i] = self.first_sentences(clean_text)
+                tiers[i] = 'lead'
+            metrics.inc('summaries_total', len(lead), method='lead')
+        
+        # Method 1: Try AI summarization if available
+        if model_pending and self.summarizer:
+            with metrics.timer('summarize_seconds', method='abstractive'):
+                summaries = self.abstractive_summaries([clean_text for _, clean_text in model_pending], batch_size)
+            for (i, _), result in zip(model_pending, summaries):
+                if result and len(result) > 50:  # Valid summary
+                    results[i] = result
+                    tiers[i] = 'abstractive'
+                    metrics.inc('summaries_total', method='abstractive')
+        
+        # Method 2: Extractive summarization, planned or as fallback, only where needed, in one batch
+        fallback = [(i, clean_text) for i, clean_text in pending if results[i] is None]
+        if fallback:
+            start = time.perf_counter()
+            with metrics.timer('summarize_seconds', method='extractive'):
+                extracted = self.extractive_summaries([clean_text for _, clean_text in fallback], num_sentences=2)
+            self.costs.observe_extractive(time.perf_counter() - start, len(fallback))
+            for (i, _), summary in zip(fallback, extracted):
+                results[i] = summary
+                tiers[i] = 'extractive'
+            metrics.inc('summaries_total', len(fallback), method='extractive')
+            # Fallbacks are articles the model was meant to summarize but didn't
+            model_indexes = set(i for i, _ in model_pending)
+            metrics.inc('extractive_fallbacks_total', sum(1 for i, _ in fallback if i in model_indexes))
+        
+        # Only cache model output, so the model name in the key is honest
+        if self.cache:
+            abstractive = [(clean_text, results[i]) for i, clean_text in pending if tiers[i] == 'abstractive']
+            if abstractive:
+                self.cache.put_many(abstractive)
+        
+        if deadline is not None:
+            metrics.observe('summary_budget_slack_seconds', deadline - time.perf_counter())
+        return list(zip(results, tiers))
+    
+    def abstractive_summaries(self, clean_texts, batch_size=8):
+        """Map-reduce model summaries (None where the model failed) for whole articles.
+        
+        Map: every chunk of every article is summarized in one set of batches.
+        Reduce: articles with several chunks are summarized again from their
+        joined chunk summaries, until each fits in a single chunk.
+        """
+        results = [None] * len(clean_texts)
+        texts = list(clean_texts)
+        active = list(range(len(texts)))
+        
+        for _ in range(GENERATION_PARAMS['max_reduce_rounds'] + 1):
+            try:
+                chunked = self.chunk_token_ids([texts[doc] for doc in active])
+            except Exception as e:
+                print(f"❌ AI Summarization failed: {e}")
+                break
+            flat = [(doc, ids) for doc, chunks in zip(active, chunked) for ids in chunks]
+            parts = {doc: [] for doc in active}
+            for (doc, _), summary in zip(flat, self.generate([ids for _, ids in flat], batch_size)):
+                parts[doc].append(summary)
             
-            # Method 2: Extractive summarization fallback
-            return self.extractive_summary(clean_text, num_sentences=2)
+            active = []
+            for doc, summaries in parts.items():
+                if not summaries or None in summaries:
+                    continue
+                if len(summaries) == 1:
+                    results[doc] = summaries[0]
+                else:
+                    texts[doc] = ' '.join(summaries)
+                    active.append(doc)
+            if not active:
+                break
+        
+        return results
+    
+    def chunk_token_ids(self, texts):
+        """Whole-sentence chunks of token ids per text, each within the model's input limit.
+        
+        Each text is tokenized once; the same ids are packed into chunks and fed to the model.
+        """
+        tokenizer = self.summarizer.tokenizer
+        # Leave room for the <s> ... </s> added around every chunk
+        limit = (min(GENERATION_PARAMS['max_input_tokens'], tokenizer.model_max_length)
+                 - tokenizer.num_special_tokens_to_add())
+        sentences = [split_sentences(text) for text in texts]
+        
+        if tokenizer.is_fast:
+            # Offsets map each token back to the sentence it starts in
+            encoded = tokenizer(texts, add_special_tokens=False, return_offsets_mapping=True)
+            per_sentence = [
+                group_by_sentence(ids, offsets, sentence_starts(text, text_sentences))
+                for text, text_sentences, ids, offsets
+                in zip(texts, sentences, encoded['input_ids'], encoded['offset_mapping'])
+            ]
+        else:
+            # Later sentences keep their leading space, as they would inside the full text
+            per_sentence = [
+                tokenizer([(' ' if n else '') + sentence for n, sentence in enumerate(text_sentences)],
+                          add_special_tokens=False)['input_ids']
+                for text_sentences in sentences
+            ]
+        
+        return [pack_sentences(ids, limit)[:GENERATION_PARAMS['max_chunks']] for ids in per_sentence]
+    
+    def generate(self, chunks, batch_size=8):
+        """Summary text per chunk of token ids (None where generation failed)"""
+        tokenizer = self.summarizer.tokenizer
+        model = self.summarizer.model
+        outputs = [None] * len(chunks)
+        inputs = [tokenizer.build_inputs_with_special_tokens(ids) for ids in chunks]
+        
+        for batch in self.length_buckets(list(enumerate(inputs)), batch_size):
+            start = time.perf_counter()
+            try:
+                with metrics.timer('model_batch_seconds', backend=self.backend):
+                    encoded = tokenizer.pad({'input_ids': [ids for _, ids in batch]}, return_tensors='pt')
+                    generated = model.generate(
+                        **encoded.to(self.summarizer.device),
+                        max_length=GENERATION_PARAMS['max_length'],
+                        min_length=GENERATION_PARAMS['min_length'],
+                        do_sample=GENERATION_PARAMS['do_sample']
+                    )
+                    summaries = tokenizer.batch_decode(generated, skip_special_tokens=True,
+                                                       clean_up_tokenization_spaces=True)
+            except Exception as e:
+                print(f"❌ AI Summarization failed: {e}")
+                metrics.inc('summarizer_errors_total', stage='model')
+                continue
+            metrics.inc('model_chunks_total', len(batch))
+            self.costs.observe_model(time.perf_counter() - start,
+                                     sum(len(ids) for _, ids in batch) + GENERATION_PARAMS['max_length'] * len(batch))
             
-        except Exception as e:
-            print(f"❌ All summarization methods failed: {e}")
-            # Final fallback: first 2 sentences
+            for (i, _), summary in zip(batch, summaries):
+                outputs[i] = summary.strip()
+        return outputs
+    
+    def length_buckets(self, items, batch_size):
+        """Group (index, token_ids) pairs into batches of similar token length"""
+        ordered = sorted(items, key=lambda item: len(item[1]))
+        return [ordered[i:i + batch_size] for i in range(0, len(ordered), max(1, batch_size))]
+    
+    def first_sentences(self, text, num_sentences=2):
+        """Final fallback: first sentences of the raw text"""
+        try:
             sentences = sent_tokenize(text)
-            return ' '.join(sentences[:2]) if sentences else text[:200] + "..."
\ No newline at end of file
+        except Exception:
+            sentences = []
+        return ' '.join(sentences[:num_sentences]) if sentences else text[:200] + "..."
\ No newline at end of file
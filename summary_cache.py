@@ -0,0 +1,142 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from metrics import metrics
+
+
+class SummaryCache:
+    """Content-addressed SQLite cache of summaries, safe to share between processes"""
+
+    def __init__(self, path, model_name, generation_params, ttl_seconds=7 * 24 * 3600,
+                 max_entries=10000):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # Everything that changes the output is part of the key
+        self._key_prefix = json.dumps(
+            {'model': model_name, 'params': generation_params}, sort_keys=True
+        )
+
+        conn = self._connect()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS summaries (
+                key TEXT PRIMARY KEY,
+                summary TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_summaries_last_access '
+                     'ON summaries (last_access)')
+
+    def _connect(self):
+        # One connection per thread; WAL lets readers run alongside a writer
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        """Close this thread's connection, e.g. before forking worker processes"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def after_fork(self):
+        """Drop state inherited from the parent process; a child opens its own connections"""
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def key(self, clean_text):
+        """Hash of the cleaned text plus model name and generation parameters"""
+        digest = hashlib.sha256()
+        digest.update(self._key_prefix.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(clean_text.encode('utf-8'))
+        return digest.hexdigest()
+
+    def get_many(self, clean_texts):
+        """Return cached summaries (or None) for each cleaned text"""
+        keys = [self.key(text) for text in clean_texts]
+        found = {}
+        now = time.time()
+        conn = self._connect()
+
+        try:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                placeholders = ','.join('?' * len(chunk))
+                rows = conn.execute(
+                    f'SELECT key, summary FROM summaries '
+                    f'WHERE key IN ({placeholders}) AND created_at >= ?',
+                    chunk + [now - self.ttl_seconds]
+                ).fetchall()
+                found.update(rows)
+                if rows:
+                    conn.executemany('UPDATE summaries SET last_access = ? WHERE key = ?',
+                                     [(now, key) for key, _ in rows])
+        except sqlite3.Error as e:
+            print(f"⚠️ Summary cache read failed: {e}")
+
+        results = [found.get(key) for key in keys]
+        with self._lock:
+            hits = sum(1 for result in results if result is not None)
+            self.hits += hits
+            self.misses += len(results) - hits
+        metrics.inc('summary_cache_hits_total', hits)
+        metrics.inc('summary_cache_misses_total', len(results) - hits)
+        return results
+
+    def get(self, clean_text):
+        return self.get_many([clean_text])[0]
+
+    def put_many(self, items):
+        """Store (clean_text, summary) pairs and evict expired and least recently used entries"""
+        if not items:
+            return
+        now = time.time()
+        rows = [(self.key(text), summary, now, now) for text, summary in items]
+        conn = self._connect()
+
+        try:
+            # BEGIN IMMEDIATE takes the write lock up front so concurrent
+            # writers queue on busy_timeout instead of failing mid-transaction
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                conn.executemany('INSERT OR REPLACE INTO summaries VALUES (?, ?, ?, ?)', rows)
+                conn.execute('DELETE FROM summaries WHERE created_at < ?',
+                             (now - self.ttl_seconds,))
+                overflow = conn.execute('SELECT COUNT(*) FROM summaries').fetchone()[0] - self.max_entries
+                if overflow > 0:
+                    conn.execute('''
+                        DELETE FROM summaries WHERE key IN (
+                            SELECT key FROM summaries ORDER BY last_access ASC LIMIT ?
+                        )
+                    ''', (overflow,))
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        except sqlite3.Error as e:
+            print(f"⚠️ Summary cache write failed: {e}")
+
+    def put(self, clean_text, summary):
+        self.put_many([(clean_text, summary)])
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0
+        }
@@ -0,0 +1,551 @@
+import re
+from datetime import datetime
+
+_SLOT_RE = re.compile(r'\{\{(\w+)\}\}')
+
+# Write buffer for streamed digests: cards are small, so they are batched into few syscalls
+STREAM_BUFFER_SIZE = 64 * 1024
+
+
+class CompiledTemplate:
+    """Template parsed once into literal chunks and named {{slot}}s"""
+
+    def __init__(self, source):
+        self.parts = []
+        position = 0
+        for match in _SLOT_RE.finditer(source):
+            self.parts.append((False, source[position:match.start()]))
+            self.parts.append((True, match.group(1)))
+            position = match.end()
+        self.parts.append((False, source[position:]))
+
+    @classmethod
+    def from_parts(cls, parts):
+        template = cls('')
+        template.parts = parts
+        return template
+
+    def bind(self, **values):
+        """Fill some slots now and merge adjacent literals, leaving the rest open"""
+        parts = []
+        for is_slot, text in self.parts:
+            if is_slot and text in values:
+                is_slot, text = False, str(values[text])
+            if not is_slot and parts and not parts[-1][0]:
+                parts[-1] = (False, parts[-1][1] + text)
+            else:
+                parts.append((is_slot, text))
+        return CompiledTemplate.from_parts(parts)
+
+    def render(self, **values):
+        return ''.join(str(values[text]) if is_slot else text for is_slot, text in self.parts)
+
+    def iter_render(self, **values):
+        """Rendered chunks in order; a slot given an iterable of strings is streamed from it"""
+        for is_slot, text in self.parts:
+            if not is_slot:
+                yield text
+                continue
+            value = values[text]
+            if isinstance(value, (str, int, float)):
+                yield str(value)
+            else:
+                yield from value
+
+
+# Browser page: static skeleton with inline CSS and JS, and one card per article
+PAGE_TEMPLATE = CompiledTemplate('''<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>AI News Digest - {{current_time}}</title>
+    <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css">
+    <style>
+        * {
+            margin: 0;
+            padding: 0;
+            box-sizing: border-box;
+        }
+
+        body {
+            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+            background: linear-gradient(135deg, #0c0c0c 0%, #1a1a2e 50%, #16213e 100%);
+            color: #ffffff;
+            min-height: 100vh;
+            overflow-x: hidden;
+        }
+
+        .container {
+            max-width: 1200px;
+            margin: 0 auto;
+            padding: 20px;
+            position: relative;
+        }
+
+        .header {
+            text-align: center;
+            margin-bottom: 40px;
+            position: relative;
+        }
+
+        .header::before {
+            content: '';
+            position: absolute;
+            top: -50px;
+            left: 50%;
+            transform: translateX(-50%);
+            width: 200px;
+            height: 200px;
+            background: radial-gradient(circle, rgba(0, 255, 255, 0.1) 0%, transparent 70%);
+            border-radius: 50%;
+            z-index: -1;
+        }
+
+        h1 {
+            font-size: 3rem;
+            font-weight: 700;
+            background: linear-gradient(45deg, #00ffff, #ff00ff, #ffff00);
+            background-size: 300% 300%;
+            -webkit-background-clip: text;
+            -webkit-text-fill-color: transparent;
+            animation: gradientShift 3s ease-in-out infinite;
+            margin-bottom: 10px;
+        }
+
+        @keyframes gradientShift {
+            0%, 100% { background-position: 0% 50%; }
+            50% { background-position: 100% 50%; }
+        }
+
+        .subtitle {
+            font-size: 1.2rem;
+            color: #a0a0a0;
+            margin-bottom: 30px;
+        }
+
+        .news-grid {
+            display: grid;
+            grid-template-columns: repeat(auto-fit, minmax(400px, 1fr));
+            gap: 30px;
+            margin-top: 40px;
+        }
+
+        .news-card {
+            background: rgba(255, 255, 255, 0.05);
+            backdrop-filter: blur(20px);
+            border: 1px solid rgba(255, 255, 255, 0.1);
+            border-radius: 20px;
+            padding: 30px;
+            transition: all 0.3s ease;
+            position: relative;
+            overflow: hidden;
+            animation: slideInUp 0.6s ease forwards;
+        }
+
+        .news-card::before {
+            content: '';
+            position: absolute;
+            top: 0;
+            left: -100%;
+            width: 100%;
+            height: 100%;
+            background: linear-gradient(90deg, transparent, rgba(255, 255, 255, 0.1), transparent);
+            transition: left 0.5s ease;
+        }
+
+        .news-card:hover::before {
+            left: 100%;
+        }
+
+        .news-card:hover {
+            transform: translateY(-10px);
+            box-shadow: 0 20px 60px rgba(0, 255, 255, 0.2);
+            border-color: rgba(0, 255, 255, 0.3);
+        }
+
+        .news-header {
+            display: flex;
+            justify-content: space-between;
+            align-items: center;
+            margin-bottom: 20px;
+        }
+
+        .news-number {
+            background: linear-gradient(45deg, #ff6b6b, #ee5a24);
+            color: white;
+            width: 40px;
+            height: 40px;
+            border-radius: 50%;
+            display: flex;
+            align-items: center;
+            justify-content: center;
+            font-weight: bold;
+            font-size: 1.2rem;
+        }
+
+        .news-source {
+            background: rgba(0, 255, 255, 0.2);
+            color: #00ffff;
+            padding: 6px 15px;
+            border-radius: 15px;
+            font-size: 0.9rem;
+            font-weight: 600;
+        }
+
+        .news-title {
+            font-size: 1.3rem;
+            font-weight: 600;
+            margin-bottom: 15px;
+            line-height: 1.4;
+            color: #ffffff;
+        }
+
+        .news-summary {
+            color: #b0b0b0;
+            line-height: 1.6;
+            margin-bottom: 20px;
+            font-size: 1rem;
+        }
+
+        .news-link {
+            display: inline-flex;
+            align-items: center;
+            gap: 8px;
+            color: #00ffff;
+            text-decoration: none;
+            font-weight: 600;
+            transition: all 0.3s ease;
+            padding: 8px 0;
+        }
+
+        .news-link:hover {
+            color: #ff00ff;
+            transform: translateX(5px);
+        }
+
+        .stats {
+            display: flex;
+            justify-content: center;
+            gap: 40px;
+            margin: 40px 0;
+            flex-wrap: wrap;
+        }
+
+        .stat {
+            text-align: center;
+            padding: 20px;
+            background: rgba(255, 255, 255, 0.05);
+            border-radius: 15px;
+            backdrop-filter: blur(10px);
+            border: 1px solid rgba(255, 255, 255, 0.1);
+            min-width: 150px;
+        }
+
+        .stat-number {
+            font-size: 2rem;
+            font-weight: bold;
+            color: #00ffff;
+            display: block;
+        }
+
+        .stat-label {
+            color: #a0a0a0;
+            font-size: 0.9rem;
+        }
+
+        .footer {
+            text-align: center;
+            margin-top: 60px;
+            padding: 30px;
+            border-top: 1px solid rgba(255, 255, 255, 0.1);
+            background: rgba(0, 0, 0, 0.3);
+            border-radius: 20px;
+        }
+
+        .footer p {
+            color: #888;
+            margin-bottom: 10px;
+        }
+
+        @keyframes slideInUp {
+            from {
+                opacity: 0;
+                transform: translateY(30px);
+            }
+            to {
+                opacity: 1;
+                transform: translateY(0);
+            }
+        }
+
+        @media (max-width: 768px) {
+            .news-grid {
+                grid-template-columns: 1fr;
+            }
+            
+            h1 {
+                font-size: 2rem;
+            }
+        }
+
+        .auto-refresh {
+            position: fixed;
+            top: 20px;
+            right: 20px;
+            background: rgba(0, 255, 255, 0.2);
+            color: #00ffff;
+            padding: 10px 20px;
+            border-radius: 20px;
+            font-size: 0.9rem;
+            backdrop-filter: blur(10px);
+            border: 1px solid rgba(0, 255, 255, 0.3);
+        }
+    </style>
+</head>
+<body>
+    <div class="auto-refresh">
+        <i class="fas fa-sync-alt"></i> Auto-generated: {{current_time}}
+    </div>
+
+    <div class="container">
+        <div class="header">
+            <h1><i class="fas fa-robot"></i> AI News Digest</h1>
+            <p class="subtitle">Your personalized daily news summary powered by AI</p>
+            <p class="subtitle">Generated on {{current_time}}</p>
+        </div>
+
+        <div class="stats">
+            <div class="stat">
+                <span class="stat-number">{{article_count}}</span>
+                <span class="stat-label">Articles</span>
+            </div>
+            <div class="stat">
+                <span class="stat-number">{{source_count}}</span>
+                <span class="stat-label">Sources</span>
+            </div>
+            <div class="stat">
+                <span class="stat-number">{{read_minutes}}</span>
+                <span class="stat-label">Min Read</span>
+            </div>
+        </div>
+
+        <div class="news-grid">
+            {{cards}}
+        </div>
+
+        <div class="footer">
+            <p><i class="fas fa-heart" style="color: #ff6b6b;"></i> News Summarization</p>
+            <p>Stay informed, stay ahead</p>
+        </div>
+    </div>
+
+    <script>
+        // Add floating particles effect
+        function createParticle() {
+            const particle = document.createElement('div');
+            particle.style.cssText = `
+                position: fixed;
+                width: 4px;
+                height: 4px;
+                background: rgba(0, 255, 255, 0.5);
+                border-radius: 50%;
+                pointer-events: none;
+                z-index: -1;
+                left: ${Math.random() * 100}vw;
+                top: 100vh;
+                animation: float 8s linear infinite;
+            `;
+            
+            document.body.appendChild(particle);
+            
+            setTimeout(() => {
+                particle.remove();
+            }, 8000);
+        }
+
+        // Add floating animation
+        const floatStyle = document.createElement('style');
+        floatStyle.textContent = `
+            @keyframes float {
+                to {
+                    transform: translateY(-100vh);
+                    opacity: 0;
+                }
+            }
+        `;
+        document.head.appendChild(floatStyle);
+
+        // Create particles periodically
+        setInterval(createParticle, 500);
+
+        // Auto-scroll effect
+        let scrollDirection = 1;
+        setInterval(() => {
+            window.scrollBy(0, scrollDirection);
+            if (window.scrollY >= document.body.scrollHeight - window.innerHeight - 10) {
+                scrollDirection = -1;
+            } else if (window.scrollY <= 0) {
+                scrollDirection = 1;
+            }
+        }, 100);
+    </script>
+</body>
+</html>''')
+
+PAGE_CARD_HEAD = CompiledTemplate('''
+            <div class="news-card" style="animation-delay: {{delay}}s;">
+                <div class="news-header">
+                    <div class="news-number">{{number}}</div>
+                    <div class="news-source">''')
+
+PAGE_CARD_BODY = CompiledTemplate('''{{source}}</div>
+                </div>
+                <h3 class="news-title">{{title}}</h3>
+                <p class="news-summary">{{summary}}</p>
+                <a href="{{url}}" target="_blank" class="news-link">
+                    <i class="fas fa-external-link-alt"></i>
+                    Read Full Article
+                </a>
+            </div>
+            ''')
+
+# Email digest: inline-styled header, cards and footer
+EMAIL_HEADER = CompiledTemplate('''
+        <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto; background: #1a1a1a; color: #ffffff; padding: 20px;">
+            <div style="text-align: center; margin-bottom: 30px;">
+                <h1 style="color: #00ffff; font-size: 28px; margin-bottom: 10px;">🤖 AI News Digest</h1>
+                <p style="color: #a0a0a0; font-size: 16px;">Generated on {{current_time}}</p>
+            </div>
+            
+            <div style="background: rgba(255,255,255,0.05); padding: 20px; border-radius: 10px; margin-bottom: 20px; text-align: center;">
+                <span style="color: #00ffff; font-size: 24px; font-weight: bold;">{{article_count}}</span>
+                <span style="color: #a0a0a0; margin-left: 10px;">Articles Summarized</span>
+            </div>
+        ''')
+
+EMAIL_CARD_HEAD = CompiledTemplate('''
+            <div style="background: rgba(255,255,255,0.05); border-radius: 15px; padding: 25px; margin-bottom: 20px; border-left: 4px solid #00ffff;">
+                <div style="display: flex; justify-content: space-between; align-items: center; margin-bottom: 15px;">
+                    <span style="background: #ff6b6b; color: white; width: 30px; height: 30px; border-radius: 50%; display: inline-flex; align-items: center; justify-content: center; font-weight: bold;">{{number}}</span>
+                    <span style="background: rgba(0,255,255,0.2); color: #00ffff; padding: 5px 15px; border-radius: 10px; font-size: 12px;">''')
+
+EMAIL_CARD_BODY = CompiledTemplate('''{{source}}</span>
+                </div>
+                <h3 style="color: #ffffff; font-size: 18px; margin-bottom: 15px; line-height: 1.4;">{{title}}</h3>
+                <p style="color: #b0b0b0; line-height: 1.6; margin-bottom: 15px; font-size: 14px;">{{summary}}</p>
+                <a href="{{url}}" style="color: #00ffff; text-decoration: none; font-weight: 600; font-size: 14px;" target="_blank">
+                    📖 Read Full Article →
+                </a>
+            </div>
+            ''')
+
+EMAIL_FOOTER = '''
+            <div style="text-align: center; margin-top: 30px; padding: 20px; border-top: 1px solid rgba(255,255,255,0.1);">
+                <p style="color: #888; margin-bottom: 10px;">💖 AI-Summary</p>
+                <p style="color: #888;">Stay informed, stay ahead</p>
+            </div>
+        </div>
+        '''
+
+
+def write_txt_header(f, now=None):
+    """Plain-text backup header"""
+    f.write(f"AI NEWS DIGEST - {(now or datetime.now()).strftime('%Y-%m-%d %H:%M')}\n")
+    f.write("="*60 + "\n\n")
+
+
+def write_txt_entry(f, index, item):
+    f.write(f"{index}. {item['title']}\n")
+    f.write(f"Source: {item['source']}\n")
+    f.write(f"Summary: {item['summary']}\n")
+    if item.get('tier'):
+        f.write(f"Tier: {item['tier']}\n")
+    f.write(f"URL: {item['url']}\n")
+    f.write("-" * 50 + "\n\n")
+
+
+class DigestRenderer:
+    """Renders page and email digests, caching everything recipients share.
+
+    The run timestamp is bound into the skeletons once and each article card is
+    rendered once, so a recipient's digest is just a join of cached fragments.
+    """
+
+    def __init__(self, now=None):
+        now = now or datetime.now()
+        self.page = PAGE_TEMPLATE.bind(current_time=now.strftime('%Y-%m-%d %H:%M:%S'))
+        self.email_header = EMAIL_HEADER.bind(current_time=now.strftime('%Y-%m-%d %H:%M'))
+        self._page_cards = {}
+        self._email_cards = {}
+        self._email_heads = {}
+
+    def card_values(self, item):
+        return {
+            'source': item['source'],
+            'title': item['title'],
+            'summary': item['summary'],
+            'url': item['url']
+        }
+
+    def page_card(self, index, item, cache=True):
+        key = (item['source'], item['title'], item['summary'], item['url'])
+        body = self._page_cards.get(key) if cache else None
+        if body is None:
+            body = PAGE_CARD_BODY.render(**self.card_values(item))
+            if cache:
+                self._page_cards[key] = body
+        return PAGE_CARD_HEAD.render(delay=index * 0.1, number=index + 1) + body
+
+    def email_card(self, number, item, cache=True):
+        key = (item['source'], item['title'], item['summary'], item['url'])
+        body = self._email_cards.get(key) if cache else None
+        if body is None:
+            body = EMAIL_CARD_BODY.render(**self.card_values(item))
+            if cache:
+                self._email_cards[key] = body
+        head = self._email_heads.get(number) if cache else None
+        if head is None:
+            head = EMAIL_CARD_HEAD.render(number=number)
+            if cache:
+                self._email_heads[number] = head
+        return head + body
+
+    def render_page(self, summaries):
+        """Standalone HTML page for the browser"""
+        return self.page.render(
+            article_count=len(summaries),
+            source_count=len(set(item['source'] for item in summaries)),
+            read_minutes=len(summaries) * 2,
+            cards=''.join(self.page_card(i, item) for i, item in enumerate(summaries))
+        )
+
+    def render_email(self, summaries):
+        """Inline-styled HTML email body"""
+        parts = [self.email_header.render(article_count=len(summaries))]
+        parts.extend(self.email_card(i, item) for i, item in enumerate(summaries, 1))
+        parts.append(EMAIL_FOOTER)
+        return ''.join(parts)
+
+    def iter_page(self, summaries):
+        """The page as a stream of chunks; cards are rendered as they are consumed and not cached"""
+        return self.page.iter_render(
+            article_count=len(summaries),
+            source_count=len(set(item['source'] for item in summaries)),
+            read_minutes=len(summaries) * 2,
+            cards=(self.page_card(i, item, cache=False) for i, item in enumerate(summaries))
+        )
+
+    def iter_email(self, summaries):
+        """The email body as a stream of chunks, for archive-sized digests"""
+        yield self.email_header.render(article_count=len(summaries))
+        for i, item in enumerate(summaries, 1):
+            yield self.email_card(i, item, cache=False)
+        yield EMAIL_FOOTER
+
+    def write_page(self, f, summaries):
+        """Stream the page into a text file or socket.makefile('w'); memory stays at one card"""
+        f.writelines(self.iter_page(summaries))
+
+    def write_email(self, f, summaries):
+        f.writelines(self.iter_email(summaries))
@@ -0,0 +1,68 @@
+import contextlib
+import io
+import time
+import unittest
+from types import SimpleNamespace
+from email_sender import EmailSender
+from fixtures import StubSMTPServer
+
+
+class SendManyTest(unittest.TestCase):
+    """send_many against the local SMTP sink"""
+
+    html = '<p>Today in technology</p>'
+
+    def sender(self, sink):
+        host, port = sink.address
+        return EmailSender(SimpleNamespace(EMAIL_ADDRESS='digest@example.com', EMAIL_PASSWORD='',
+                                           SMTP_SERVER=host, SMTP_PORT=port, SMTP_USE_TLS=False,
+                                           SMTP_TIMEOUT=10))
+
+    def messages(self, recipients):
+        return [(recipient, self.html) for recipient in recipients]
+
+    def test_reconnects_when_the_session_drops(self):
+        recipients = [f"user{i}@example.com" for i in range(5)]
+        with StubSMTPServer(drop_every=2) as sink, contextlib.redirect_stdout(io.StringIO()):
+            results = self.sender(sink).send_many(self.messages(recipients))
+            connections = sink.connections
+
+        self.assertTrue(all(result['sent'] for result in results))
+        self.assertEqual(sink.messages, recipients)
+        # The server hangs up after every second message
+        self.assertEqual(connections, 3)
+
+    def test_rate_limit_spaces_sends_across_workers(self):
+        recipients = [f"user{i}@example.com" for i in range(4)]
+        with StubSMTPServer() as sink, contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            results = self.sender(sink).send_many(self.messages(recipients), workers=2,
+                                                  rate_limit_per_minute=600)
+            elapsed = time.perf_counter() - start
+
+        self.assertTrue(all(result['sent'] for result in results))
+        # 600/minute is one send every 0.1s, shared by both workers
+        self.assertGreaterEqual(elapsed, 0.3)
+        self.assertLess(elapsed, 1.0)
+
+    def test_one_result_per_recipient_in_order(self):
+        recipients = ['first@example.com', 'reject@example.com', 'last@example.com']
+        with StubSMTPServer() as sink, contextlib.redirect_stdout(io.StringIO()):
+            results = self.sender(sink).send_many(self.messages(recipients))
+            connections = sink.connections
+
+        self.assertEqual([result['recipient'] for result in results], recipients)
+        self.assertEqual([result['sent'] for result in results], [True, False, True])
+        self.assertIsNone(results[0]['error'])
+        self.assertIn('550', results[1]['error'])
+        self.assertEqual(sink.messages, ['first@example.com', 'last@example.com'])
+        # A refused recipient doesn't cost the session
+        self.assertEqual(connections, 1)
+
+    def test_no_messages(self):
+        with StubSMTPServer() as sink:
+            self.assertEqual(self.sender(sink).send_many([]), [])
+            self.assertEqual(sink.connections, 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,176 @@
+import contextlib
+import io
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+from fetch_state import FetchState
+from fixtures import StubNewsAPI, topic_articles
+from news_fetcher import ApiBudget, BudgetExhausted, NewsFetcher
+
+
+def topics_in_order(articles):
+    """Each topic once, in the order its articles appear"""
+    order = []
+    for article in articles:
+        if not order or order[-1] != article.topic:
+            order.append(article.topic)
+    return order
+
+
+class ConcurrentFetchTest(unittest.TestCase):
+    """get_articles against the latency-injecting stub NewsAPI"""
+
+    topics = ['technology', 'business', 'science']
+
+    def fetcher(self, stub, **kwargs):
+        kwargs.setdefault('max_workers', len(self.topics))
+        return NewsFetcher('stub-key', base_url=stub.base_url, backoff_factor=0.01, **kwargs)
+
+    def test_topic_order_is_deterministic(self):
+        # The first topic is the slowest, so completion order is the reverse of topic order
+        latency = {'technology': 0.3, 'business': 0.15, 'science': 0.0}
+        with StubNewsAPI(latency=latency) as stub:
+            first = self.fetcher(stub).get_articles(self.topics, max_articles=9)
+            second = self.fetcher(stub).get_articles(self.topics, max_articles=9)
+
+        self.assertEqual(len(first), 9)
+        self.assertEqual(topics_in_order(first), self.topics)
+        self.assertEqual([article.url for article in first], [article.url for article in second])
+
+    def test_retries_rate_limited_requests(self):
+        with StubNewsAPI(fail_first=2) as stub:
+            articles = self.fetcher(stub, retries=3).get_articles(self.topics, max_articles=6)
+            requests_made = len(stub.requests)
+
+        self.assertEqual(len(articles), 6)
+        self.assertEqual(topics_in_order(articles), self.topics)
+        # Two 429s and one success per topic
+        self.assertEqual(requests_made, 3 * len(self.topics))
+
+    def test_gives_up_once_retries_are_spent(self):
+        with StubNewsAPI(fail_first=3) as stub, contextlib.redirect_stdout(io.StringIO()):
+            articles = self.fetcher(stub, retries=1).get_articles(self.topics, max_articles=6)
+            requests_made = len(stub.requests)
+
+        self.assertEqual(articles, [])
+        self.assertEqual(requests_made, 2 * len(self.topics))
+
+    def test_wall_time_tracks_slowest_topic(self):
+        latency = {'technology': 0.3, 'business': 0.3, 'science': 0.4}
+        with StubNewsAPI(latency=latency) as stub:
+            fetcher = self.fetcher(stub)
+            start = time.perf_counter()
+            articles = fetcher.get_articles(self.topics, max_articles=9)
+            elapsed = time.perf_counter() - start
+
+        self.assertEqual(len(articles), 9)
+        self.assertGreaterEqual(elapsed, 0.4)
+        # Sequential requests would take the sum, 1.0s
+        self.assertLess(elapsed, 0.7)
+
+
+class LockedFetchState(FetchState):
+    """FetchState whose budget table is held by another writer"""
+
+    def usage(self, day):
+        raise sqlite3.OperationalError('database is locked')
+
+    def spend(self, day, limit=0):
+        raise sqlite3.OperationalError('database is locked')
+
+
+class PagedFetchTest(unittest.TestCase):
+    """Request planning, paging, top-up and the daily request budget"""
+
+    topics = ['technology', 'business', 'science']
+
+    def fetcher(self, stub, **kwargs):
+        return NewsFetcher('stub-key', base_url=stub.base_url, backoff_factor=0.01, **kwargs)
+
+    def test_fewer_articles_than_topics(self):
+        topics = self.topics + ['health', 'sports']
+        with StubNewsAPI() as stub:
+            articles = self.fetcher(stub).get_articles(topics, max_articles=3)
+            queried = [params['q'] for params in stub.requests]
+
+        self.assertEqual(topics_in_order(articles), self.topics)
+        # Topics with no share of max_articles cost no request
+        self.assertEqual(sorted(queried), sorted(self.topics))
+
+    def test_stops_paging_once_enough_articles_qualify(self):
+        # Every second article is too short, so the first page of 30 has 15 qualifying
+        with StubNewsAPI(articles_per_topic=300, short_every=2) as stub:
+            articles = self.fetcher(stub).get_articles(['technology'], max_articles=20)
+            pages = [int(params.get('page', 1)) for params in stub.requests]
+
+        self.assertEqual(len(articles), 20)
+        self.assertEqual(pages, [1, 2])
+
+    def test_tops_up_from_other_topics(self):
+        corpus = {
+            'technology': topic_articles('technology', 2, shared_every=0),
+            'business': topic_articles('business', 100, shared_every=0),
+            'science': topic_articles('science', 100, shared_every=0)
+        }
+        with StubNewsAPI(corpus=corpus) as stub:
+            articles = self.fetcher(stub).get_articles(self.topics, max_articles=12)
+
+        counts = {topic: sum(article.topic == topic for article in articles) for topic in self.topics}
+        self.assertEqual(len(articles), 12)
+        self.assertEqual(counts['technology'], 2)
+        self.assertEqual(counts['business'] + counts['science'], 10)
+
+    def test_budget_exhausted(self):
+        budget = ApiBudget(daily_limit=2)
+        budget.acquire()
+        budget.acquire()
+        self.assertEqual(budget.remaining(), 0)
+        with self.assertRaises(BudgetExhausted):
+            budget.acquire()
+
+    def test_fetch_stops_when_budget_is_spent(self):
+        with StubNewsAPI() as stub, contextlib.redirect_stdout(io.StringIO()):
+            fetcher = self.fetcher(stub, max_workers=1, daily_budget=2)
+            articles = fetcher.get_articles(self.topics, max_articles=9)
+            requests_made = len(stub.requests)
+
+        self.assertEqual(requests_made, 2)
+        self.assertEqual(topics_in_order(articles), self.topics[:2])
+        self.assertEqual(fetcher.budget.remaining(), 0)
+
+    def test_locked_budget_falls_back_to_process_count(self):
+        with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+            budget = ApiBudget(daily_limit=1, state=LockedFetchState(os.path.join(tmp, 'state.sqlite3')))
+            budget.acquire()
+            with self.assertRaises(BudgetExhausted):
+                budget.acquire()
+
+
+class IncrementalCommitTest(unittest.TestCase):
+    """Fetch state only moves past articles a delivered digest included"""
+
+    def test_only_latest_fetch_holds_back_the_watermark(self):
+        with tempfile.TemporaryDirectory() as tmp, StubNewsAPI(unpublished=9) as stub:
+            fetcher = NewsFetcher('stub-key', base_url=stub.base_url,
+                                  state=FetchState(os.path.join(tmp, 'state.sqlite3')))
+            query = fetcher.query_key('technology')
+            first = fetcher.get_articles(['technology'], max_articles=9)
+            # Three make the digest, six are ranked out
+            fetcher.commit(first[:3])
+            self.assertEqual(len(fetcher.pending[query]), 6)
+            self.assertEqual(fetcher.state.watermark(query), first[-1].published)
+
+            # Nine newer articles fill the next fetch; it replaces what the first one left undelivered
+            stub.publish(9)
+            second = fetcher.get_articles(['technology'], max_articles=9)
+            self.assertGreater(second[-1].published, first[0].published)
+            self.assertEqual(len(fetcher.pending[query]), 9)
+            fetcher.commit(second[:3])
+            self.assertEqual(len(fetcher.pending[query]), 6)
+            # Held back by this fetch's oldest undelivered article, not the first fetch's
+            self.assertEqual(fetcher.state.watermark(query), second[-1].published)
+
+if __name__ == '__main__':
+    unittest.main()
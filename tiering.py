@@ -0,0 +1,96 @@
+import math
+
+# Summarization tiers, most to least expensive
+TIERS = ('abstractive', 'extractive', 'lead')
+
+# BART's BPE averages about 1.3 tokens per English word in news text
+TOKENS_PER_WORD = 1.3
+
+
+def estimate_tokens(text):
+    """Approximate model token count, without loading the tokenizer"""
+    return int(len(text.split()) * TOKENS_PER_WORD) + 1
+
+
+class SummaryCostModel:
+    """Running estimates of what each summarization tier costs per article.
+
+    Model cost is counted in work units, input tokens plus the output tokens
+    generated per chunk (and per reduce pass for long articles), and converted
+    to seconds with a moving average of the measured seconds per unit. The
+    extractive tier is a moving average of seconds per article. Both start
+    from conservative priors, which the first measurement replaces outright.
+    """
+
+    def __init__(self, max_input_tokens=1024, max_chunks=8, output_tokens=100,
+                 seconds_per_unit=0.015, extractive_seconds=0.005, model_load_seconds=20.0,
+                 smoothing=0.3):
+        self.max_input_tokens = max_input_tokens
+        self.max_chunks = max_chunks
+        self.output_tokens = output_tokens
+        self.seconds_per_unit = seconds_per_unit
+        self.extractive_seconds = extractive_seconds
+        self.model_load_seconds = model_load_seconds
+        self.smoothing = smoothing
+        self.measured = set()
+
+    def units(self, tokens):
+        """Model work units for one article of `tokens` input tokens"""
+        chunks = min(self.max_chunks, max(1, math.ceil(tokens / self.max_input_tokens)))
+        units = min(tokens, self.max_input_tokens * chunks) + self.output_tokens * chunks
+        if chunks > 1:
+            # Reduce pass over the joined chunk summaries
+            units += self.output_tokens * (chunks + 1)
+        return units
+
+    def abstractive_seconds(self, text):
+        return self.seconds_per_unit * self.units(estimate_tokens(text))
+
+    def observe_model(self, seconds, units):
+        if units > 0:
+            self.seconds_per_unit = self._average('model', self.seconds_per_unit, seconds / units)
+
+    def observe_extractive(self, seconds, articles):
+        if articles > 0:
+            self.extractive_seconds = self._average('extractive', self.extractive_seconds, seconds / articles)
+
+    def observe_model_load(self, seconds):
+        self.model_load_seconds = seconds
+
+    def _average(self, name, current, sample):
+        if name not in self.measured:
+            self.measured.add(name)
+            return sample
+        return current + self.smoothing * (sample - current)
+
+
+def plan_tiers(texts, remaining, costs, reserve=0, model_state=True):
+    """Tier per text so the estimated cost fits in `remaining` seconds.
+
+    texts are in priority order (highest-ranked first). Extractive time is set
+    aside for `reserve` articles still to come, then every text gets the
+    extractive tier while it fits (lead sentences, which are free, after that),
+    and texts are upgraded to abstractive in priority order while the extra
+    cost fits. model_state: True if the model is loaded, None if it would have
+    to be loaded first, False if it is unavailable.
+    """
+    tiers = ['lead'] * len(texts)
+    budget = remaining - reserve * costs.extractive_seconds
+    for i in range(len(texts)):
+        if costs.extractive_seconds > budget:
+            break
+        tiers[i] = 'extractive'
+        budget -= costs.extractive_seconds
+
+    if model_state is False:
+        return tiers
+    load = costs.model_load_seconds if model_state is None else 0.0
+    for i, text in enumerate(texts):
+        extra = load + costs.abstractive_seconds(text)
+        if tiers[i] == 'extractive':
+            extra -= costs.extractive_seconds
+        if extra <= budget:
+            tiers[i] = 'abstractive'
+            budget -= extra
+            load = 0.0
+    return tiers
@@ -0,0 +1,263 @@
+import math
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from metrics import metrics
+
+# Summarizer built in the parent before forking; workers inherit it copy-on-write
+_preloaded_summarizer = None
+
+
+def _pin_threads(threads):
+    """Limit torch/BLAS intra-op threads so workers don't oversubscribe the cores"""
+    for var in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS'):
+        os.environ[var] = str(threads)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except Exception:
+        pass
+
+
+def _worker_main(worker_id, factory, threads, batch_size, tasks, results):
+    _pin_threads(threads)
+    try:
+        summarizer = _preloaded_summarizer or factory()
+        cache = getattr(summarizer, 'cache', None)
+        if _preloaded_summarizer is not None and hasattr(cache, 'after_fork'):
+            # SQLite connections must never be used across fork()
+            cache.after_fork()
+        if hasattr(summarizer, 'warmup'):
+            summarizer.warmup()
+    except Exception as e:
+        # Respawning would fail the same way, so report it and exit for good
+        results.put(('failed', worker_id, None, str(e), 0.0))
+        return
+    results.put(('ready', worker_id, None, None, 0.0))
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            return
+        batch_id, texts, cleaned, deadline = task
+        results.put(('started', worker_id, batch_id, None, 0.0))
+        start = time.perf_counter()
+        try:
+            # Deadlines cross the process boundary as wall-clock time
+            summaries = summarizer.summarize_tiered(
+                texts, batch_size=batch_size, cleaned=cleaned,
+                deadline=None if deadline is None else start + deadline - time.time()
+            )
+        except Exception as e:
+            results.put(('error', worker_id, batch_id, str(e), time.perf_counter() - start))
+        else:
+            results.put(('done', worker_id, batch_id, summaries, time.perf_counter() - start))
+
+
+class SummarizerPool:
+    """N worker processes, each holding one summarizer, fed article batches through a queue.
+
+    With the 'fork' start method and preload=True the model is loaded once in
+    the parent and shared copy-on-write; start the pool before any other thread,
+    since forking a threaded process copies locks other threads hold (a pool
+    started later uses forkserver instead). Crashed workers are replaced and their
+    in-flight batch is retried; a worker that fails before it is ready is not.
+    Replacements start mid-run, with other threads busy, so they never fork.
+    """
+
+    def __init__(self, summarizer_factory, num_workers=None, batch_size=8, preload=True,
+                 threads_per_worker=None, max_attempts=2):
+        self.factory = summarizer_factory
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // self.num_workers)
+        self.max_attempts = max_attempts
+        self.preload = preload and 'fork' in mp.get_all_start_methods()
+        # Forkserver and spawn children load their own model and are safe to start at any time
+        self.safe_context = mp.get_context('forkserver' if 'forkserver' in mp.get_all_start_methods()
+                                           else 'spawn')
+        self.context = mp.get_context('fork') if self.preload else self.safe_context
+        self.tasks = None
+        self.results = None
+        self.workers = {}
+        self.worker_stats = {}
+        self.ready = set()
+        self.failed = {}
+        self.restarts = 0
+        self.calls = 0
+
+    def start(self):
+        global _preloaded_summarizer
+        if self.tasks is not None:
+            return self
+        if self.preload and threading.active_count() > 1:
+            print("⚠️ Summarizer pool started with other threads running; using forkserver instead of fork")
+            self.preload = False
+            self.context = self.safe_context
+        if self.preload and _preloaded_summarizer is None:
+            try:
+                _preloaded_summarizer = self.factory()
+                if hasattr(_preloaded_summarizer, 'warmup'):
+                    _preloaded_summarizer.warmup()
+            except Exception as e:
+                # Each worker tries on its own and reports the failure
+                print(f"⚠️ Could not preload summarizer: {e}")
+                _preloaded_summarizer = None
+            # Nothing the children inherit may hold an open SQLite connection
+            cache = getattr(_preloaded_summarizer, 'cache', None)
+            if hasattr(cache, 'close'):
+                cache.close()
+
+        # Queues from the safe context can be handed to forked and replacement workers alike
+        self.tasks = self.safe_context.Queue()
+        self.results = self.safe_context.Queue()
+        for worker_id in range(self.num_workers):
+            self.spawn(worker_id, self.context)
+        return self
+
+    def spawn(self, worker_id, context):
+        process = context.Process(
+            target=_worker_main,
+            args=(worker_id, self.factory, self.threads_per_worker, self.batch_size,
+                  self.tasks, self.results),
+            name=f"summarizer-{worker_id}",
+            daemon=True
+        )
+        process.start()
+        self.workers[worker_id] = process
+        self.ready.discard(worker_id)
+        self.worker_stats.setdefault(worker_id, {'batches': 0, 'articles': 0,
+                                                 'busy_seconds': 0.0, 'restarts': 0})
+
+    def summarize_many(self, texts, batch_size=None, cleaned=False, deadline=None, reserve=0):
+        """Summaries for texts, in order, spread over all workers"""
+        return [summary for summary, _ in self.summarize_tiered(texts, batch_size, cleaned, deadline, reserve)]
+
+    def summarize_tiered(self, texts, batch_size=None, cleaned=False, deadline=None, reserve=0):
+        """(summary, tier) for texts, in order, spread over all workers.
+
+        Each worker plans the tiers of its own batch against the shared deadline;
+        batches run in parallel, so `reserve` is not needed and ignored.
+        """
+        texts = list(texts)
+        if not texts:
+            return []
+        self.start()
+        if deadline is not None:
+            deadline = time.time() + deadline - time.perf_counter()
+
+        # Small enough chunks that every worker gets a share of this call; batch ids
+        # carry the call number so a late reply from an earlier call is ignored
+        self.calls += 1
+        chunk = max(1, min(batch_size or self.batch_size, math.ceil(len(texts) / self.num_workers)))
+        batches = {(self.calls, start): texts[start:start + chunk]
+                   for start in range(0, len(texts), chunk)}
+        attempts = {batch_id: 1 for batch_id in batches}
+        for batch_id, batch in batches.items():
+            self.tasks.put((batch_id, batch, cleaned, deadline))
+
+        results = [None] * len(texts)
+        remaining = set(batches)
+        in_flight = {}
+
+        def give_up(batch_id):
+            for offset, text in enumerate(batches[batch_id]):
+                results[batch_id[1] + offset] = (text[:200] + "...", 'lead')
+            remaining.discard(batch_id)
+
+        def retry(batch_id, reason):
+            if attempts[batch_id] >= self.max_attempts:
+                print(f"❌ Summarizer batch failed {attempts[batch_id]} times ({reason}), using lead text")
+                give_up(batch_id)
+            else:
+                attempts[batch_id] += 1
+                self.tasks.put((batch_id, batches[batch_id], cleaned, deadline))
+
+        while remaining:
+            try:
+                kind, worker_id, batch_id, payload, seconds = self.results.get(timeout=0.5)
+            except queue.Empty:
+                self.replace_dead_workers(in_flight, retry)
+                if len(self.failed) >= self.num_workers:
+                    print("❌ No summarizer worker could start, using lead text")
+                    for batch_id in list(remaining):
+                        give_up(batch_id)
+                continue
+
+            if kind == 'ready':
+                self.ready.add(worker_id)
+            elif kind == 'failed':
+                print(f"❌ Summarizer worker {worker_id} failed to start: {payload}")
+                self.failed[worker_id] = payload
+            elif kind == 'started':
+                in_flight[worker_id] = tuple(batch_id)
+            elif kind in ('done', 'error'):
+                in_flight.pop(worker_id, None)
+                batch_id = tuple(batch_id)
+                if batch_id not in remaining:
+                    continue
+                if kind == 'error':
+                    retry(batch_id, payload)
+                    continue
+                for offset, result in enumerate(payload):
+                    results[batch_id[1] + offset] = tuple(result)
+                remaining.discard(batch_id)
+                stats = self.worker_stats[worker_id]
+                stats['batches'] += 1
+                stats['articles'] += len(payload)
+                stats['busy_seconds'] += seconds
+                metrics.observe('worker_batch_seconds', seconds, worker=worker_id)
+
+        return results
+
+    def replace_dead_workers(self, in_flight, retry):
+        for worker_id, process in list(self.workers.items()):
+            if process.is_alive() or worker_id in self.failed:
+                continue
+            if worker_id not in self.ready:
+                # Died while loading; a replacement would most likely crash the same way
+                print(f"❌ Summarizer worker {worker_id} exited during startup ({process.exitcode})")
+                self.failed[worker_id] = f"exit code {process.exitcode}"
+                if worker_id in in_flight:
+                    retry(in_flight.pop(worker_id), f"worker exit code {process.exitcode}")
+                continue
+            print(f"⚠️ Summarizer worker {worker_id} exited ({process.exitcode}), restarting")
+            self.restarts += 1
+            metrics.inc('worker_restarts_total')
+            self.worker_stats[worker_id]['restarts'] += 1
+            self.spawn(worker_id, self.safe_context)
+            if worker_id in in_flight:
+                retry(in_flight.pop(worker_id), f"worker exit code {process.exitcode}")
+
+    def warmup(self):
+        self.start()
+        return True
+
+    def stats(self):
+        """Per-worker throughput"""
+        report = {}
+        for worker_id, stats in self.worker_stats.items():
+            busy = stats['busy_seconds']
+            report[worker_id] = dict(stats, articles_per_sec=stats['articles'] / busy if busy else 0.0)
+        return report
+
+    def close(self):
+        if self.tasks is None:
+            return
+        for _ in self.workers:
+            self.tasks.put(None)
+        for process in self.workers.values():
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self.workers = {}
+        self.tasks = None
+        self.results = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()